@@ -8,8 +8,21 @@ from dna_analyzer import (
     run_skeleton_length_analysis_pipeline,
     run_visualization_per_dose_pipeline,
     run_analysis_pipeline,
-    run_full_skeleton_analysis_pipeline
+    run_full_skeleton_analysis_pipeline,
+    run_watch_pipeline,
+    run_merge_pipeline,
+    run_triage_pipeline,
+    run_length_calibration_pipeline,
+    run_pipelines,
+    run_thinning_calibration_pipeline,
+    run_threshold_benchmark_pipeline,
+    run_timelapse_pipeline
 )
+from dna_analyzer.sharding import parse_shard
+from dna_analyzer.parallel import ParallelConfig, available_cpus
+from dna_analyzer.memory import parse_memory_size
+from dna_analyzer.preprocessor import parse_level
+from dna_analyzer.telemetry import RunMetrics
 
 # Mapeia os nomes amigáveis das pipelines para as funções que as executam
 PIPELINES = {
@@ -20,9 +33,49 @@ PIPELINES = {
     "skeleton-length": run_skeleton_length_analysis_pipeline,
     "visualization-per-dose": run_visualization_per_dose_pipeline,
     "analysis": run_analysis_pipeline,
-    "full-skeleton-analysis": run_full_skeleton_analysis_pipeline
+    "full-skeleton-analysis": run_full_skeleton_analysis_pipeline,
+    "watch": run_watch_pipeline,
+    "merge": run_merge_pipeline,
+    "triage": run_triage_pipeline,
+    "calibrate-length": run_length_calibration_pipeline,
+    "calibrate-thinning": run_thinning_calibration_pipeline,
+    "benchmark-threshold": run_threshold_benchmark_pipeline,
+    "timelapse": run_timelapse_pipeline,
+    "run": run_pipelines
 }
 
+# Pipelines que aceitam --shard i/N (seus resultados parciais são combinados com `merge`)
+SHARDABLE_PIPELINES = {"dose-response", "skeleton-length", "analysis", "full-skeleton-analysis"}
+
+# Pipelines que o comando `run` executa juntas em uma única passada pelas imagens.
+# visualization-per-dose não aceita --shard: ela só exibe gráficos, sem resultados
+# parciais para o `merge` combinar (no `run` com --shard, exibe a fatia do nó)
+MULTI_PIPELINES = SHARDABLE_PIPELINES | {"visualization-per-dose"}
+
+# Pipelines que aceitam --from-raw (pré-processamento e análise em memória, sem PNG intermediário)
+FUSABLE_PIPELINES = SHARDABLE_PIPELINES | {"run"}
+
+# Pipelines com controle de qualidade das imagens (aceitam --reject-quality)
+QUALITY_PIPELINES = SHARDABLE_PIPELINES | {"run"}
+
+# Pipelines que processam as imagens em vários processos (aceitam --workers e --threads)
+PARALLEL_PIPELINES = SHARDABLE_PIPELINES | {"preprocess", "triage", "run", "skeleton-viz", "compare-edges",
+                                            "visualization-per-dose"}
+
+def positive_int(value):
+    """Tipo do argparse para inteiros maiores que zero."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"deve ser um inteiro positivo (recebido: {value})")
+    return number
+
+def positive_float(value):
+    """Tipo do argparse para números maiores que zero."""
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"deve ser um número positivo (recebido: {value})")
+    return number
+
 def main():
     # --- Configuração do argparse ---
     parser = argparse.ArgumentParser(
@@ -35,14 +88,204 @@ def main():
         help="O nome da pipeline de análise a ser executada.",
         choices=PIPELINES.keys() # Restringe as escolhas às chaves do nosso dicionário
     )
+
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        help="Para 'merge': as pipelines cujos resultados parciais serão combinados\n"
+             "(padrão: todas as que tiverem resultados parciais).\n"
+             "Para 'run': as pipelines executadas juntas em uma única passada pelas\n"
+             f"imagens ({', '.join(sorted(MULTI_PIPELINES))})."
+    )
+
+    parser.add_argument(
+        "--shard",
+        metavar="i/N",
+        help="Processa apenas a fatia i de N das imagens (partição estável por hash do\n"
+             "nome do arquivo) e salva resultados parciais. Ex: --shard 1/4.\n"
+             f"Disponível para: {', '.join(sorted(SHARDABLE_PIPELINES | {'run'}))}."
+    )
+    
+    parser.add_argument(
+        "--from-raw",
+        action="store_true",
+        help="Lê as imagens brutas de ./data/raw e faz a normalização da pipeline\n"
+             "'preprocess' em memória, sem gravar e reler o PNG processado.\n"
+             f"Disponível para: {', '.join(sorted(FUSABLE_PIPELINES))}."
+    )
+
+    parser.add_argument(
+        "--save-processed",
+        action="store_true",
+        help="Com --from-raw, também salva as imagens normalizadas em\n"
+             "./data/processed/extended_images."
+    )
+
+    parser.add_argument(
+        "--level",
+        metavar="MÉTODO[:GRAU]",
+        help="Com --from-raw, nivela o fundo de cada varredura bruta antes da\n"
+             "normalização: 'polynomial[:GRAU]' (polinômio por linha, grau padrão 1)\n"
+             "ou 'median' (mediana de cada linha). Ex: --level polynomial:2."
+    )
+    
+    parser.add_argument(
+        "--reject-quality",
+        action="store_true",
+        help="Descarta das estatísticas as imagens reprovadas no controle de qualidade\n"
+             "(por padrão, elas só são sinalizadas em qualidade_imagens.csv).\n"
+             f"Disponível para: {', '.join(sorted(QUALITY_PIPELINES))}."
+    )
+
+    parser.add_argument(
+        "--edge-metrics",
+        action="store_true",
+        help="Em compare-edges, calcula as métricas de bordas de cada imagem e as agrega\n"
+             "por dose, salvando os mapas e a figura só para uma amostra por dose."
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=positive_int,
+        help="Número de processos de trabalho (padrão: um por núcleo, limitado ao\n"
+             f"número de imagens; núcleos disponíveis: {available_cpus()})."
+    )
+
+    parser.add_argument(
+        "--threads",
+        type=positive_int,
+        help="Threads do OpenCV/BLAS por processo (padrão: núcleos / processos).\n"
+             "Processos x threads nunca excede o número de núcleos."
+    )
+    
+    parser.add_argument(
+        "--memory-budget",
+        metavar="TAMANHO",
+        help="Memória máxima para as imagens em processamento simultâneo (ex: 4G, 512M).\n"
+             "A memória de cada imagem é estimada pelas dimensões do cabeçalho.\n"
+             "Padrão: 70%% da memória disponível."
+    )
+    
+    parser.add_argument(
+        "--no-cost-model",
+        action="store_true",
+        help="Envia as imagens na ordem dos arquivos, em vez das mais caras (pelo\n"
+             "modelo de custo) para as mais baratas."
+    )
+
+    parser.add_argument(
+        "--timeout",
+        type=positive_float,
+        metavar="SEGUNDOS",
+        help="Tempo máximo por imagem. Acima dele, a imagem vai para a quarentena\n"
+             "(quarentena.csv na pasta de resultados) e a execução continua."
+    )
+
+    parser.add_argument(
+        "--memory-limit",
+        metavar="TAMANHO",
+        help="Memória máxima de cada processo de trabalho (ex: 2G). Uma imagem que\n"
+             "exceda o limite vai para a quarentena em vez de derrubar a execução."
+    )
+    
+    parser.add_argument(
+        "--metrics-file",
+        metavar="ARQUIVO",
+        help="Grava métricas de progresso (formato Prometheus) neste arquivo durante a\n"
+             "execução, ex: ./results/metrics.prom."
+    )
+
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        metavar="PORTA",
+        help="Expõe as métricas de progresso em http://127.0.0.1:PORTA/metrics."
+    )
+
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=5.0,
+        metavar="SEGUNDOS",
+        help="Intervalo de atualização do arquivo de métricas (padrão: 5s)."
+    )
     
     args = parser.parse_args()
+
+    # --- Validação das opções ---
+    kwargs = {}
+    if args.shard is not None:
+        if args.pipeline not in SHARDABLE_PIPELINES | {"run"}:
+            parser.error(f"--shard não é suportado pela pipeline '{args.pipeline}'.")
+        try:
+            kwargs['shard'] = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.from_raw or args.save_processed or args.level is not None:
+        if args.pipeline not in FUSABLE_PIPELINES:
+            parser.error(f"--from-raw não é suportado pela pipeline '{args.pipeline}'.")
+        if not args.from_raw:
+            parser.error("--save-processed e --level requerem --from-raw.")
+        kwargs['from_raw'] = True
+        kwargs['save_processed'] = args.save_processed
+        if args.level is not None:
+            try:
+                kwargs['level'] = parse_level(args.level)
+            except ValueError as e:
+                parser.error(str(e))
+    if args.reject_quality:
+        if args.pipeline not in QUALITY_PIPELINES:
+            parser.error(f"--reject-quality não é suportado pela pipeline '{args.pipeline}'.")
+        kwargs['reject_quality'] = True
+    if args.edge_metrics:
+        if args.pipeline != "compare-edges":
+            parser.error(f"--edge-metrics não é suportado pela pipeline '{args.pipeline}'.")
+        kwargs['edge_metrics'] = True
+    if any(value is not None for value in (args.workers, args.threads, args.memory_budget, args.timeout,
+                                           args.memory_limit)) or args.no_cost_model:
+        if args.pipeline not in PARALLEL_PIPELINES:
+            parser.error(f"--workers/--threads/--memory-budget/--timeout/--memory-limit/--no-cost-model não são "
+                         f"suportados pela pipeline '{args.pipeline}'.")
+    if args.pipeline in PARALLEL_PIPELINES:
+        try:
+            memory_budget = parse_memory_size(args.memory_budget) if args.memory_budget else None
+            memory_limit = parse_memory_size(args.memory_limit) if args.memory_limit else None
+        except ValueError as e:
+            parser.error(str(e))
+        kwargs['parallel'] = ParallelConfig(workers=args.workers, threads_per_worker=args.threads,
+                                            memory_budget=memory_budget, task_timeout=args.timeout,
+                                            task_memory_limit=memory_limit, cost_model=not args.no_cost_model)
+    metrics = None
+    if args.metrics_file is not None or args.metrics_port is not None:
+        if args.pipeline not in PARALLEL_PIPELINES:
+            parser.error(f"--metrics-file/--metrics-port não são suportados pela pipeline '{args.pipeline}'.")
+        metrics = RunMetrics(args.pipeline, textfile=args.metrics_file, port=args.metrics_port,
+                             interval=args.metrics_interval)
+        kwargs['metrics'] = metrics
+    if args.pipeline == "run":
+        if not args.targets:
+            parser.error(f"'run' requer as pipelines a executar ({', '.join(sorted(MULTI_PIPELINES))}).")
+        unsupported = [name for name in args.targets if name not in MULTI_PIPELINES]
+        if unsupported:
+            parser.error(f"'run' não suporta: {', '.join(unsupported)}. "
+                         f"Disponíveis: {', '.join(sorted(MULTI_PIPELINES))}.")
+        kwargs['names'] = args.targets
+    elif args.targets:
+        if args.pipeline != "merge":
+            parser.error(f"A pipeline '{args.pipeline}' não aceita argumentos adicionais: {' '.join(args.targets)}")
+        kwargs['targets'] = args.targets
     
     # --- Execução da pipeline escolhida ---
     selected_pipeline_func = PIPELINES.get(args.pipeline)
     
     if selected_pipeline_func:
-        selected_pipeline_func()
+        if metrics is not None:
+            metrics.start()
+        try:
+            selected_pipeline_func(**kwargs)
+        finally:
+            if metrics is not None:
+                metrics.stop()
     else:
         print(f"Erro: Pipeline '{args.pipeline}' não encontrada.")
 
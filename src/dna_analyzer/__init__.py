@@ -4,12 +4,35 @@
 from .preprocessor import ImagePreprocessor
 from .segmenter import Segmenter
 from .feature_extractor import FeatureExtractor
-from .stats_calculator import StatsCalculator
+from .stats_calculator import StatsCalculator, IncrementalDoseStats
 from .visualizer import Visualizer
 from .analyzer import Analyzer
+from .watcher import FolderWatcher
+from .parallel import ParallelConfig
+from .executor import BatchExecutor
+from .telemetry import RunMetrics
+from .quality import QualityGate
+from .skeleton_topology import SkeletonTopology
+from .atlas import ImageAtlas
+from .molecule_index import MoleculeIndex
+from .contour_store import ContourStore
+from .sparse_skeleton import SparseSkeleton
+from .shared_ring import SharedRing
+from .thinning import ThinningBackend, get_thinning_backend
+from .local_threshold import LocalThreshold, get_local_threshold
+from .timelapse import FrameSequence, TimeLapseAnalyzer, MoleculeTracker
 
 # Importa as classes do submódulo de IO
-from .io import Loader, Saver
+from .io import Loader, Saver, HeightMap
+
+# Núcleo de cálculo das pipelines sobre imagens em memória (sem acesso ao disco)
+from .core import (
+    compute_dose_response,
+    compute_skeleton_length,
+    compute_analysis,
+    compute_full_skeleton_analysis,
+    ImageContext
+)
 
 # Importa as funções de pipeline para serem usadas pelo main.py
 from .pipelines import (
@@ -20,7 +43,15 @@ from .pipelines import (
     run_skeleton_length_analysis_pipeline,
     run_visualization_per_dose_pipeline,
     run_analysis_pipeline,
-    run_full_skeleton_analysis_pipeline
+    run_full_skeleton_analysis_pipeline,
+    run_watch_pipeline,
+    run_merge_pipeline,
+    run_triage_pipeline,
+    run_length_calibration_pipeline,
+    run_pipelines,
+    run_thinning_calibration_pipeline,
+    run_threshold_benchmark_pipeline,
+    run_timelapse_pipeline
 )
 
 __all__ = [
@@ -29,7 +60,15 @@ __all__ = [
     'run_skeleton_analysis_pipeline', 'run_comparison_pipeline',
     'run_preprocessing_task_pipeline', 'run_skeleton_length_analysis_pipeline',
     'run_visualization_per_dose_pipeline', 'run_analysis_pipeline',
-    'run_full_skeleton_analysis_pipeline'
+    'run_full_skeleton_analysis_pipeline', 'IncrementalDoseStats', 'FolderWatcher',
+    'run_watch_pipeline', 'run_merge_pipeline', 'ParallelConfig', 'BatchExecutor',
+    'RunMetrics', 'run_triage_pipeline', 'QualityGate', 'compute_dose_response',
+    'compute_skeleton_length', 'compute_analysis', 'compute_full_skeleton_analysis', 'SkeletonTopology',
+    'run_length_calibration_pipeline', 'ImageAtlas',
+    'MoleculeIndex', 'ContourStore', 'SparseSkeleton', 'ImageContext', 'run_pipelines',
+    'SharedRing', 'ThinningBackend', 'get_thinning_backend', 'run_thinning_calibration_pipeline',
+    'HeightMap', 'LocalThreshold', 'get_local_threshold', 'run_threshold_benchmark_pipeline',
+    'FrameSequence', 'TimeLapseAnalyzer', 'MoleculeTracker', 'run_timelapse_pipeline'
 ]
 
 __version__ = "2.0.0" # Versão atualizada
\ No newline at end of file
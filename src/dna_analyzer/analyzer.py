@@ -1,4 +1,5 @@
 # src/dna_analyzer/analyzer.py
+import numpy as np
 from .segmenter import Segmenter
 from .feature_extractor import FeatureExtractor
 from .visualizer import Visualizer
@@ -26,10 +27,12 @@ class Analyzer:
             image (numpy.ndarray): A imagem de entrada.
 
         Returns:
-            dict: Um dicionário com os resultados, incluindo estatísticas e imagens.
+            dict: Um dicionário com os resultados, incluindo estatísticas, imagens e
+            os contornos válidos em um ContourStore, com as colunas 'classe'
+            ('DNA'/'RNA') e 'circularidade'.
         """
-        # Etapa 1: Segmentação
-        contours, edges = self.segmenter.segment(image)
+        # Etapa 1: Segmentação (contornos em um único buffer de pontos)
+        contours, edges = self.segmenter.segment(image, compact=True)
 
         # Etapa 2: Extração de Características
         features = self.extractor.extract_features(contours)
@@ -41,15 +44,24 @@ class Analyzer:
             features["rna_contours"]
         )
 
+        # Contornos classificados, para persistência e para redesenhar as sobreposições
+        circularities = np.asarray(features["circularities"], dtype=np.float64)
+        classified = contours.select(features["valid_indices"])
+        classified.metadata['classe'] = np.where(circularities > self.extractor.circularity_threshold, 'RNA', 'DNA')
+        classified.metadata['circularidade'] = circularities
+
         return {
             "statistics": features["statistics"],
             "dna_image": dna_image,
-            "rna_image": rna_image
+            "rna_image": rna_image,
+            "contours": classified
         }
 
-    def run_skeleton_pipeline(self, image):
+    def run_skeleton_pipeline(self, image, sparse=False):
         """
         Executa a pipeline de pré-processamento, segmentação e esqueletização.
+        Com `sparse`, o esqueleto é devolvido como SparseSkeleton (coordenadas por
+        componente) em vez da imagem densa.
         """
         # 1. Pré-processamento
         blurred_image = self.preprocessor.apply_gaussian_blur(image)
@@ -58,16 +70,22 @@ class Analyzer:
         binary_image = self.segmenter.segment_with_adaptive_threshold(blurred_image)
         
         # 3. Extração de Característica (Esqueleto)
-        skeleton = self.extractor.extract_skeleton(binary_image)
+        if sparse:
+            skeleton = self.extractor.extract_sparse_skeleton(binary_image)
+        else:
+            skeleton = self.extractor.extract_skeleton(binary_image)
         
         return {
             'original': image,
             'skeleton': skeleton
         }
 
-    def run_skeleton_quantification_pipeline(self, image, conversion_factor=1.0):
+    def run_skeleton_quantification_pipeline(self, image, conversion_factor=1.0, length_method='thinning'):
         """
         Executa a pipeline completa para QUANTIFICAR o comprimento do esqueleto.
+
+        Com `length_method` 'width' ou 'perimeter', o comprimento é estimado sem
+        thinning (ver FeatureExtractor.estimate_total_length).
         """
         # 1. Pré-processamento
         blurred_image = self.preprocessor.apply_gaussian_blur(image)
@@ -78,6 +96,11 @@ class Analyzer:
             blurred_image, cleanup_kernel_size=(1, 1)
         )
         
+        if length_method != 'thinning':
+            # 3-4. Estimativa rápida do comprimento, sem extrair o esqueleto
+            length = self.extractor.estimate_total_length(binary_image, conversion_factor, length_method)
+            return {'comprimento_esqueletico_nm': length}
+
         # 3. Extração do Esqueleto
         skeleton = self.extractor.extract_skeleton(binary_image)
         
@@ -86,4 +109,43 @@ class Analyzer:
         
         return {
             'comprimento_esqueletico_nm': length
+        }
+
+    def run_preview_pipeline(self, image, conversion_factor=None, scale=1.0):
+        """
+        Executa uma análise aproximada sobre uma imagem de resolução reduzida
+        (modo de triagem), sem gerar as imagens de visualização.
+
+        Args:
+            image (numpy.ndarray): A imagem reduzida em escala de cinza.
+            conversion_factor (float): nm por pixel da imagem em resolução completa
+                (None pula o cálculo do comprimento).
+            scale (float): Razão entre as larguras completa e reduzida (ex: 4).
+
+        Returns:
+            dict: Estatísticas com perímetros e comprimento já convertidos para a
+            escala completa e a circularidade de cada contorno.
+        """
+        # 1. Contornos e classificação DNA/RNA (a circularidade independe da escala)
+        contours, _ = self.segmenter.segment(image)
+        features = self.extractor.extract_features(contours)
+        statistics = dict(features["statistics"])
+        statistics['Perímetro RNA'] *= scale
+        statistics['Perímetro DNA'] *= scale
+
+        # 2. Esqueleto com o fator de conversão ajustado à resolução reduzida
+        blurred_image = self.preprocessor.apply_gaussian_blur(image)
+        binary_image = self.segmenter.segment_with_adaptive_threshold(
+            blurred_image, cleanup_kernel_size=(1, 1)
+        )
+        skeleton = self.extractor.extract_skeleton(binary_image)
+        if conversion_factor is not None:
+            length = self.extractor.calculate_skeleton_length(skeleton, conversion_factor * scale)
+        else:
+            length = float('nan')
+
+        return {
+            'statistics': statistics,
+            'circularities': features["circularities"],
+            'comprimento_esqueletico_nm': length
         }
\ No newline at end of file
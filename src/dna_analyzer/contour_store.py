@@ -0,0 +1,163 @@
+# src/dna_analyzer/contour_store.py
+import os
+import numpy as np
+
+# Maior coordenada representável quando os pontos são guardados em int16
+INT16_MAX = np.iinfo(np.int16).max
+
+
+class ContourStore:
+    """
+    Contêiner compacto de contornos: todos os pontos em um único buffer (N, 2),
+    um array de deslocamentos com o início de cada contorno e colunas de
+    metadados com um valor por contorno (ex: classe, circularidade).
+
+    Em comparação com a lista de arrays do `cv2.findContours`, ocupa um único
+    bloco de memória, é serializado (pickle entre processos, .npz ou .npy com
+    memmap) como três ou quatro arrays em vez de milhares, e cada contorno é uma
+    view do buffer. Com pontos em int32, as views são usadas diretamente pelo
+    `cv2.drawContours`, sem cópia; em int16 (`compact`), o buffer ocupa metade
+    e cada contorno é convertido ao ser acessado.
+    """
+
+    def __init__(self, points, offsets, metadata=None, attrs=None):
+        """
+        Args:
+            points (np.ndarray): Pontos (x, y) de todos os contornos, shape (N, 2),
+                int16 ou int32.
+            offsets (np.ndarray): Início de cada contorno em `points`, com o total
+                de pontos no fim (tamanho = número de contornos + 1).
+            metadata (dict): Arrays com um valor por contorno.
+            attrs (dict): Atributos do conjunto (arrays pequenos, ex: as dimensões da
+                imagem), salvos junto com os contornos.
+        """
+        self.points = points
+        self.offsets = offsets
+        self.metadata = dict(metadata or {})
+        self.attrs = dict(attrs or {})
+        for name, values in self.metadata.items():
+            if len(values) != len(self):
+                raise ValueError(f"Metadado '{name}' com {len(values)} valores para {len(self)} contornos.")
+
+    @classmethod
+    def from_contours(cls, contours, dtype=np.int32, **metadata):
+        """
+        Cria o contêiner a partir de uma sequência de contornos do OpenCV.
+
+        Args:
+            contours (sequence): Contornos (arrays (k, 1, 2) ou (k, 2)).
+            dtype: Tipo dos pontos (np.int32 ou np.int16).
+            **metadata: Colunas com um valor por contorno.
+        """
+        counts = np.fromiter((len(c) for c in contours), dtype=np.int64, count=len(contours))
+        offsets = np.zeros(len(contours) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        if len(contours):
+            points = np.concatenate([np.asarray(c).reshape(-1, 2) for c in contours]).astype(dtype, copy=False)
+        else:
+            points = np.zeros((0, 2), dtype=dtype)
+        return cls(points, offsets, {name: np.asarray(values) for name, values in metadata.items()})
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        """O contorno `index` no formato (k, 1, 2) int32 do OpenCV (view, se o buffer for int32)."""
+        if index < 0:
+            index += len(self)
+        contour = self.points[self.offsets[index]:self.offsets[index + 1]].reshape(-1, 1, 2)
+        return contour if contour.dtype == np.int32 else contour.astype(np.int32)
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+    def contours(self):
+        """Lista dos contornos, pronta para o `cv2.drawContours`."""
+        return list(self)
+
+    @property
+    def counts(self):
+        """Número de pontos de cada contorno."""
+        return np.diff(self.offsets)
+
+    @property
+    def nbytes(self):
+        """Memória ocupada pelos pontos, deslocamentos e metadados."""
+        return self.points.nbytes + self.offsets.nbytes + sum(v.nbytes for v in self.metadata.values())
+
+    # --- Seleção e conversão ---
+
+    def select(self, indices):
+        """Novo contêiner só com os contornos indicados (índices ou máscara booleana), na ordem dada."""
+        indices = np.arange(len(self))[indices] if np.asarray(indices).dtype == bool else np.asarray(indices, np.int64)
+        counts = self.counts[indices]
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        # Índice de cada ponto selecionado no buffer original, sem laço por contorno
+        starts = np.repeat(self.offsets[:-1][indices] - offsets[:-1], counts)
+        points = self.points[starts + np.arange(offsets[-1])]
+        return ContourStore(points, offsets, {name: values[indices] for name, values in self.metadata.items()},
+                            self.attrs)
+
+    def compact(self):
+        """Cópia com os pontos em int16, se as coordenadas couberem (senão, o próprio contêiner)."""
+        if self.points.dtype == np.int16 or (self.points.size and self.points.max() > INT16_MAX):
+            return self
+        return ContourStore(self.points.astype(np.int16), self.offsets, self.metadata, self.attrs)
+
+    def expand(self):
+        """Cópia com os pontos em int32 (views sem cópia no acesso a cada contorno)."""
+        if self.points.dtype == np.int32:
+            return self
+        return ContourStore(self.points.astype(np.int32), self.offsets, self.metadata, self.attrs)
+
+    @classmethod
+    def concatenate(cls, stores):
+        """Junta vários contêineres (mesmas colunas de metadados) em um só."""
+        stores = list(stores)
+        if not stores:
+            return cls.from_contours([])
+        points = np.concatenate([store.points for store in stores])
+        offsets = np.zeros(sum(len(store) for store in stores) + 1, dtype=np.int64)
+        np.cumsum(np.concatenate([store.counts for store in stores]), out=offsets[1:])
+        metadata = {name: np.concatenate([store.metadata[name] for store in stores]) for name in stores[0].metadata}
+        return cls(points, offsets, metadata, stores[0].attrs)
+
+    # --- Persistência ---
+
+    def save(self, path):
+        """
+        Salva o contêiner em um arquivo .npz (se `path` terminar em .npz) ou em uma
+        pasta com um .npy por array, que pode ser aberta com memmap em `load`.
+        """
+        arrays = {'points': self.points, 'offsets': self.offsets,
+                  **{f'meta_{name}': values for name, values in self.metadata.items()},
+                  **{f'attr_{name}': np.asarray(value) for name, value in self.attrs.items()}}
+        if path.endswith('.npz'):
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            np.savez(path, **arrays)
+            return
+        os.makedirs(path, exist_ok=True)
+        for name, values in arrays.items():
+            np.save(os.path.join(path, f'{name}.npy'), values, allow_pickle=False)
+
+    @classmethod
+    def load(cls, path, mmap=False):
+        """
+        Carrega um contêiner salvo com `save`.
+
+        Args:
+            path (str): Arquivo .npz ou pasta de arrays .npy.
+            mmap (bool): Na pasta de arrays, mapeia os arquivos em memória (somente
+                leitura) em vez de lê-los por inteiro.
+        """
+        if path.endswith('.npz'):
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+        else:
+            arrays = {os.path.splitext(name)[0]: np.load(os.path.join(path, name), mmap_mode='r' if mmap else None,
+                                                         allow_pickle=False)
+                      for name in os.listdir(path) if name.endswith('.npy')}
+        metadata = {name[len('meta_'):]: values for name, values in arrays.items() if name.startswith('meta_')}
+        attrs = {name[len('attr_'):]: values for name, values in arrays.items() if name.startswith('attr_')}
+        return cls(arrays['points'], arrays['offsets'], metadata, attrs)
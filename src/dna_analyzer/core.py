@@ -0,0 +1,793 @@
+# src/dna_analyzer/core.py
+import cv2
+import numpy as np
+import pandas as pd
+from .analyzer import Analyzer
+from .atlas import ImageAtlas, skeleton_pixel_counts, molecule_mask
+from .feature_extractor import FeatureExtractor, MIN_MOLECULE_AREA
+from .quality import QualityGate
+from .segmenter import Segmenter
+from .skeleton_topology import SkeletonTopology
+from .stats_calculator import StatsCalculator
+from .telemetry import stage, count_molecules, mark_rejected
+
+# Núcleo de cálculo das pipelines, sem acesso ao disco.
+#
+# As funções recebem imagens já carregadas (numpy.ndarray em escala de cinza) e
+# metadados, e retornam resultados e DataFrames. As pipelines de `pipelines.py`
+# são invólucros que leem os arquivos, chamam estas funções e salvam as tabelas
+# e gráficos; outros programas (ex: o serviço de aquisição) podem chamá-las
+# diretamente com quadros em memória.
+#
+# Um registro de entrada é uma tupla (imagem, metadados), em que os metadados são
+# um dicionário com as chaves opcionais 'dose', 'arquivo' (nome usado nas tabelas)
+# e 'nm_por_pixel' (fator de conversão, necessário para os comprimentos).
+
+# Colunas do controle de qualidade acrescentadas às tabelas por imagem
+QUALITY_COLUMNS = ['Qualidade', 'Motivo Qualidade']
+
+# Colunas da análise topológica acrescentadas à tabela por molécula
+TOPOLOGY_COLUMNS = ['Comprimento Geodésico', 'Extremidades', 'Ramificações', 'Laços', 'Topologia']
+
+# Colunas de geometria acrescentadas à tabela por molécula (usadas pelo índice de
+# moléculas): área em nm², circularidade do contorno e centróide e retângulo
+# envolvente em pixels da imagem
+GEOMETRY_COLUMNS = ['Área', 'Circularidade', 'Centroide X', 'Centroide Y',
+                    'Caixa X', 'Caixa Y', 'Caixa Largura', 'Caixa Altura']
+
+# Comparação de detectores de borda: segmentos de borda (componentes 8-conectados) com
+# pelo menos este número de pixels contam como contínuos na métrica de continuidade
+EDGE_SEGMENT_MIN_PIXELS = 20
+
+# Métricas por detector da comparação de detectores de borda
+EDGE_DETECTOR_COLUMNS = ['Densidade', 'Contornos', 'Pixels por Contorno', 'Continuidade']
+
+
+# --- Intermediários por imagem ---
+
+class ImageContext:
+    """
+    Uma imagem carregada e os seus intermediários, calculados sob demanda e
+    memorizados: o veredito do controle de qualidade, o `Analyzer.process`, o
+    desfoque, o limiar adaptativo e as imagens binárias e contornos derivados.
+
+    As funções por imagem deste módulo aceitam a imagem ou um ImageContext; com o
+    contexto, várias análises da mesma imagem (ex: `main.py run dose-response
+    analysis skeleton-length`) reaproveitam as etapas em comum em vez de refazê-las.
+    """
+
+    def __init__(self, image):
+        self.image = image
+        self._cache = {}
+
+    @property
+    def shape(self):
+        """Dimensões da imagem (como `image.shape`)."""
+        return self.image.shape
+
+    def _memo(self, key, compute):
+        """Valor memorizado sob `key`, calculado por `compute()` na primeira chamada."""
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def quality(self, quality_config):
+        """Veredito memorizado de `check_quality` (a rejeição é registrada uma única vez)."""
+        return self._memo(('quality', repr(quality_config)), lambda: check_quality(self.image, quality_config))
+
+    def contour_analysis(self, analyzer_config=None):
+        """Resultado memorizado de `Analyzer(analyzer_config).process` (contornos DNA/RNA)."""
+        def compute():
+            with stage('analyze'):
+                return Analyzer(config=analyzer_config).process(self.image)
+        return self._memo(('process', repr(analyzer_config)), compute)
+
+    def blurred(self):
+        """Imagem desfocada pelo pré-processador padrão."""
+        return self._memo('blurred', lambda: Analyzer().preprocessor.apply_gaussian_blur(self.image))
+
+    def binary(self, cleanup_kernel_size=(2, 2)):
+        """
+        Equivalente a `segment_with_adaptive_threshold(blurred, cleanup_kernel_size=...)`,
+        com o limiar adaptativo calculado uma vez para todos os kernels de limpeza.
+        """
+        def threshold():
+            return Segmenter().segment_with_adaptive_threshold(self.blurred(), cleanup_kernel_size=None)
+
+        def cleaned():
+            kernel = np.ones(cleanup_kernel_size, np.uint8)
+            return cv2.morphologyEx(self._memo('threshold', threshold), cv2.MORPH_OPEN, kernel)
+        if not cleanup_kernel_size:
+            return self._memo('threshold', threshold)
+        return self._memo(('binary', tuple(cleanup_kernel_size)), cleaned)
+
+    def contours(self, cleanup_kernel_size=(2, 2)):
+        """Contornos externos de `binary(cleanup_kernel_size)`."""
+        def compute():
+            contours, _ = cv2.findContours(self.binary(cleanup_kernel_size), cv2.RETR_EXTERNAL,
+                                           cv2.CHAIN_APPROX_SIMPLE)
+            return contours
+        return self._memo(('contours', tuple(cleanup_kernel_size or ())), compute)
+
+
+def as_context(image):
+    """O ImageContext de uma imagem (ou o próprio contexto, se já for um)."""
+    return image if isinstance(image, ImageContext) else ImageContext(image)
+
+
+# --- Núcleo por imagem ---
+
+def check_quality(image, quality_config=None):
+    """
+    Aplica o controle de qualidade a uma imagem recém-carregada.
+
+    Args:
+        image (numpy.ndarray): Imagem em escala de cinza.
+        quality_config (dict): Parâmetros do QualityGate (None = sem controle).
+
+    Returns:
+        tuple: (prosseguir, registro) onde `registro` traz o status, o motivo e as
+        métricas de qualidade (vazio se o controle estiver desativado).
+    """
+    if quality_config is None:
+        return True, {}
+    with stage('quality'):
+        verdict = QualityGate(**quality_config).assess(image)
+    record = {'Qualidade': verdict['status'], 'Motivo Qualidade': verdict['motivo'], **verdict['metricas']}
+    if verdict['status'] == 'rejeitada':
+        mark_rejected()
+        return False, record
+    return True, record
+
+def analyze_contours(image, analyzer_config=None, quality_config=None, contours_path=None):
+    """
+    Estatísticas de contornos DNA/RNA de uma imagem.
+
+    Args:
+        image (numpy.ndarray | ImageContext): A imagem ou o seu contexto.
+        contours_path (str): Se informado, salva os contornos classificados (ContourStore
+            compacto, em .npz) neste arquivo, para redesenhar as sobreposições depois.
+
+    Returns:
+        tuple: (estatísticas, registro de qualidade). As estatísticas são None se
+        a imagem for rejeitada pelo controle de qualidade.
+    """
+    context = as_context(image)
+    accepted, quality = context.quality(quality_config)
+    if not accepted:
+        return None, quality
+    results = context.contour_analysis(analyzer_config)
+    statistics = dict(results["statistics"])
+    if contours_path is not None:
+        with stage('save_contours'):
+            results["contours"].compact().save(contours_path)
+    count_molecules(statistics['Num DNA'] + statistics['Num RNA'])
+    return statistics, quality
+
+def measure_skeleton_length(image, conversion_factor, quality_config=None, length_method='thinning'):
+    """
+    Comprimento total do esqueleto de uma imagem em nm, por thinning ou por uma
+    das estimativas rápidas ('width', 'perimeter') do FeatureExtractor.
+
+    Returns:
+        tuple: (comprimento, registro de qualidade). O comprimento é None se a
+        imagem for rejeitada ou se `conversion_factor` for None.
+    """
+    context = as_context(image)
+    accepted, quality = context.quality(quality_config)
+    if not accepted or conversion_factor is None:
+        return None, quality
+    with stage('skeleton'):
+        # Mesmas etapas de `Analyzer.run_skeleton_quantification_pipeline` (limpeza com kernel 1x1)
+        binary_image = context.binary(cleanup_kernel_size=(1, 1))
+        extractor = FeatureExtractor()
+        if length_method != 'thinning':
+            length = extractor.estimate_total_length(binary_image, conversion_factor, length_method)
+        else:
+            length = extractor.calculate_skeleton_length(extractor.extract_skeleton(binary_image), conversion_factor)
+    return length, quality
+
+def measure_height_map_skeleton_length(height_map, conversion_factor, region_rows=None):
+    """
+    Comprimento total do esqueleto (thinning) de um mapa de altura lido por faixas, com
+    memória limitada: a segmentação (`Segmenter.segment_region`) e o thinning
+    (`ThinningBackend.iter_region_skeletons`) consomem o mapa região a região, sem
+    convertê-lo inteiro para uint8. O comprimento é o mesmo de `measure_skeleton_length`
+    sobre `height_map.to_uint8()` (sem controle de qualidade, que precisa da imagem inteira).
+
+    Args:
+        height_map (HeightMap): O mapa de altura (ex: um .npy de vários GB em memmap).
+        conversion_factor (float): Fator de conversão de pixels para nm (None = não mede).
+        region_rows (int): Linhas por faixa (padrão: thinning.REGION_PIXELS / largura).
+
+    Returns:
+        float: O comprimento, ou None se `conversion_factor` for None.
+    """
+    if conversion_factor is None:
+        return None
+    segmenter, extractor = Segmenter(), FeatureExtractor()
+    pixels = 0
+    with stage('skeleton'):
+        # Mesmas etapas de `measure_skeleton_length` (limpeza com kernel 1x1); só a contagem
+        # de pixels do esqueleto de cada faixa é guardada
+        for _, _, skeleton in extractor.thinning.iter_region_skeletons(
+                lambda start, stop: segmenter.segment_region(height_map, (start, stop), cleanup_kernel_size=(1, 1)),
+                height_map.shape, region_rows):
+            pixels += cv2.countNonZero(skeleton)
+    return pixels * conversion_factor
+
+def _molecule_topology(analyzer, binary_image, contours, conversion_factor, topology_config):
+    """
+    Topologia do esqueleto de cada contorno: um único thinning da imagem binária (sem
+    preencher os furos, que viram laços) e a SkeletonTopology sobre os componentes conexos.
+
+    Returns:
+        list: Um dicionário com as colunas TOPOLOGY_COLUMNS por contorno.
+    """
+    with stage('topology'):
+        _, labels = cv2.connectedComponents(binary_image, connectivity=8)
+        topology = SkeletonTopology(**topology_config).analyze(analyzer.extractor.extract_skeleton(binary_image), labels)
+    rows = []
+    for contour in contours:
+        x, y = contour[0][0]
+        label = labels[y, x]
+        rows.append({
+            'Comprimento Geodésico': topology['comprimento'][label] * conversion_factor,
+            'Extremidades': int(topology['extremidades'][label]),
+            'Ramificações': int(topology['ramificacoes'][label]),
+            'Laços': int(topology['lacos'][label]),
+            'Topologia': topology['topologia'][label]
+        })
+    return rows
+
+def _molecule_geometry(analyzer, contours, conversion_factor):
+    """
+    Área, circularidade, centróide e retângulo envolvente de cada contorno.
+
+    Returns:
+        list: Um dicionário com as colunas GEOMETRY_COLUMNS por contorno.
+    """
+    areas, perimeters = analyzer.extractor.contour_measures(contours)
+    rows = []
+    for contour, area, perimeter in zip(contours, areas, perimeters):
+        x, y, w, h = cv2.boundingRect(contour)
+        moments = cv2.moments(contour)
+        if moments['m00'] > 0:
+            centroid_x, centroid_y = moments['m10'] / moments['m00'], moments['m01'] / moments['m00']
+        else:
+            centroid_x, centroid_y = x + (w - 1) / 2, y + (h - 1) / 2
+        rows.append({
+            'Área': area * conversion_factor ** 2,
+            'Circularidade': 4 * np.pi * area / perimeter ** 2 if perimeter > 0 else 0.0,
+            'Centroide X': round(centroid_x, 2), 'Centroide Y': round(centroid_y, 2),
+            'Caixa X': x, 'Caixa Y': y, 'Caixa Largura': w, 'Caixa Altura': h
+        })
+    return rows
+
+def measure_molecule_lengths(image, conversion_factor, quality_config=None, length_method='thinning',
+                             topology_config=None, geometry=False):
+    """
+    Comprimento (nm) do esqueleto de cada molécula individual de uma imagem, por
+    thinning ou por uma das estimativas rápidas ('width', 'perimeter'), que medem
+    todas as moléculas de uma vez.
+
+    Args:
+        topology_config (dict): Parâmetros da SkeletonTopology. Se informado, cada
+            molécula vira um dicionário com 'Comprimento' e as colunas TOPOLOGY_COLUMNS
+            (comprimento geodésico em nm, extremidades, ramificações, laços e topologia).
+        geometry (bool): Se True, cada molécula vira um dicionário que também traz as
+            colunas GEOMETRY_COLUMNS (área, circularidade, centróide e retângulo envolvente).
+
+    Returns:
+        tuple: (lista de comprimentos, registro de qualidade). A lista é vazia se a
+        imagem for rejeitada ou se `conversion_factor` for None.
+    """
+    context = as_context(image)
+    accepted, quality = context.quality(quality_config)
+    if not accepted or conversion_factor is None:
+        return [], quality
+
+    analyzer = Analyzer()
+
+    # Executa a pipeline de segmentação para obter a imagem binária e os contornos
+    # de cada molécula individual
+    with stage('segment'):
+        binary_image, contours = context.binary(), context.contours()
+
+    return _molecule_lengths(analyzer, binary_image, contours, conversion_factor, length_method,
+                             topology_config, geometry=geometry), quality
+
+def _molecule_lengths(analyzer, binary_image, contours, conversion_factor, length_method='thinning',
+                      topology_config=None, skeleton_counts=None, geometry=False):
+    """
+    Comprimentos das moléculas de uma imagem já segmentada (ver `measure_molecule_lengths`).
+
+    Args:
+        skeleton_counts (np.ndarray): Pixels do esqueleto de cada contorno válido, se já
+            calculados (ex: no atlas de um lote); senão, o thinning é feito aqui.
+    """
+    # Colunas extras de cada contorno (topologia e geometria), ou None
+    extras = None
+    if topology_config is not None:
+        extras = _molecule_topology(analyzer, binary_image, contours, conversion_factor, topology_config)
+    if geometry:
+        rows = _molecule_geometry(analyzer, contours, conversion_factor)
+        extras = rows if extras is None else [{**extra, **row} for extra, row in zip(extras, rows)]
+
+    if length_method != 'thinning':
+        with stage('length_estimate'):
+            lengths = analyzer.extractor.estimate_molecule_lengths(binary_image, contours, conversion_factor,
+                                                                   length_method, min_area=MIN_MOLECULE_AREA)
+        if extras is not None:
+            # Uma estimativa por contorno com a área mínima, na ordem dos contornos
+            areas, _ = analyzer.extractor.contour_measures(contours)
+            kept = [row for row, area in zip(extras, areas) if area >= MIN_MOLECULE_AREA]
+            lengths = [{'Comprimento': length, **row} for length, row in zip(lengths, kept) if length > 0]
+        else:
+            lengths = [length for length in lengths if length > 0]
+        count_molecules(len(lengths))
+        return lengths
+
+    # Esqueleto de cada molécula a partir da sua máscara preenchida, recortada no
+    # retângulo envolvente; as máscaras da imagem são esqueletizadas juntas
+    valid = [index for index, contour in enumerate(contours) if cv2.contourArea(contour) >= MIN_MOLECULE_AREA]
+    if skeleton_counts is None:
+        with stage('skeleton'):
+            skeleton_counts = skeleton_pixel_counts(
+                analyzer.extractor, [molecule_mask(contours[index], binary_image.shape) for index in valid])
+
+    lengths = []
+    for index, pixel_count in zip(valid, skeleton_counts):
+        length = pixel_count * conversion_factor
+        if length > 0:
+            lengths.append(length if extras is None else {'Comprimento': length, **extras[index]})
+    count_molecules(len(lengths))
+    return lengths
+
+def _check_batch_quality(images, conversion_factors, quality_config, empty_result):
+    """
+    Aplica o controle de qualidade a um lote de imagens.
+
+    Returns:
+        tuple: (resultados iniciais (empty_result, registro de qualidade) por imagem,
+        índices das imagens aceitas e com fator de conversão)
+    """
+    outcomes, selected = [], []
+    for index, (image, conversion_factor) in enumerate(zip(images, conversion_factors)):
+        accepted, quality = check_quality(image, quality_config)
+        outcomes.append((empty_result, quality))
+        if accepted and conversion_factor is not None:
+            selected.append(index)
+    return outcomes, selected
+
+def measure_skeleton_length_batch(images, conversion_factors, quality_config=None, length_method='thinning'):
+    """
+    Equivalente a `measure_skeleton_length` em cada imagem de um lote, com a
+    segmentação e o thinning feitos uma única vez em um atlas.
+
+    Args:
+        images (list): Imagens em escala de cinza.
+        conversion_factors (list): O fator de conversão (ou None) de cada imagem.
+
+    Returns:
+        list: (comprimento, registro de qualidade) de cada imagem.
+    """
+    outcomes, selected = _check_batch_quality(images, conversion_factors, quality_config, None)
+    if not selected:
+        return outcomes
+
+    analyzer = Analyzer()
+    with stage('segment'):
+        # Mesma limpeza mínima de `run_skeleton_quantification_pipeline`
+        atlas = ImageAtlas([images[index] for index in selected])
+        binaries = [np.ascontiguousarray(tile) for tile in atlas.tiles(atlas.segment(analyzer, cleanup_kernel_size=(1, 1)))]
+
+    with stage('skeleton'):
+        if length_method == 'thinning':
+            totals = skeleton_pixel_counts(analyzer.extractor, binaries)
+        else:
+            totals = [analyzer.extractor.estimate_total_length(binary, 1.0, length_method) for binary in binaries]
+
+    for position, index in enumerate(selected):
+        outcomes[index] = (totals[position] * conversion_factors[index], outcomes[index][1])
+    return outcomes
+
+def measure_molecule_lengths_batch(images, conversion_factors, quality_config=None, length_method='thinning',
+                                   topology_config=None, geometry=False):
+    """
+    Equivalente a `measure_molecule_lengths` em cada imagem de um lote, com a
+    segmentação e o thinning das moléculas feitos uma única vez em um atlas.
+
+    Args:
+        images (list): Imagens em escala de cinza.
+        conversion_factors (list): O fator de conversão (ou None) de cada imagem.
+
+    Returns:
+        list: (lista de comprimentos, registro de qualidade) de cada imagem.
+    """
+    outcomes, selected = _check_batch_quality(images, conversion_factors, quality_config, [])
+    if not selected:
+        return outcomes
+
+    analyzer = Analyzer()
+    with stage('segment'):
+        atlas = ImageAtlas([images[index] for index in selected])
+        binary = atlas.segment(analyzer)
+        binaries, contours = atlas.tiles(binary), atlas.split_contours(binary)
+
+    per_image_counts = [None] * len(selected)
+    if length_method == 'thinning':
+        with stage('skeleton'):
+            masks, owners = [], []
+            for position, (tile, tile_contours) in enumerate(zip(binaries, contours)):
+                for contour in tile_contours:
+                    if cv2.contourArea(contour) < 5: continue
+                    masks.append(molecule_mask(contour, tile.shape))
+                    owners.append(position)
+            counts = skeleton_pixel_counts(analyzer.extractor, masks)
+            owners = np.array(owners, dtype=np.int64)
+            per_image_counts = [counts[owners == position] for position in range(len(selected))]
+
+    for position, index in enumerate(selected):
+        lengths = _molecule_lengths(analyzer, np.ascontiguousarray(binaries[position]), contours[position],
+                                    conversion_factors[index], length_method, topology_config,
+                                    per_image_counts[position], geometry)
+        outcomes[index] = (lengths, outcomes[index][1])
+    return outcomes
+
+def _triage_reasons(preview, rules, circularity_threshold, full_area_megapixels):
+    """Retorna os motivos pelos quais as estatísticas de prévia de uma imagem são ambíguas."""
+    reasons = []
+    circularities = np.asarray(preview['circularities'])
+    num_contours = len(circularities)
+    density = num_contours / full_area_megapixels
+
+    if num_contours < rules['min_contours']:
+        reasons.append(f"esparsa ({num_contours} contornos)")
+    elif density > rules['max_contours_per_megapixel']:
+        reasons.append(f"densa ({density:.0f} contornos/MP)")
+    if num_contours and np.mean(np.abs(circularities - circularity_threshold) < rules['circularity_margin']) > rules['max_ambiguous_fraction']:
+        reasons.append("muitos contornos próximos do limiar de circularidade")
+    return reasons
+
+def triage_preview(image, scale, conversion_factor, analyzer_config, rules):
+    """
+    Analisa uma imagem em resolução reduzida e sinaliza se a prévia é ambígua.
+
+    Args:
+        image (numpy.ndarray): Imagem reduzida em escala de cinza.
+        scale (float): Razão entre a largura completa e a reduzida.
+        conversion_factor (float): nm/pixel na resolução completa (None = sem comprimento).
+        analyzer_config (dict): Configuração do Analyzer.
+        rules (dict): Critérios de ambiguidade (ver TRIAGE_RULES em `run_triage_pipeline`).
+
+    Returns:
+        dict: Linha da tabela de triagem (sem 'Dose', 'Arquivo' e 'Resolução').
+    """
+    analyzer = Analyzer(config=analyzer_config)
+    with stage('preview'):
+        preview = analyzer.run_preview_pipeline(image, conversion_factor, scale)
+    count_molecules(len(preview['circularities']))
+
+    full_area_megapixels = image.size * scale ** 2 / 1e6
+    reasons = _triage_reasons(preview, rules, analyzer.extractor.circularity_threshold, full_area_megapixels)
+    row = dict(preview['statistics'])
+    row['Comprimento Esquelético'] = preview['comprimento_esqueletico_nm']
+    row['Ambígua'] = bool(reasons)
+    row['Motivo'] = "; ".join(reasons)
+    return row
+
+def triage_full(image, conversion_factor, analyzer_config):
+    """Contornos e comprimento do esqueleto de uma imagem em resolução completa."""
+    analyzer = Analyzer(config=analyzer_config)
+    with stage('analyze'):
+        row = dict(analyzer.process(image)["statistics"])
+    with stage('skeleton'):
+        if conversion_factor is not None:
+            row['Comprimento Esquelético'] = analyzer.run_skeleton_quantification_pipeline(
+                image, conversion_factor)['comprimento_esqueletico_nm']
+        else:
+            row['Comprimento Esquelético'] = np.nan
+    count_molecules(row['Num DNA'] + row['Num RNA'])
+    return row
+
+
+def compare_edge_detectors(edge_maps, min_segment_pixels=EDGE_SEGMENT_MIN_PIXELS):
+    """
+    Métricas quantitativas dos mapas de bordas de uma imagem (ex: o retorno de
+    `Segmenter.detect_all_edges`), em uma única passada pelos pixels.
+
+    Cada mapa é binarizado pelo limiar de Otsu (o Canny, já binário, não muda). Os
+    mapas binários viram um código por pixel (bit i = borda no detector i), e um único
+    histograma desses códigos dá a densidade de cada detector e a interseção de cada
+    par, de onde saem Dice e IoU. Os contornos são os componentes 8-conectados de
+    cada mapa binário (o mesmo número de contornos externos do `findContours`).
+
+    Args:
+        edge_maps (dict): Nome do detector -> mapa de bordas uint8.
+        min_segment_pixels (int): Tamanho mínimo de um segmento contínuo.
+
+    Returns:
+        dict: 'detectores' (nome -> {'Densidade', 'Contornos', 'Pixels por Contorno',
+        'Continuidade'}) e 'pares' ('a/b' -> {'Dice', 'IoU'}). A continuidade é a
+        fração dos pixels de borda em segmentos com pelo menos `min_segment_pixels`.
+    """
+    names = list(edge_maps)
+    if len(names) > 8:
+        raise ValueError("A comparação aceita no máximo 8 detectores (um bit por detector).")
+    codes, detectors = None, {}
+    for bit, name in enumerate(names):
+        _, binary = cv2.threshold(edge_maps[name], 0, 1 << bit, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        codes = binary if codes is None else cv2.bitwise_or(codes, binary, dst=codes)
+        num_labels, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        areas = stats[1:, cv2.CC_STAT_AREA]
+        edge_pixels = int(areas.sum())
+        detectors[name] = {
+            'Contornos': num_labels - 1,
+            'Pixels por Contorno': round(edge_pixels / (num_labels - 1), 2) if num_labels > 1 else 0.0,
+            'Continuidade': round(int(areas[areas >= min_segment_pixels].sum()) / edge_pixels, 4)
+            if edge_pixels else 0.0
+        }
+
+    # Pixels de cada combinação de detectores (código) -> pixels de borda por detector e por par
+    histogram = np.bincount(codes.ravel(), minlength=1 << len(names))
+    combinations = np.arange(histogram.size)
+    bits = [(combinations >> bit) & 1 == 1 for bit in range(len(names))]
+    edge_counts = [int(histogram[mask].sum()) for mask in bits]
+    for name, count in zip(names, edge_counts):
+        detectors[name] = {'Densidade': round(count / codes.size, 6), **detectors[name]}
+
+    pairs = {}
+    for i in range(len(names)):
+        for j in range(i + 1, len(names)):
+            intersection = int(histogram[bits[i] & bits[j]].sum())
+            total = edge_counts[i] + edge_counts[j]
+            pairs[f"{names[i]}/{names[j]}"] = {
+                'Dice': round(2 * intersection / total, 4) if total else 1.0,
+                'IoU': round(intersection / (total - intersection), 4) if total else 1.0
+            }
+    return {'detectores': detectors, 'pares': pairs}
+
+
+# --- Montagem das tabelas a partir dos resultados por imagem ---
+#
+# `results` é um iterável de pares (metadados, resultado), em que `resultado` é o
+# retorno de uma das funções por imagem acima, ou None se a imagem não pôde ser lida.
+
+def _with_quality(row, quality):
+    """Acrescenta o status e o motivo do controle de qualidade a uma linha de resultados."""
+    if quality:
+        row['Qualidade'] = quality['Qualidade']
+        row['Motivo Qualidade'] = quality['Motivo Qualidade']
+    return row
+
+def quality_table(results, file_column='Arquivo'):
+    """Tabela de qualidade por imagem (vazia se o controle estiver desativado)."""
+    rows = []
+    for metadata, outcome in results:
+        if outcome is None or not outcome[1]:
+            continue
+        row = {'Dose': metadata['dose']} if metadata.get('dose') is not None else {}
+        row[file_column] = metadata.get('arquivo')
+        row.update(outcome[1])
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def dose_response_tables(results):
+    """
+    Returns:
+        dict: 'individuais' (estatísticas de contornos por imagem) e 'qualidade'.
+    """
+    results = list(results)
+    rows = []
+    for metadata, outcome in results:
+        if outcome is None or outcome[0] is None: continue
+        row = _with_quality(dict(outcome[0]), outcome[1])
+        row['Dose'] = metadata.get('dose')
+        row['Arquivo'] = metadata.get('arquivo') # Adiciona o nome do arquivo para rastreabilidade
+        rows.append(row)
+    return {'individuais': pd.DataFrame(rows), 'qualidade': quality_table(results)}
+
+def edge_comparison_tables(results):
+    """
+    Args:
+        results (iterable): Pares (metadados, retorno de `compare_edge_detectors`).
+
+    Returns:
+        dict: 'individuais' (uma linha por imagem, com as métricas de cada detector e
+        de cada par como colunas 'Métrica detector') e 'detectores' (média por dose e
+        detector, com o Dice médio do detector com os demais: uma linha por detector,
+        para escolher o melhor em cada dose).
+    """
+    rows, detector_rows = [], []
+    for metadata, outcome in results:
+        if outcome is None: continue
+        row = {'Dose': metadata.get('dose'), 'Arquivo': metadata.get('arquivo')}
+        for name, metrics in outcome['detectores'].items():
+            row.update({f"{column} {name}": value for column, value in metrics.items()})
+            dice = [pair['Dice'] for key, pair in outcome['pares'].items() if name in key.split('/')]
+            detector_rows.append({'Dose': metadata.get('dose'), 'Detector': name, **metrics,
+                                  'Dice Médio': float(np.mean(dice)) if dice else np.nan})
+        for key, metrics in outcome['pares'].items():
+            row.update({f"{column} {key}": value for column, value in metrics.items()})
+        rows.append(row)
+    df_detectors = pd.DataFrame(detector_rows)
+    if not df_detectors.empty:
+        df_detectors = df_detectors.groupby(['Dose', 'Detector'], sort=False).mean().round(4).reset_index()
+    return {'individuais': pd.DataFrame(rows), 'detectores': df_detectors}
+
+def aggregate_by_dose(df_individual):
+    """Média e desvio padrão de cada coluna numérica por dose."""
+    # Seleciona apenas colunas numéricas para as operações de agregação
+    # (as colunas do controle de qualidade são texto, mas podem voltar vazias/NaN de um `merge`)
+    numeric_cols = df_individual.drop(columns=QUALITY_COLUMNS, errors='ignore') \
+        .select_dtypes(include=['number']).columns
+    return df_individual.groupby('Dose')[numeric_cols].agg(['mean', 'std']).round(2)
+
+def skeleton_length_tables(results):
+    """
+    Returns:
+        dict: 'individuais' (comprimento do esqueleto por imagem) e 'qualidade'.
+    """
+    results = list(results)
+    rows = []
+    for metadata, outcome in results:
+        if outcome is None or outcome[0] is None: continue
+        rows.append(_with_quality({
+            'Dose': metadata.get('dose'),
+            'Arquivo': metadata.get('arquivo'),
+            'Comprimento Esquelético': outcome[0]
+        }, outcome[1]))
+    return {'individuais': pd.DataFrame(rows), 'qualidade': quality_table(results)}
+
+def analysis_tables(results):
+    """
+    Returns:
+        dict: 'individuais' (contornos por imagem, identificadas pela coluna
+        'Imagem') e 'qualidade'.
+    """
+    results = list(results)
+    rows = []
+    for metadata, outcome in results:
+        if outcome is None or outcome[0] is None:
+            continue
+        row = _with_quality(dict(outcome[0]), outcome[1])
+        row['Imagem'] = metadata.get('arquivo')
+        rows.append(row)
+
+    columns = ['Imagem', 'Num DNA', 'Perímetro DNA', 'Num RNA', 'Perímetro RNA']
+    if any(outcome is not None and outcome[1] for _, outcome in results):
+        columns += QUALITY_COLUMNS
+    return {'individuais': pd.DataFrame(rows, columns=columns),
+            'qualidade': quality_table(results, file_column='Imagem')}
+
+def analysis_descriptive_stats(df_results):
+    """Estatísticas descritivas gerais das colunas numéricas da tabela por imagem."""
+    return StatsCalculator().calculate_descriptive_stats(df_results.drop(columns=QUALITY_COLUMNS, errors='ignore'))
+
+def molecule_tables(results):
+    """
+    Returns:
+        dict: 'moleculas' (um comprimento por molécula, com as colunas de topologia e
+        de geometria quando medidas) e 'qualidade'.
+    """
+    results = list(results)
+    rows = []
+    for metadata, outcome in results:
+        if outcome is None: continue
+        for molecule in outcome[0]:
+            measures = molecule if isinstance(molecule, dict) else {'Comprimento': molecule}
+            rows.append({'Dose': metadata.get('dose'), 'Comprimento': measures['Comprimento'],
+                         'Arquivo': metadata.get('arquivo'),
+                         **{column: measures[column] for column in TOPOLOGY_COLUMNS + GEOMETRY_COLUMNS
+                            if column in measures}})
+    return {'moleculas': pd.DataFrame(rows), 'qualidade': quality_table(results)}
+
+def topology_summary(df_lengths):
+    """
+    Número de moléculas, fração e comprimento geodésico médio por dose e topologia.
+
+    Returns:
+        pd.DataFrame: Uma linha por (dose, topologia), ou None se a tabela não tiver
+        as colunas de topologia.
+    """
+    if 'Topologia' not in df_lengths.columns:
+        return None
+    summary = (df_lengths.groupby(['Dose', 'Topologia'])
+               .agg(**{'Moléculas': ('Comprimento', 'size'),
+                       'Comprimento Geodésico Médio': ('Comprimento Geodésico', 'mean'),
+                       'Laços Médios': ('Laços', 'mean')})
+               .reset_index())
+    summary.insert(3, 'Fração', summary['Moléculas'] / summary.groupby('Dose')['Moléculas'].transform('sum'))
+    return summary
+
+def length_statistics(df_lengths):
+    """
+    Estatísticas descritivas por dose e relatório inferencial dos comprimentos.
+
+    Returns:
+        tuple: (DataFrame de estatísticas descritivas, texto do relatório inferencial)
+    """
+    stats_calc = StatsCalculator()
+    return stats_calc.calculate_length_descriptive_stats(df_lengths), stats_calc.perform_inferential_analysis(df_lengths)
+
+
+# --- API por registros (imagem, metadados) ---
+
+def iter_contour_statistics(records, analyzer_config=None, quality_config=None):
+    """Gera (metadados, (estatísticas, qualidade)) para cada registro (imagem, metadados)."""
+    for image, metadata in records:
+        yield metadata, analyze_contours(image, analyzer_config, quality_config)
+
+def iter_skeleton_lengths(records, quality_config=None, length_method='thinning'):
+    """Gera (metadados, (comprimento, qualidade)) usando o 'nm_por_pixel' de cada registro."""
+    for image, metadata in records:
+        yield metadata, measure_skeleton_length(image, metadata.get('nm_por_pixel'), quality_config, length_method)
+
+def iter_molecule_lengths(records, quality_config=None, length_method='thinning', topology_config=None,
+                          geometry=False):
+    """Gera (metadados, (comprimentos, qualidade)) usando o 'nm_por_pixel' de cada registro."""
+    for image, metadata in records:
+        yield metadata, measure_molecule_lengths(image, metadata.get('nm_por_pixel'), quality_config, length_method,
+                                                 topology_config, geometry)
+
+def compute_dose_response(records, analyzer_config=None, quality_config=None):
+    """
+    Análise de dose-resposta sobre imagens em memória.
+
+    Args:
+        records (iterable): Registros (imagem em escala de cinza, metadados).
+        analyzer_config (dict): Configuração do Analyzer.
+        quality_config (dict): Parâmetros do QualityGate (None = sem controle).
+
+    Returns:
+        dict: DataFrames 'individuais', 'agregados' (média/desvio por dose) e 'qualidade'.
+    """
+    tables = dose_response_tables(iter_contour_statistics(records, analyzer_config, quality_config))
+    individual = tables['individuais']
+    tables['agregados'] = aggregate_by_dose(individual) if not individual.empty else pd.DataFrame()
+    return tables
+
+def compute_skeleton_length(records, quality_config=None, length_method='thinning'):
+    """
+    Comprimento total do esqueleto por imagem, sobre imagens em memória.
+    `length_method` escolhe entre thinning e as estimativas rápidas.
+
+    Returns:
+        dict: DataFrames 'individuais' e 'qualidade'.
+    """
+    return skeleton_length_tables(iter_skeleton_lengths(records, quality_config, length_method))
+
+def compute_analysis(records, analyzer_config=None, quality_config=None):
+    """
+    Perímetros DNA/RNA por imagem e estatísticas descritivas gerais, sobre imagens em memória.
+
+    Returns:
+        dict: DataFrames 'individuais', 'descritivas' e 'qualidade'.
+    """
+    tables = analysis_tables(iter_contour_statistics(records, analyzer_config, quality_config))
+    individual = tables['individuais']
+    tables['descritivas'] = analysis_descriptive_stats(individual) if not individual.empty else pd.DataFrame()
+    return tables
+
+def compute_full_skeleton_analysis(records, quality_config=None, length_method='thinning', topology_config=None,
+                                   geometry=False):
+    """
+    Comprimento de cada molécula, estatísticas descritivas por dose e relatório
+    inferencial, sobre imagens em memória. `length_method` escolhe entre thinning
+    e as estimativas rápidas; com `topology_config`, cada molécula ganha as colunas
+    de topologia do esqueleto e, com `geometry`, as de geometria (para o
+    `MoleculeIndex`).
+
+    Returns:
+        dict: DataFrames 'moleculas', 'descritivas', 'topologia' (None sem
+        `topology_config`) e 'qualidade', e o texto 'relatorio' (None se nenhuma
+        molécula for encontrada).
+    """
+    tables = molecule_tables(iter_molecule_lengths(records, quality_config, length_method, topology_config, geometry))
+    if tables['moleculas'].empty:
+        tables['descritivas'], tables['relatorio'], tables['topologia'] = pd.DataFrame(), None, None
+    else:
+        tables['descritivas'], tables['relatorio'] = length_statistics(tables['moleculas'])
+        tables['topologia'] = topology_summary(tables['moleculas'])
+    return tables
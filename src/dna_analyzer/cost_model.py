@@ -0,0 +1,248 @@
+# src/dna_analyzer/cost_model.py
+import json
+import os
+import tempfile
+import cv2
+import numpy as np
+from .io import Loader
+
+try:
+    # Lock do histórico entre execuções simultâneas (indisponível no Windows)
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Histórico de tempos por imagem e das características de cada arquivo, atualizado a cada execução
+COST_HISTORY_FILE = './results/cost_model/historico_custos.json'
+
+# Redução da prévia usada para medir a densidade de bordas (decodificação em 1/8)
+COST_PREVIEW_FLAG = cv2.IMREAD_REDUCED_GRAYSCALE_8
+
+# Limiares do Canny na prévia
+COST_CANNY_THRESHOLDS = (50, 150)
+
+# Mínimo de imagens com tempo registrado (para as mesmas etapas) para ajustar o modelo linear
+MIN_FIT_SAMPLES = 5
+
+# Peso do tempo anterior na média móvel do tempo de um mesmo arquivo
+HISTORY_DECAY = 0.5
+
+# Sem histórico, custo relativo por pixel e peso da densidade de bordas (só a ordem importa:
+# a escala em segundos é corrigida pelos tempos observados durante a execução)
+DEFAULT_SECONDS_PER_PIXEL = 1e-6
+DEFAULT_EDGE_WEIGHT = 10.0
+
+
+def _stages_key(stages):
+    return ','.join(stages)
+
+
+def edge_density(image_path):
+    """
+    Fração de pixels de borda (Canny) de uma prévia da imagem decodificada em 1/8 da
+    resolução, ou None se o arquivo não puder ser lido. Chamada nos processos de
+    trabalho, junto com a tarefa da imagem (ver `run_isolated`).
+    """
+    preview = cv2.imread(image_path, COST_PREVIEW_FLAG)
+    if preview is None:
+        return None
+    edges = cv2.Canny(preview, *COST_CANNY_THRESHOLDS)
+    return round(cv2.countNonZero(edges) / edges.size, 6)
+
+
+class CostModel:
+    """
+    Prevê o tempo de processamento de cada tarefa a partir de características baratas
+    da imagem: pixels (lidos do cabeçalho), densidade de bordas de uma prévia decodificada
+    em 1/8 da resolução e o histórico de execuções anteriores.
+
+    Para um arquivo já processado com as mesmas etapas, a previsão é o seu tempo
+    registrado (média móvel). Para os demais, é um modelo linear
+    `tempo = a * pixels + b * pixels * densidade_de_bordas + c`, ajustado com os tempos
+    registrados das mesmas etapas; sem histórico suficiente, um custo relativo com a
+    mesma forma. As características de cada arquivo ficam no histórico (chave: caminho,
+    tamanho e data de modificação), então a prévia só é lida uma vez por arquivo.
+
+    A prévia não é lida aqui: decodificar um arquivo grande inteiro no processo principal,
+    antes de enviar qualquer tarefa, deixaria os processos de trabalho ociosos. A densidade
+    de um arquivo novo é medida pelo processo que o analisa (`edge_density`) e registrada
+    com `set_edge_density`; até lá, a previsão usa a densidade típica do histórico (só os
+    pixels, sem histórico).
+    """
+
+    def __init__(self, history_file: str = COST_HISTORY_FILE):
+        """
+        Args:
+            history_file (str): Arquivo JSON do histórico (None = sem persistência).
+        """
+        self.history_file = history_file
+        self.files = {}     # caminho -> {'tamanho', 'mtime', 'largura', 'altura', 'densidade_bordas'}
+        self.timings = {}   # etapas -> {caminho: segundos por imagem}
+        # O que esta execução mediu (ainda não gravado): caminhos com características novas e,
+        # por etapas, os tempos observados de cada caminho, aplicados ao histórico em `save`
+        self._new_files = set()
+        self._observed = {}
+        if history_file:
+            self.files, self.timings = self._read_history()
+
+    def _read_history(self):
+        """(arquivos, tempos) do histórico em disco; vazios se ele não existir ou estiver ilegível."""
+        if not os.path.exists(self.history_file):
+            return {}, {}
+        try:
+            with open(self.history_file, encoding='utf-8') as f:
+                history = json.load(f)
+            return history.get('arquivos', {}), history.get('tempos', {})
+        except (OSError, ValueError):
+            print(f"  Aviso: histórico de custos ilegível em {self.history_file}; ignorando.")
+            return {}, {}
+
+    # --- Características ---
+
+    def features(self, image_path):
+        """
+        Características de uma imagem (do histórico, se o arquivo não mudou; senão, só as
+        dimensões, lidas do cabeçalho).
+
+        Returns:
+            dict: {'largura', 'altura'} e, se já medida, 'densidade_bordas'; ou None se o
+            arquivo não puder ser lido.
+        """
+        key = os.path.abspath(image_path)
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        cached = self.files.get(key)
+        if cached is not None and cached['tamanho'] == stat.st_size and cached['mtime'] == stat.st_mtime:
+            return cached
+
+        dimensions = Loader().read_dimensions(image_path)
+        if dimensions is None:
+            return None
+        entry = {'tamanho': stat.st_size, 'mtime': stat.st_mtime, 'largura': dimensions[0], 'altura': dimensions[1]}
+        self.files[key] = entry
+        self._new_files.add(key)
+        return entry
+
+    def missing_edge_density(self, image_paths):
+        """Os caminhos (já vistos por `features`) cuja densidade de bordas ainda não foi medida."""
+        return [image_path for image_path in image_paths
+                if 'densidade_bordas' not in self.files.get(os.path.abspath(image_path), {'densidade_bordas': None})]
+
+    def set_edge_density(self, image_path, density):
+        """Registra a densidade de bordas medida (`edge_density`) de um arquivo já visto por `features`."""
+        entry = self.files.get(os.path.abspath(image_path))
+        if entry is not None and density is not None:
+            entry['densidade_bordas'] = density
+            self._new_files.add(os.path.abspath(image_path))
+
+    def _typical_density(self):
+        """Mediana das densidades de bordas do histórico (0 sem nenhuma medida)."""
+        densities = [entry['densidade_bordas'] for entry in self.files.values() if 'densidade_bordas' in entry]
+        return float(np.median(densities)) if densities else 0.0
+
+    @staticmethod
+    def _design(features, density):
+        pixels = features['largura'] * features['altura']
+        return [pixels, pixels * features.get('densidade_bordas', density), 1.0]
+
+    # --- Previsão ---
+
+    def _fit(self, stages):
+        """Coeficientes (a, b, c) do modelo linear das etapas, ou None sem histórico suficiente."""
+        timings = self.timings.get(_stages_key(stages), {})
+        rows, seconds = [], []
+        for path, value in timings.items():
+            features = self.files.get(path)
+            if features is not None and 'densidade_bordas' in features:
+                rows.append(self._design(features, None))
+                seconds.append(value)
+        if len(rows) < MIN_FIT_SAMPLES:
+            return None
+        coefficients = np.linalg.lstsq(np.array(rows, dtype=np.float64), np.array(seconds), rcond=None)[0]
+        # Coeficientes negativos (ruído com poucas amostras) fariam imagens maiores parecerem mais baratas
+        return np.maximum(coefficients, 0.0)
+
+    def predict(self, image_paths, stages):
+        """
+        Tempo previsto (s) de cada imagem.
+
+        Args:
+            image_paths (list): Caminhos das imagens.
+            stages (iterable): Etapas executadas por imagem (as mesmas do BatchExecutor).
+
+        Returns:
+            tuple: (previsões em segundos, quantas vieram do histórico do próprio arquivo)
+        """
+        stages = tuple(stages)
+        timings = self.timings.get(_stages_key(stages), {})
+        coefficients = self._fit(stages)
+        density = self._typical_density()
+        predictions, from_history = [], 0
+        for image_path in image_paths:
+            key = os.path.abspath(image_path)
+            features = self.features(image_path)
+            if key in timings and features is not None:
+                predictions.append(timings[key])
+                from_history += 1
+            elif features is None:
+                predictions.append(0.0)
+            elif coefficients is not None:
+                predictions.append(float(np.dot(coefficients, self._design(features, density))))
+            else:
+                pixels = features['largura'] * features['altura']
+                predictions.append(pixels * DEFAULT_SECONDS_PER_PIXEL
+                                   * (1.0 + DEFAULT_EDGE_WEIGHT * features.get('densidade_bordas', density)))
+        return predictions, from_history
+
+    # --- Histórico ---
+
+    @staticmethod
+    def _apply(timings, key, seconds):
+        previous = timings.get(key)
+        timings[key] = round(seconds if previous is None else
+                             HISTORY_DECAY * previous + (1 - HISTORY_DECAY) * seconds, 4)
+
+    def record(self, image_path, stages, seconds):
+        """Registra o tempo (s) de uma imagem processada com as etapas `stages`."""
+        stages_key, key = _stages_key(stages), os.path.abspath(image_path)
+        self._apply(self.timings.setdefault(stages_key, {}), key, seconds)
+        self._observed.setdefault(stages_key, {}).setdefault(key, []).append(seconds)
+
+    def save(self):
+        """
+        Grava no histórico o que esta execução mediu. Execuções simultâneas (ex: os nós de
+        um processamento em shards, que dividem `./results`) gravam o mesmo arquivo: com
+        o lock do histórico, cada uma relê o que está em disco e aplica só as suas medidas,
+        sem apagar as das outras. A escrita é atômica, por um arquivo temporário único
+        renomeado sobre o histórico.
+
+        Raises:
+            OSError: Se o histórico não puder ser gravado.
+        """
+        if not self.history_file or not (self._new_files or self._observed):
+            return
+        directory = os.path.dirname(self.history_file) or '.'
+        os.makedirs(directory, exist_ok=True)
+        with open(f"{self.history_file}.lock", 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            files, timings = self._read_history()
+            files.update({key: self.files[key] for key in self._new_files})
+            for stages_key, observed in self._observed.items():
+                stage_timings = timings.setdefault(stages_key, {})
+                for key, values in observed.items():
+                    for seconds in values:
+                        self._apply(stage_timings, key, seconds)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.history_file), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({'arquivos': files, 'tempos': timings}, f, ensure_ascii=False)
+                os.replace(tmp_path, self.history_file)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        self.files, self.timings = files, timings
+        self._new_files, self._observed = set(), {}
@@ -0,0 +1,545 @@
+# src/dna_analyzer/executor.py
+import os
+import time
+from collections import deque
+from statistics import median
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from .io import Loader
+from .memory import estimate_peak_bytes, format_bytes
+from .parallel import ParallelConfig, limit_threads, worker_initializer
+from .shared_ring import SharedRing, SLOT_ALIGNMENT
+from .isolation import run_isolated, file_diagnostics, slow_tasks, HARD_TIMEOUT_GRACE
+from .cost_model import CostModel, edge_density
+
+# Quantas tarefas pendentes são examinadas para encontrar uma que caiba no orçamento
+ADMISSION_LOOKAHEAD = 64
+
+# Folga (em descritores alinhados) somada a cada slot do anel de saídas compartilhadas
+SLOT_ARRAYS = 16
+
+
+def is_batch_task(task):
+    """Tarefas (dose, (caminho, ...)) são lotes de imagens processadas juntas em um atlas."""
+    return isinstance(task[1], tuple)
+
+
+def task_paths(task):
+    """Os caminhos das imagens de uma tarefa (um só, exceto nos lotes de atlas)."""
+    return task[1] if is_batch_task(task) else (task[1],)
+
+
+class BatchExecutor:
+    """
+    Executa uma função por imagem sobre um lote de tarefas, em paralelo ou no
+    próprio processo, conforme o layout definido por `ParallelConfig`.
+
+    Quando as etapas da pipeline são informadas, a memória de pico de cada imagem
+    é estimada a partir das dimensões lidas do cabeçalho do arquivo, e uma nova
+    imagem só é enviada aos processos se couber no orçamento de memória junto com
+    as que já estão em processamento. Assim, muitas imagens pequenas rodam ao
+    mesmo tempo, enquanto poucas imagens grandes dividem a máquina.
+
+    Se um objeto `RunMetrics` for informado, cada conclusão alimenta as métricas
+    de progresso (contagens por dose, latência por etapa, filas e ETA).
+
+    Tarefas com saídas grandes (imagens, máscaras, mapas de bordas) podem devolvê-las
+    por um anel de memória compartilhada (`SharedRing`) em vez da fila: ver
+    `shared_output` e `consume` em `run`.
+
+    Cada tarefa roda isolada: uma exceção, o limite de tempo ou de memória por imagem
+    (`ParallelConfig.task_timeout`/`task_memory_limit`) ou a queda de um processo de
+    trabalho (ex: falha de segmentação no OpenCV) só descartam aquela imagem, cujo
+    resultado é None. O pool é recriado após uma queda; as tarefas que estavam em
+    execução voltam à fila e rodam sozinhas, para identificar a culpada. As imagens
+    com falha e as muito lentas são registradas em `quarantine`, com diagnóstico.
+
+    Com as etapas informadas, um modelo de custo (`CostModel`) prevê o tempo de cada
+    imagem (as densidades de bordas que faltam no histórico são medidas antes, no pool
+    de processos) e as tarefas são enviadas das mais caras para as mais baratas, para que
+    nenhuma imagem densa fique para o fim com os demais processos ociosos. As que
+    sozinhas passam da fatia ideal de cada processo recebem os núcleos livres no
+    momento do envio (o thinning divide os componentes entre elas), e nenhuma outra
+    tarefa é enviada enquanto as threads em uso não deixarem núcleos para ela: processos
+    x threads nunca passam dos núcleos. O mesmo modelo, corrigido pelos tempos
+    observados, dá o ETA das métricas.
+    """
+
+    def __init__(self, parallel: ParallelConfig = None, metrics=None):
+        """
+        Args:
+            parallel (ParallelConfig): Configuração de paralelismo (None = automática).
+            metrics (RunMetrics): Métricas de progresso a atualizar (opcional).
+        """
+        self.parallel = parallel or ParallelConfig()
+        self.metrics = metrics
+        self.layout = None
+        self.stats = {}
+        # Imagens com falha ou lentas (acumuladas entre as chamadas de `run`), ver `_quarantine`
+        self.quarantine = []
+        self._cost_model = None
+        self._missing_density = set()
+
+    def _quarantine(self, task, reason, error='', elapsed=None, estimate=None, trace='', paths=None):
+        """
+        Registra na quarentena cada imagem de uma tarefa (ou só as imagens `paths` de um
+        lote de atlas), com o diagnóstico da falha.
+        """
+        loader = Loader()
+        batch_size = len(task_paths(task))
+        paths = paths or task_paths(task)
+        for image_path in paths:
+            self.quarantine.append({
+                'dose': task[0],
+                'arquivo': image_path,
+                'motivo': reason,
+                'erro': error,
+                'duracao_s': round(elapsed, 3) if elapsed is not None else None,
+                **file_diagnostics(image_path, loader.read_dimensions(image_path)),
+                'memoria_estimada_bytes': estimate,
+                'imagens_na_tarefa': batch_size,
+                'traceback': trace
+            })
+        if reason != 'lenta':
+            name = os.path.basename(paths[0]) + (f" (+{len(paths) - 1})" if len(paths) > 1 else "")
+            print(f"  ERRO: {name} em quarentena ({reason}): {error}")
+
+    def _complete(self, task, outcome, consume=None, ring=None, estimate=None, cost=None):
+        """
+        Registra a conclusão de uma tarefa nas métricas (e, se falhou, na quarentena) e
+        devolve o resultado (ou o retorno de `consume(task, resultado)`, com as saídas
+        do anel como views).
+        """
+        result, probe = outcome
+        failure = probe.get('erro')
+        if failure is not None:
+            self._quarantine(task, failure['motivo'], failure['erro'], probe.get('elapsed'), estimate,
+                             failure.get('traceback', ''))
+        elif result is None:
+            # As tarefas devolvem None quando a imagem não pode ser lida (arquivo corrompido ou truncado)
+            self._quarantine(task, 'nao_carregada', "a imagem não pôde ser lida", probe.get('elapsed'), estimate)
+        elif is_batch_task(task) and any(item is None for item in result):
+            self._quarantine(task, 'nao_carregada', "a imagem não pôde ser lida", probe.get('elapsed'), estimate,
+                             paths=[path for path, item in zip(task[1], result) if item is None])
+        if self.metrics is not None:
+            if is_batch_task(task):
+                # Lote de atlas: o resultado traz um item por imagem (None = falha ao carregar)
+                failed = len(task[1]) if result is None else sum(item is None for item in result)
+                self.metrics.observe(task[0], True, probe, images=len(task[1]) - failed)
+                if failed:
+                    self.metrics.observe(task[0], False, images=failed)
+            else:
+                self.metrics.observe(task[0], result is not None, probe)
+        if self._cost_model is not None:
+            for image_path, density in probe.get('densidade_bordas', {}).items():
+                self._cost_model.set_edge_density(image_path, density)
+        if failure is None and 'elapsed' in probe:
+            self._durations.append((task, probe['elapsed'], cost))
+            if cost is not None:
+                self._calibration[0] += cost
+                self._calibration[1] += probe['elapsed']
+        if ring is not None:
+            result = ring.resolve(result)
+        return consume(task, result) if consume is not None else result
+
+    def _estimate_memory(self, tasks, stages):
+        """
+        Estima a memória de pico de cada tarefa (dose, caminho) pelo cabeçalho da
+        imagem; nos lotes de atlas, soma as estimativas das imagens do lote.
+        """
+        loader = Loader()
+        estimates = []
+        for task in tasks:
+            estimate = 0
+            for image_path in task_paths(task):
+                dimensions = loader.read_dimensions(image_path)
+                estimate += estimate_peak_bytes(*dimensions, stages) if dimensions else 0
+            estimates.append(estimate)
+        return estimates
+
+    def _slot_bytes(self, tasks, bytes_per_pixel):
+        """Capacidade de um slot do anel: as saídas da maior tarefa, pelas dimensões do cabeçalho."""
+        loader = Loader()
+        largest = 0
+        for task in tasks:
+            pixels = 0
+            for image_path in task_paths(task):
+                dimensions = loader.read_dimensions(image_path)
+                pixels += dimensions[0] * dimensions[1] if dimensions else 0
+            largest = max(largest, pixels)
+        return int(largest * bytes_per_pixel) + SLOT_ARRAYS * SLOT_ALIGNMENT
+
+    def _measure_edge_densities(self, model, paths):
+        """
+        Mede no pool de processos a densidade de bordas (`edge_density`) dos arquivos que
+        ainda não a têm no histórico, antes do escalonamento, para que a ordem e as
+        tarefas acima da fatia ideal já levem em conta a densidade na primeira execução.
+
+        Returns:
+            int: Quantas densidades foram medidas.
+        """
+        missing = model.missing_edge_density(paths)
+        if not missing:
+            return 0
+        chunksize = max(1, len(missing) // (4 * self.layout.workers))
+        try:
+            with self._new_pool() as pool:
+                densities = list(pool.map(edge_density, missing, chunksize=chunksize))
+        except (BrokenProcessPool, OSError) as error:
+            # Sem a prévia, as densidades são medidas depois de cada tarefa (ver `_previews`)
+            print(f"  Aviso: prévias do modelo de custo não medidas ({error}); usando só o histórico e os pixels.")
+            return 0
+        for image_path, density in zip(missing, densities):
+            model.set_edge_density(image_path, density)
+        return len(missing)
+
+    def _predict_costs(self, tasks, stages, measure=False):
+        """
+        Prevê o tempo de cada tarefa com o modelo de custo (nos lotes de atlas, a soma
+        das imagens do lote).
+
+        Args:
+            measure (bool): Mede antes, no pool de processos, as densidades de bordas que
+                faltam (ver `_measure_edge_densities`). Sem isso, elas são medidas depois de
+                cada tarefa, só para as próximas execuções.
+
+        Returns:
+            tuple: (CostModel, previsão por imagem, previsão por tarefa)
+        """
+        model = CostModel()
+        started = time.perf_counter()
+        paths = [image_path for task in tasks for image_path in task_paths(task)]
+        for image_path in paths:
+            model.features(image_path)
+        measured = self._measure_edge_densities(model, paths) if measure else 0
+        predictions, from_history = model.predict(paths, stages)
+        image_costs = dict(zip(paths, predictions))
+        costs = [sum(image_costs[image_path] for image_path in task_paths(task)) for task in tasks]
+        # Densidades ainda não medidas: cada processo mede as das suas imagens (ver `_previews`)
+        self._missing_density = set(model.missing_edge_density(paths))
+        print(f"  Modelo de custo: ~{sum(costs):.0f}s de processamento previstos "
+              f"({from_history} de {len(paths)} imagens com histórico, {measured} prévia(s) medida(s) "
+              f"nos processos; previsão em {time.perf_counter() - started:.1f}s)")
+        return model, image_costs, costs
+
+    def _previews(self, task):
+        """Os caminhos da tarefa cuja densidade de bordas o processo de trabalho deve medir."""
+        return tuple(image_path for image_path in task_paths(task) if image_path in self._missing_density)
+
+    def _record_costs(self, model, image_costs, stages):
+        """
+        Grava no histórico do modelo de custo o tempo das tarefas concluídas; o tempo de
+        um lote de atlas é dividido entre as imagens na proporção das previsões.
+        """
+        for task, elapsed, _ in self._durations:
+            paths = task_paths(task)
+            predicted = [image_costs.get(image_path, 0.0) for image_path in paths]
+            total = sum(predicted)
+            for image_path, cost in zip(paths, predicted):
+                model.record(image_path, stages, elapsed * (cost / total if total > 0 else 1 / len(paths)))
+        try:
+            model.save()
+        except OSError as error:
+            # O histórico só melhora as próximas previsões: a falha não descarta os resultados
+            print(f"  Aviso: não foi possível gravar o histórico de custos: {error}")
+
+    def _publish_eta(self, costs, waiting, running, workers):
+        """
+        Atualiza o ETA das métricas pelo modelo de custo: a previsão das tarefas na fila
+        e o restante das em execução, corrigidos pela razão entre os tempos reais e os
+        previstos das tarefas já concluídas, divididos entre os processos (e nunca menos
+        que a maior tarefa restante).
+
+        Args:
+            costs (list): Previsão (s) de cada tarefa.
+            waiting (iterable): Índices das tarefas na fila.
+            running (iterable): (índice, segundos em execução) das tarefas em execução.
+            workers (int): Número de processos.
+        """
+        if self.metrics is None or costs is None:
+            return
+        predicted, actual = self._calibration
+        scale = actual / predicted if predicted > 0 else 1.0
+        remaining = [costs[index] * scale for index in waiting]
+        remaining += [max(costs[index] * scale - elapsed, 0.0) for index, elapsed in running]
+        self.metrics.set_eta(max(sum(remaining) / workers, max(remaining)) if remaining else 0.0)
+
+    def _next_admissible(self, pending, estimates, reserved, budget):
+        """
+        Retira da fila a primeira tarefa (entre as próximas ADMISSION_LOOKAHEAD) que
+        cabe no orçamento. Retorna None se nenhuma couber.
+        """
+        for position, index in enumerate(pending):
+            if position >= ADMISSION_LOOKAHEAD:
+                break
+            if reserved + estimates[index] <= budget:
+                del pending[position]
+                return index
+        return None
+
+    def _new_pool(self):
+        """Cria o pool de processos de trabalho do layout atual."""
+        return ProcessPoolExecutor(max_workers=self.layout.workers, initializer=worker_initializer,
+                                   initargs=(self.layout.threads_per_worker, self.layout.task_memory_limit))
+
+    @staticmethod
+    def _terminate(pool):
+        """
+        Encerra à força os processos de um pool (tarefa presa em uma chamada do OpenCV
+        além do limite de tempo). O ProcessPoolExecutor não expõe os processos, por
+        isso o atributo interno `_processes` é usado; o pool fica quebrado e é recriado.
+        """
+        for process in list((getattr(pool, '_processes', None) or {}).values()):
+            process.kill()
+
+    def _flag_slow_tasks(self):
+        """Registra na quarentena (motivo 'lenta') as tarefas concluídas muito acima da mediana."""
+        durations = [elapsed for _, elapsed, _ in self._durations]
+        slow = slow_tasks(durations)
+        for position in slow:
+            task, elapsed, _ = self._durations[position]
+            self._quarantine(task, 'lenta', f"{elapsed:.1f}s (mediana: {median(durations):.2f}s)", elapsed)
+        return len(slow)
+
+    def run(self, func, tasks: list, stages=None, shared_output=None, consume=None):
+        """
+        Aplica `func` a cada tarefa e retorna os resultados na ordem das tarefas.
+
+        Args:
+            func (callable): Função de nível de módulo (precisa ser serializável
+                para os processos de trabalho) que recebe uma tarefa.
+            tasks (list): As tarefas, tuplas (dose, caminho da imagem).
+            stages (iterable): Etapas executadas por `func` (chaves de
+                `memory.STAGE_BYTES_PER_PIXEL`), usadas para estimar a memória.
+                Se None, não há controle de admissão por memória.
+            shared_output (float): Bytes por pixel das saídas grandes de `func`. Se
+                informado, `func` recebe o argumento `slot` (um RingSlot com
+                processos de trabalho, None no próprio processo) e publica nele as
+                saídas com `shared_ring.publish_arrays`; com processos, elas voltam
+                por um anel de memória compartilhada com um slot por processo.
+            consume (callable): `consume(task, resultado)`, chamado no processo
+                principal a cada conclusão. As saídas publicadas chegam como views
+                da memória compartilhada, válidas só durante a chamada (o slot é
+                reaproveitado em seguida); o retorno substitui o resultado da tarefa.
+
+        Returns:
+            list: O resultado de `func` (ou de `consume`) para cada tarefa, na mesma
+            ordem; None nas tarefas que falharam (registradas em `quarantine`).
+        """
+        tasks = list(tasks)
+        self.layout = self.parallel.plan(len(tasks))
+        budget = self.layout.memory_budget
+        timeout = self.layout.task_timeout
+        print(f"  Paralelismo: {self.layout.workers} processo(s) x "
+              f"{self.layout.threads_per_worker} thread(s) por processo, "
+              f"orçamento de memória: {format_bytes(budget)}")
+        if self.layout.isolated:
+            limits = []
+            if timeout is not None:
+                limits.append(f"{timeout:g}s")
+            if self.layout.task_memory_limit is not None:
+                limits.append(format_bytes(self.layout.task_memory_limit))
+            print(f"  Limites por imagem: {' e '.join(limits)}")
+
+        # Também limita o processo principal; os filhos herdam as variáveis de ambiente
+        limit_threads(self.layout.threads_per_worker)
+
+        if self.metrics is not None:
+            self.metrics.plan(sum(len(task_paths(task)) for task in tasks))
+        self._durations = []
+        self._calibration = [0.0, 0.0]   # soma das previsões e dos tempos reais das tarefas concluídas
+        failures_before = len(self.quarantine)
+
+        # No próprio processo (um processo de trabalho), a ordem não muda a duração total:
+        # as densidades de bordas que faltam são medidas só depois de cada tarefa
+        local = not self.layout.isolated and (self.layout.workers == 1 or len(tasks) <= 1)
+        model = costs = None
+        self._missing_density = set()
+        if stages is not None and self.layout.cost_model and tasks:
+            model, image_costs, costs = self._predict_costs(tasks, stages, measure=not local)
+            self._publish_eta(costs, range(len(tasks)), (), self.layout.workers)
+        self._cost_model = model
+
+        if local:
+            local_func = partial(func, slot=None) if shared_output is not None else func
+            results = []
+            for i, task in enumerate(tasks):
+                if self.metrics is not None:
+                    self.metrics.set_queue_depths(len(tasks) - i - 1, 1)
+                outcome = run_isolated(local_func, task, previews=self._previews(task))
+                results.append(self._complete(task, outcome, consume,
+                                              cost=costs[i] if costs is not None else None))
+                self._publish_eta(costs, range(i + 1, len(tasks)), (), 1)
+            if self.metrics is not None:
+                self.metrics.set_queue_depths(0, 0)
+            self.stats = {'falhas': len(self.quarantine) - failures_before, 'lentas': self._flag_slow_tasks()}
+            if model is not None:
+                self._record_costs(model, image_costs, stages)
+                self.stats.update({'custo_previsto_s': round(sum(costs), 3),
+                                   'custo_real_s': round(self._calibration[1], 3)})
+            return results
+
+        if stages is not None and budget is not None:
+            estimates = self._estimate_memory(tasks, stages)
+        else:
+            estimates, budget = [0] * len(tasks), float('inf')
+
+        results = [None] * len(tasks)
+        pending = deque(range(len(tasks)))
+        # Tarefas que sozinhas passam da fatia ideal de cada processo (ver `threads` em run_isolated)
+        outliers = set()
+        if costs is not None:
+            # Das mais caras para as mais baratas (a ordem dos resultados não muda)
+            pending = deque(sorted(range(len(tasks)), key=lambda i: -costs[i]))
+            share = sum(costs) / self.layout.workers
+            outliers = {index for index in range(len(tasks)) if costs[index] > share}
+            if outliers:
+                print(f"  {len(outliers)} imagem(ns) acima da fatia ideal por processo: enviadas primeiro, "
+                      f"com os núcleos livres (até {self.layout.cpu_count} thread(s))")
+        # Tarefas em execução quando um processo caiu: rodam sozinhas para identificar a culpada
+        suspects = deque()
+        in_flight = {}
+        slots = {}
+        submitted = {}
+        # Threads de cada tarefa em execução e o total em uso (nunca acima dos núcleos)
+        task_threads = {}
+        threads_in_use = 0
+        threads_per_worker = self.layout.threads_per_worker
+        reserved = peak_reserved = 0
+        oversized = recycled = 0
+        # Sem resposta até o limite mais a folga, a tarefa está presa em código nativo
+        hard_timeout = timeout + HARD_TIMEOUT_GRACE if timeout is not None else None
+        ring = None
+        if shared_output is not None:
+            ring = SharedRing(self.layout.workers, self._slot_bytes(tasks, shared_output))
+
+        def has_free_cores():
+            return not in_flight or threads_in_use + threads_per_worker <= self.layout.cpu_count
+
+        def submit(index):
+            nonlocal reserved, peak_reserved, threads_in_use
+            threads = None
+            if index in outliers:
+                # Só os núcleos livres agora, divididos entre as imagens acima da fatia ideal
+                free = self.layout.cpu_count - threads_in_use
+                threads = max(threads_per_worker, min(free, self.layout.cpu_count // len(outliers)))
+            if ring is None:
+                future = pool.submit(run_isolated, func, tasks[index], timeout, threads, self._previews(tasks[index]))
+            else:
+                slot = ring.acquire()
+                future = pool.submit(run_isolated, partial(func, slot=slot), tasks[index], timeout, threads,
+                                     self._previews(tasks[index]))
+                slots[future] = slot
+            in_flight[future] = index
+            submitted[future] = time.monotonic()
+            task_threads[future] = threads or threads_per_worker
+            threads_in_use += task_threads[future]
+            reserved += estimates[index]
+            peak_reserved = max(peak_reserved, reserved)
+
+        with ring or nullcontext():
+            pool = self._new_pool()
+            try:
+                while pending or in_flight or suspects:
+                    # Uma suspeita roda sozinha; as demais tarefas esperam que ela termine
+                    if suspects:
+                        if not in_flight:
+                            submit(suspects.popleft())
+
+                    # Admite novas tarefas enquanto houver processos livres e memória no orçamento
+                    while not suspects and pending and len(in_flight) < self.layout.workers and has_free_cores():
+                        index = self._next_admissible(pending, estimates, reserved, budget)
+                        if index is None:
+                            if in_flight:
+                                break
+                            # Imagem maior que o orçamento inteiro: roda sozinha
+                            index = pending.popleft()
+                            oversized += 1
+                            print(f"  Aviso: {tasks[index][1]} requer ~{format_bytes(estimates[index])}, "
+                                  f"acima do orçamento; processando isoladamente.")
+                        submit(index)
+
+                    if self.metrics is not None:
+                        self.metrics.set_queue_depths(len(pending) + len(suspects), len(in_flight))
+
+                    wait_timeout = None
+                    if hard_timeout is not None:
+                        wait_timeout = max(0.0, min(submitted[f] for f in in_flight) + hard_timeout - time.monotonic())
+                    done, _ = wait(in_flight, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+
+                    # Tarefas presas além do limite de tempo: os processos do pool são encerrados
+                    now = time.monotonic()
+                    expired = set()
+                    if hard_timeout is not None:
+                        expired = {f for f in in_flight if f not in done and now - submitted[f] >= hard_timeout}
+                    if expired:
+                        self._terminate(pool)
+                    broken = bool(expired) or any(isinstance(f.exception(), BrokenProcessPool) for f in done)
+                    if broken:
+                        # Com o pool quebrado, todas as tarefas em execução terminam com erro
+                        done, _ = wait(in_flight)
+                    crashed = sum(isinstance(f.exception(), BrokenProcessPool) for f in done)
+
+                    for future in done:
+                        index = in_flight.pop(future)
+                        reserved -= estimates[index]
+                        threads_in_use -= task_threads.pop(future)
+                        elapsed = now - submitted.pop(future)
+                        error = future.exception()
+                        if error is None:
+                            outcome = future.result()
+                        elif isinstance(error, BrokenProcessPool) and future not in expired and (expired or crashed > 1):
+                            # Interrompida junto com outras: se o pool foi encerrado por outra tarefa
+                            # presa, volta à fila; se um processo caiu, roda de novo sozinha
+                            if ring is not None:
+                                ring.release(slots.pop(future))
+                            (pending if expired else suspects).appendleft(index)
+                            continue
+                        elif future in expired:
+                            outcome = (None, {'elapsed': elapsed, 'erro': {
+                                'motivo': 'tempo_limite',
+                                'erro': f"sem resposta após {hard_timeout:g}s; processo encerrado"}})
+                        elif isinstance(error, BrokenProcessPool):
+                            outcome = (None, {'elapsed': elapsed, 'erro': {
+                                'motivo': 'falha_do_processo',
+                                'erro': "o processo de trabalho terminou abruptamente "
+                                        "(ex: falha de segmentação ou falta de memória)"}})
+                        else:
+                            outcome = (None, {'elapsed': elapsed, 'erro': {
+                                'motivo': 'excecao', 'erro': f"{type(error).__name__}: {error}"}})
+                        results[index] = self._complete(tasks[index], outcome, consume, ring, estimates[index],
+                                                        costs[index] if costs is not None else None)
+                        if ring is not None:
+                            ring.release(slots.pop(future))
+                    self._publish_eta(costs, list(pending) + list(suspects),
+                                      [(i, now - submitted[f]) for f, i in in_flight.items()], self.layout.workers)
+
+                    if broken:
+                        pool.shutdown(wait=True, cancel_futures=True)
+                        pool = self._new_pool()
+                        recycled += 1
+                        print("  Aviso: processo de trabalho encerrado; pool recriado" +
+                              (f" ({len(suspects)} tarefa(s) suspeita(s) serão reprocessadas isoladamente)."
+                               if suspects else "."))
+            finally:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+        if self.metrics is not None:
+            self.metrics.set_queue_depths(0, 0)
+
+        self.stats = {
+            'memoria_pico_estimada_bytes': peak_reserved,
+            'imagens_acima_do_orcamento': oversized,
+            'falhas': len(self.quarantine) - failures_before,
+            'lentas': self._flag_slow_tasks(),
+            'pools_recriados': recycled
+        }
+        if model is not None:
+            self._record_costs(model, image_costs, stages)
+            self.stats.update({'ordem': 'maiores_primeiro', 'custo_previsto_s': round(sum(costs), 3),
+                               'custo_real_s': round(self._calibration[1], 3)})
+        if ring is not None:
+            self.stats['memoria_compartilhada_bytes'] = ring.num_slots * ring.slot_bytes
+        return results
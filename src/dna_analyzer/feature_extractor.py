@@ -1,15 +1,43 @@
 # src/dna_analyzer/feature_extractor.py
 import cv2
 import numpy as np
+from .sparse_skeleton import SparseSkeleton
+from .thinning import get_thinning_backend
+
+# Métodos de medição do comprimento das moléculas: 'thinning' (esqueleto exato) ou as
+# estimativas rápidas 'width' (área / largura média) e 'perimeter' (perímetro / 2)
+LENGTH_METHODS = ('thinning', 'width', 'perimeter')
+
+# Área mínima (px) de um contorno para ser medido como molécula (abaixo: ruído)
+MIN_MOLECULE_AREA = 5
+
+# Fatores que levam as estimativas rápidas à escala do comprimento por thinning
+# (número de pixels do esqueleto). PROVISÓRIOS: ajustados em cadeias sintéticas isoladas,
+# que não representam as varreduras segmentadas. Nestas, moléculas sobrepostas e
+# aglomerados ramificados deixam o erro relativo por molécula muito maior (em um conjunto
+# segmentado, ~34% de mediana e ~84% no p95 com 'width'; ~20% e ~78% com 'perimeter'),
+# então não há limite de erro garantido. Meça com `python main.py calibrate-length` nas
+# suas imagens antes de usar as estimativas no lugar do thinning.
+LENGTH_CALIBRATION = {'width': 0.85, 'perimeter': 0.86}
 
 class FeatureExtractor:
     """Classe para extrair características e classificar contornos."""
 
-    def __init__(self, circularity_threshold: float = 0.8):
+    def __init__(self, circularity_threshold: float = 0.8, length_calibration: dict = None,
+                 thinning_backend: str = None):
         """
         Inicializa o extrator com o limiar de circularidade para classificar RNA.
+
+        Args:
+            circularity_threshold (float): Limiar de circularidade para classificar RNA.
+            length_calibration (dict): Fatores de calibração das estimativas rápidas de
+                comprimento por método (padrão: LENGTH_CALIBRATION).
+            thinning_backend (str): Algoritmo de thinning (chave de
+                thinning.THINNING_BACKENDS ou 'auto'; padrão: DEFAULT_THINNING_BACKEND).
         """
         self.circularity_threshold = circularity_threshold
+        self.length_calibration = dict(LENGTH_CALIBRATION, **(length_calibration or {}))
+        self.thinning = get_thinning_backend(thinning_backend)
 
     def extract_features(self, contours):
         """
@@ -19,12 +47,15 @@ class FeatureExtractor:
             contours (list): A lista de contornos detectados.
 
         Returns:
-            dict: Um dicionário contendo contornos classificados e estatísticas.
+            dict: Um dicionário contendo contornos classificados, a circularidade
+            de cada contorno válido, os índices dos contornos válidos e estatísticas.
         """
         dna_contours = []
         rna_contours = []
+        circularities = []
+        valid_indices = []
 
-        for contour in contours:
+        for index, contour in enumerate(contours):
             area = cv2.contourArea(contour)
             perimeter = cv2.arcLength(contour, True)
 
@@ -32,6 +63,8 @@ class FeatureExtractor:
                 continue
 
             circularity = 4 * np.pi * (area / (perimeter ** 2))
+            circularities.append(circularity)
+            valid_indices.append(index)
             if circularity > self.circularity_threshold:
                 rna_contours.append(contour)
             else:
@@ -51,28 +84,195 @@ class FeatureExtractor:
         return {
             "dna_contours": dna_contours,
             "rna_contours": rna_contours,
+            "circularities": circularities,
+            "valid_indices": valid_indices,
             "statistics": stats
         }
     
     def extract_skeleton(self, binary_image):
         """
-        Aplica o algoritmo de thinning para extrair o esqueleto de uma imagem binária.
-        Requer opencv-contrib-python.
+        Aplica o algoritmo de thinning para extrair o esqueleto de uma imagem binária,
+        com o backend configurado (ver thinning.py).
         """
         # O algoritmo de thinning espera pixels brancos (255) em fundo preto (0).
-        return cv2.ximgproc.thinning(binary_image)
+        return self.thinning.skeletonize(binary_image)
     
+    def extract_sparse_skeleton(self, binary_image, labels=None):
+        """
+        Aplica o thinning e devolve o esqueleto na forma esparsa (coordenadas dos pixels
+        de cada componente), em vez da imagem densa do tamanho do quadro.
+
+        Args:
+            labels (np.ndarray): Rótulos que definem os componentes (padrão: os
+                componentes conexos do próprio esqueleto).
+        """
+        return SparseSkeleton.from_image(self.extract_skeleton(binary_image), labels)
+
     def calculate_skeleton_length(self, skeleton_image, conversion_factor=1.0):
         """
         Calcula o comprimento de um esqueleto contando seus pixels e aplicando
         um fator de conversão.
 
         Args:
-            skeleton_image (np.ndarray): A imagem binária do esqueleto.
+            skeleton_image (np.ndarray | SparseSkeleton): A imagem binária do esqueleto
+                ou o esqueleto esparso.
             conversion_factor (float): Fator para converter pixels para uma unidade real (ex: nm).
 
         Returns:
             float: O comprimento total do esqueleto na unidade desejada.
         """
+        if isinstance(skeleton_image, SparseSkeleton):
+            return skeleton_image.total_length(conversion_factor)
         pixel_count = np.sum(skeleton_image > 0)
-        return pixel_count * conversion_factor
\ No newline at end of file
+        return pixel_count * conversion_factor
+
+    @staticmethod
+    def contour_measures(contours):
+        """
+        Área e perímetro de todos os contornos de uma vez (equivalentes a
+        `cv2.contourArea` e `cv2.arcLength(c, True)`), sem laço em Python.
+
+        Returns:
+            tuple: (áreas, perímetros) como arrays na ordem dos contornos.
+        """
+        if len(contours) == 0:
+            return np.zeros(0), np.zeros(0)
+        counts = np.fromiter((len(c) for c in contours), dtype=np.int64, count=len(contours))
+        points = np.concatenate(contours).reshape(-1, 2).astype(np.float64)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        # Índice do ponto seguinte de cada ponto, fechando cada contorno no seu início
+        following = np.arange(1, len(points) + 1)
+        following[starts + counts - 1] = starts
+        x, y = points[:, 0], points[:, 1]
+        x_next, y_next = x[following], y[following]
+
+        perimeters = np.add.reduceat(np.hypot(x_next - x, y_next - y), starts)
+        areas = np.abs(np.add.reduceat(x * y_next - x_next * y, starts)) / 2  # fórmula do laço (shoelace)
+        return areas, perimeters
+
+    @staticmethod
+    def _width_based_lengths(binary_image):
+        """
+        Comprimento (px, sem calibração) de cada componente conexo como área / largura
+        média, com a largura obtida de uma única transformada de distância: nos pixels
+        da crista (máximos locais da distância), a largura local é 2 * distância - 1.
+
+        Returns:
+            tuple: (imagem de rótulos, comprimentos indexados pelo rótulo; 0 = fundo)
+        """
+        num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(binary_image, connectivity=8)
+        areas = stats[:, cv2.CC_STAT_AREA].astype(np.float64)
+
+        distance = cv2.distanceTransform(binary_image, cv2.DIST_L2, 3)
+        ridge = (distance > 0) & (distance >= cv2.dilate(distance, np.ones((3, 3), np.uint8)))
+        ridge_labels = labels[ridge]
+        ridge_sum = np.bincount(ridge_labels, weights=distance[ridge], minlength=num_labels)
+        ridge_count = np.bincount(ridge_labels, minlength=num_labels)
+
+        widths = np.maximum(2 * ridge_sum / np.maximum(ridge_count, 1) - 1, 1.0)
+        lengths = areas / widths
+        lengths[0] = 0.0
+        return labels, lengths
+
+    def _raw_molecule_lengths(self, binary_image, contours, method):
+        """Estimativas sem calibração (px) para cada contorno, na ordem dos contornos."""
+        if method == 'perimeter':
+            return self.contour_measures(contours)[1] / 2
+        filled = np.zeros_like(binary_image)
+        cv2.drawContours(filled, contours, -1, 255, thickness=cv2.FILLED)
+        labels, lengths = self._width_based_lengths(filled)
+        first_points = np.array([c[0][0] for c in contours]).reshape(-1, 2)
+        return lengths[labels[first_points[:, 1], first_points[:, 0]]]
+
+    def estimate_molecule_lengths(self, binary_image, contours, conversion_factor=1.0, method='width',
+                                  min_area=MIN_MOLECULE_AREA):
+        """
+        Estima o comprimento de cada molécula sem thinning, vetorizado sobre todas
+        as moléculas da imagem.
+
+        Args:
+            binary_image (np.ndarray): Imagem binária segmentada.
+            contours (list): Contornos externos das moléculas.
+            conversion_factor (float): Fator de conversão de pixels para nm.
+            method (str): 'width' (área / largura média) ou 'perimeter' (perímetro / 2,
+                adequado a moléculas finas).
+            min_area (float): Contornos com área menor que esta são ignorados (ruído).
+
+        Returns:
+            list: Comprimentos calibrados (na unidade do fator de conversão), exatamente
+            um por contorno com área de pelo menos `min_area`, na ordem dos contornos
+            (inclusive os nulos, para que a lista possa ser pareada com esses contornos).
+        """
+        if method not in self.length_calibration:
+            raise ValueError(f"Método de estimativa de comprimento inválido: '{method}'.")
+        if len(contours) == 0:
+            return []
+        areas, _ = self.contour_measures(contours)
+        valid = [c for c, area in zip(contours, areas) if area >= min_area]
+        if not valid:
+            return []
+        raw = self._raw_molecule_lengths(binary_image, valid, method)
+        lengths = raw * self.length_calibration[method] * conversion_factor
+        return [float(length) for length in lengths]
+
+    def estimate_total_length(self, binary_image, conversion_factor=1.0, method='width'):
+        """
+        Estima o comprimento total do esqueleto de uma imagem binária sem thinning.
+
+        Returns:
+            float: A soma dos comprimentos estimados de todos os componentes.
+        """
+        if method not in self.length_calibration:
+            raise ValueError(f"Método de estimativa de comprimento inválido: '{method}'.")
+        if method == 'perimeter':
+            # Inclui as bordas dos furos, como o esqueleto de uma molécula em anel
+            contours, _ = cv2.findContours(binary_image, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+            raw_total = self.contour_measures(contours)[1].sum() / 2
+        else:
+            raw_total = self._width_based_lengths(binary_image)[1].sum()
+        return float(raw_total * self.length_calibration[method] * conversion_factor)
+
+    def paired_molecule_lengths(self, binary_image, contours, method, min_area=MIN_MOLECULE_AREA):
+        """
+        Comprimento por thinning e estimativa rápida sem calibração (ambos em px) de
+        cada molécula, usados para calibrar os estimadores.
+
+        Returns:
+            tuple: (comprimentos por thinning, estimativas) como arrays.
+        """
+        areas, _ = self.contour_measures(contours)
+        valid = [c for c, area in zip(contours, areas) if area >= min_area]
+        thinning = []
+        for contour in valid:
+            mask = np.zeros_like(binary_image)
+            cv2.drawContours(mask, [contour], -1, 255, thickness=cv2.FILLED)
+            thinning.append(self.calculate_skeleton_length(self.extract_skeleton(mask)))
+        estimates = self._raw_molecule_lengths(binary_image, valid, method) if valid else np.zeros(0)
+        thinning = np.asarray(thinning, dtype=np.float64)
+        keep = (thinning > 0) & (estimates > 0)
+        return thinning[keep], estimates[keep]
+
+    @staticmethod
+    def calibrate_length_estimator(thinning_lengths, estimated_lengths):
+        """
+        Calcula o fator de calibração (mediana de thinning / estimativa) e o erro
+        relativo por molécula que resta após a calibração.
+
+        Returns:
+            dict: Fator, número de moléculas e erros relativos (mediana, p90, p95).
+        """
+        thinning_lengths = np.asarray(thinning_lengths, dtype=np.float64)
+        estimated_lengths = np.asarray(estimated_lengths, dtype=np.float64)
+        if thinning_lengths.size == 0:
+            return {'fator': None, 'moleculas': 0}
+        factor = float(np.median(thinning_lengths / estimated_lengths))
+        relative_error = np.abs(factor * estimated_lengths - thinning_lengths) / thinning_lengths
+        return {
+            'fator': round(factor, 4),
+            'moleculas': int(thinning_lengths.size),
+            'erro_relativo_mediano': float(np.median(relative_error)),
+            'erro_relativo_p90': float(np.percentile(relative_error, 90)),
+            'erro_relativo_p95': float(np.percentile(relative_error, 95)),
+            'erro_relativo_total': float(abs(factor * estimated_lengths.sum() - thinning_lengths.sum()) / thinning_lengths.sum())
+        }
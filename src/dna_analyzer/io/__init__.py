@@ -1,5 +1,6 @@
 # src/dna_analyzer/io/__init__.py
 from .loader import Loader
 from .saver import Saver
+from .height_map import HeightMap, is_height_map
 
-__all__ = ['Loader', 'Saver']
\ No newline at end of file
+__all__ = ['Loader', 'Saver', 'HeightMap', 'is_height_map']
\ No newline at end of file
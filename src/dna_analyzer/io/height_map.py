@@ -0,0 +1,214 @@
+# src/dna_analyzer/io/height_map.py
+import os
+import cv2
+import numpy as np
+
+try:
+    # Dependência opcional (`pip install -e .[heightmap]`): TIFF com memmap (sem compressão) e em float
+    import tifffile
+except ImportError:
+    tifffile = None
+
+# Extensões lidas sempre como mapas de altura (precisão nativa); PNGs de 16 bits também
+# são detectados pelo cabeçalho
+HEIGHT_MAP_EXTENSIONS = ('.npy', '.tif', '.tiff')
+
+# Linhas lidas por vez ao percorrer o mapa inteiro (ex: no cálculo da faixa de alturas)
+HEIGHT_MAP_STRIP_ROWS = 1024
+
+# Assinatura do PNG e posição da profundidade de bits no cabeçalho IHDR
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_PNG_BIT_DEPTH_OFFSET = 24
+
+
+def is_height_map(image_path):
+    """
+    Se o arquivo deve ser lido como mapa de altura em precisão nativa: .npy, TIFF ou
+    PNG de 16 bits (lido só dos primeiros bytes do cabeçalho).
+    """
+    extension = os.path.splitext(image_path)[1].lower()
+    if extension in HEIGHT_MAP_EXTENSIONS:
+        return True
+    if extension != '.png':
+        return False
+    try:
+        with open(image_path, 'rb') as f:
+            header = f.read(_PNG_BIT_DEPTH_OFFSET + 1)
+    except OSError:
+        return False
+    return (len(header) > _PNG_BIT_DEPTH_OFFSET and header.startswith(_PNG_SIGNATURE)
+            and header[_PNG_BIT_DEPTH_OFFSET] == 16)
+
+
+class HeightMap:
+    """
+    Mapa de altura em precisão nativa (uint8, uint16, float32...), com acesso por região.
+
+    Arquivos .npy e TIFFs sem compressão (com `tifffile`) são mapeados em memória: ler
+    uma faixa ou um bloco (`read`, `strips`) só traz do disco essas linhas, então um
+    mapa de vários GB pode ser percorrido com memória limitada. Os demais formatos
+    (PNG de 16 bits, TIFFs comprimidos) não permitem leitura parcial e são decodificados
+    por inteiro uma vez.
+
+    As etapas de análise trabalham em uint8: `to_uint8` leva as alturas para 0-255 com
+    a faixa global do mapa (calculada uma vez, por faixas), de modo que cada região é
+    convertida com a mesma escala e uma única vez. Mapas uint8 passam sem alteração.
+    """
+
+    def __init__(self, data, path=None):
+        """
+        Args:
+            data (np.ndarray): Alturas (2D; array ou memmap).
+            path (str): Arquivo de origem (só para mensagens).
+        """
+        if data.ndim != 2:
+            raise ValueError(f"Mapa de altura com {data.ndim} dimensões em {path}; esperado um array 2D.")
+        self.data = data
+        self.path = path
+        self._range = None
+        self._converted = {}
+
+    @classmethod
+    def open(cls, image_path):
+        """
+        Abre um mapa de altura (.npy com memmap, TIFF com memmap quando possível, ou
+        PNG/TIFF decodificado com a profundidade original).
+
+        Raises:
+            ValueError: Se o arquivo não puder ser lido ou não for um mapa 2D.
+        """
+        extension = os.path.splitext(image_path)[1].lower()
+        data = None
+        if extension == '.npy':
+            try:
+                data = np.load(image_path, mmap_mode='r', allow_pickle=False)
+            except (OSError, ValueError) as error:
+                raise ValueError(f"Não foi possível ler {image_path}: {error}") from error
+        elif extension in ('.tif', '.tiff') and tifffile is not None:
+            try:
+                data = tifffile.memmap(image_path, mode='r')
+            except (OSError, ValueError):
+                # TIFF comprimido ou em blocos: decodifica por inteiro
+                data = tifffile.imread(image_path)
+        if data is None:
+            data = cv2.imread(image_path, cv2.IMREAD_UNCHANGED | cv2.IMREAD_ANYDEPTH)
+            if data is None:
+                raise ValueError(f"Não foi possível ler {image_path}.")
+        if data.ndim == 3 and data.shape[2] == 1:
+            data = data[:, :, 0]
+        elif data.ndim == 3 and data.shape[2] in (3, 4):
+            # Exportação colorida: a altura é a luminância (cvtColor preserva a profundidade)
+            data = cv2.cvtColor(np.asarray(data), cv2.COLOR_BGR2GRAY if data.shape[2] == 3 else cv2.COLOR_BGRA2GRAY)
+        return cls(data, image_path)
+
+    # --- Dimensões ---
+
+    @property
+    def shape(self):
+        """(altura, largura) do mapa."""
+        return self.data.shape
+
+    @property
+    def dtype(self):
+        """Tipo nativo das alturas."""
+        return self.data.dtype
+
+    @property
+    def size(self):
+        """Número de pixels."""
+        return self.data.size
+
+    @property
+    def mapped(self):
+        """Se as alturas estão mapeadas em memória (leitura parcial do disco)."""
+        return isinstance(self.data, np.memmap)
+
+    # --- Acesso por região ---
+
+    def read(self, rows=None, cols=None):
+        """
+        Alturas de uma região, no tipo nativo.
+
+        Args:
+            rows (tuple): (início, fim) das linhas (padrão: todas).
+            cols (tuple): (início, fim) das colunas (padrão: todas).
+
+        Returns:
+            np.ndarray: A região (cópia em memória, mesmo para mapas em memmap).
+        """
+        rows = slice(*rows) if rows is not None else slice(None)
+        cols = slice(*cols) if cols is not None else slice(None)
+        return np.array(self.data[rows, cols])
+
+    def strips(self, rows=HEIGHT_MAP_STRIP_ROWS, halo=0):
+        """
+        Percorre o mapa em faixas horizontais.
+
+        Args:
+            rows (int): Linhas por faixa.
+            halo (int): Linhas extras lidas acima e abaixo de cada faixa (limitadas ao
+                mapa), para filtros que precisam da vizinhança.
+
+        Yields:
+            tuple: (início, fim, alturas das linhas [início - margem, fim + margem), margem
+            superior efetiva).
+        """
+        height = self.shape[0]
+        for start in range(0, height, rows):
+            stop = min(start + rows, height)
+            top, bottom = max(start - halo, 0), min(stop + halo, height)
+            yield start, stop, self.read((top, bottom)), start - top
+
+    # --- Conversão ---
+
+    def value_range(self):
+        """Menor e maior altura finitas do mapa (calculadas uma vez, faixa a faixa)."""
+        if self._range is None:
+            low, high = np.inf, -np.inf
+            for _, _, strip, _ in self.strips():
+                finite = strip[np.isfinite(strip)] if strip.dtype.kind == 'f' else strip
+                if finite.size:
+                    low, high = min(low, finite.min()), max(high, finite.max())
+            self._range = (float(low), float(high)) if low <= high else (0.0, 0.0)
+        return self._range
+
+    def _scale_uint8(self, values):
+        if values.dtype == np.uint8:
+            return values
+        low, high = self.value_range()
+        scaled = values.astype(np.float32)
+        scaled -= low
+        if high > low:
+            scaled *= 255.0 / (high - low)
+        scaled += 0.5
+        # Pixels sem medida (NaN) ficam no nível mais baixo; operações no próprio buffer,
+        # sem cópias temporárias do tamanho da região
+        np.nan_to_num(scaled, copy=False, nan=0.0)
+        np.clip(scaled, 0, 255, out=scaled)
+        return scaled.astype(np.uint8)
+
+    def to_uint8(self, rows=None, cols=None):
+        """
+        Região em uint8 (0-255) com a faixa global do mapa, pronta para as etapas de
+        segmentação. Sem região, o mapa inteiro é convertido uma vez e memorizado.
+        """
+        if rows is None and cols is None:
+            if 'uint8' not in self._converted:
+                self._converted['uint8'] = self._scale_uint8(np.asarray(self.data))
+            return self._converted['uint8']
+        return self._scale_uint8(self.read(rows, cols))
+
+    def to_float32(self, rows=None, cols=None):
+        """
+        Região em float32 com as alturas originais (ex: para nivelamento). Sem região, o
+        mapa inteiro é convertido uma vez e memorizado.
+        """
+        if rows is None and cols is None:
+            if 'float32' not in self._converted:
+                self._converted['float32'] = np.asarray(self.data).astype(np.float32, copy=False)
+            return self._converted['float32']
+        return self.read(rows, cols).astype(np.float32, copy=False)
+
+    def __repr__(self):
+        return (f"HeightMap({os.path.basename(self.path or '')!r}, shape={self.shape}, dtype={self.dtype}, "
+                f"mapped={self.mapped})")
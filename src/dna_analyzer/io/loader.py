@@ -1,5 +1,16 @@
 # src/dna_analyzer/io/loader.py
 import cv2
+import numpy as np
+from PIL import Image
+from .height_map import HeightMap, is_height_map
+
+# Flags do OpenCV para decodificar em escala de cinza com resolução reduzida
+REDUCED_GRAYSCALE_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8
+}
 
 class Loader:
     """Classe responsável por carregar imagens do disco."""
@@ -8,17 +19,60 @@ class Loader:
         """
         Carrega uma imagem em escala de cinza a partir de um caminho.
 
+        Mapas de altura (.npy, TIFF, PNG de 16 bits) são lidos na precisão nativa e
+        convertidos para uint8 com a faixa de alturas do próprio mapa (ver HeightMap),
+        em vez de truncados para 8 bits pelo OpenCV.
+
         Args:
             image_path (str): O caminho para o arquivo de imagem.
 
         Returns:
             numpy.ndarray: A imagem carregada ou None se ocorrer um erro.
         """
+        if is_height_map(image_path):
+            height_map = self.load_height_map(image_path)
+            return height_map.to_uint8() if height_map is not None else None
         image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
         if image is None:
             print(f"Erro: Não foi possível carregar a imagem em {image_path}")
         return image
 
+    def load_heights(self, image_path: str):
+        """
+        Carrega as alturas de uma imagem em float32, para etapas que precisam dos valores
+        contínuos (ex: o nivelamento de fundo): mapas de altura na precisão nativa e as
+        demais imagens em escala de cinza.
+
+        Returns:
+            numpy.ndarray: As alturas (float32) ou None se ocorrer um erro.
+        """
+        if is_height_map(image_path):
+            height_map = self.load_height_map(image_path)
+            return height_map.to_float32() if height_map is not None else None
+        image = self.load_grayscale(image_path)
+        return image.astype(np.float32) if image is not None else None
+
+    def load_grayscale_reduced(self, image_path: str, factor: int = 2):
+        """
+        Carrega uma imagem em escala de cinza reduzida por `factor` em cada eixo.
+
+        Para JPEG a redução acontece na própria decodificação (bem mais rápida);
+        para os demais formatos o OpenCV decodifica e reduz em seguida.
+
+        Args:
+            image_path (str): O caminho para o arquivo de imagem.
+            factor (int): Fator de redução (1, 2, 4 ou 8).
+
+        Returns:
+            numpy.ndarray: A imagem reduzida ou None se ocorrer um erro.
+        """
+        if factor not in REDUCED_GRAYSCALE_FLAGS:
+            raise ValueError(f"Fator de redução inválido: {factor} (use 1, 2, 4 ou 8).")
+        image = cv2.imread(image_path, REDUCED_GRAYSCALE_FLAGS[factor])
+        if image is None:
+            print(f"Erro: Não foi possível carregar a imagem em {image_path}")
+        return image
+
     def load_color(self, image_path: str):
         """
         Carrega uma imagem colorida (BGR) a partir de um caminho.
@@ -26,4 +80,41 @@ class Loader:
         image = cv2.imread(image_path)
         if image is None:
             print(f"Erro: Não foi possível carregar a imagem em {image_path}")
-        return image
\ No newline at end of file
+        return image
+
+    def load_height_map(self, image_path: str):
+        """
+        Abre um mapa de altura em precisão nativa, com acesso por região (memmap para
+        .npy e TIFFs sem compressão).
+
+        Args:
+            image_path (str): O caminho para o arquivo (.npy, TIFF ou PNG).
+
+        Returns:
+            HeightMap: O mapa ou None se ocorrer um erro.
+        """
+        try:
+            return HeightMap.open(image_path)
+        except ValueError as error:
+            print(f"Erro: Não foi possível carregar o mapa de altura em {image_path} ({error})")
+            return None
+
+    def read_dimensions(self, image_path: str):
+        """
+        Lê apenas o cabeçalho do arquivo para obter as dimensões da imagem,
+        sem decodificar os pixels.
+
+        Returns:
+            tuple: (largura, altura) ou None se o arquivo não puder ser lido.
+        """
+        if image_path.lower().endswith('.npy'):
+            try:
+                shape = np.load(image_path, mmap_mode='r', allow_pickle=False).shape
+            except (OSError, ValueError):
+                return None
+            return (shape[1], shape[0]) if len(shape) >= 2 else None
+        try:
+            with Image.open(image_path) as image:
+                return image.size
+        except (OSError, ValueError):
+            return None
\ No newline at end of file
@@ -2,6 +2,7 @@
 import cv2
 import pandas as pd
 import os
+import json
 
 class Saver:
     """Classe para salvar os resultados da análise (imagens e CSV)."""
@@ -28,4 +29,13 @@ class Saver:
         path = os.path.join(self.output_dir, filename)
         with open(path, 'w', encoding='utf-8') as f:
             f.write(text_content)
-        print(f"Relatório de texto salvo em: {path}")
\ No newline at end of file
+        print(f"Relatório de texto salvo em: {path}")
+
+    def save_json(self, data: dict, filename: str):
+        """
+        Salva um dicionário como arquivo JSON no diretório de saída.
+        """
+        path = os.path.join(self.output_dir, filename)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"Arquivo JSON salvo em: {path}")
\ No newline at end of file
@@ -0,0 +1,131 @@
+# src/dna_analyzer/isolation.py
+import os
+import signal
+import threading
+import time
+import traceback
+from statistics import median
+import cv2
+from .telemetry import run_probed
+from .cost_model import edge_density
+
+try:
+    # Limites de recursos por processo (indisponível no Windows)
+    import resource
+except ImportError:
+    resource = None
+
+# Folga (s) além do limite de tempo antes de o processo principal encerrar o processo de
+# trabalho: o alarme interno só interrompe a tarefa quando uma chamada do OpenCV retorna
+HARD_TIMEOUT_GRACE = 10.0
+
+# Uma tarefa concluída é registrada como lenta se levar mais que SLOW_TASK_FACTOR vezes a
+# duração mediana das tarefas da execução (e pelo menos SLOW_TASK_MIN_SECONDS)
+SLOW_TASK_FACTOR = 5.0
+SLOW_TASK_MIN_SECONDS = 1.0
+
+# Quantas linhas finais do traceback são guardadas no diagnóstico
+TRACEBACK_LINES = 6
+
+# Trechos das mensagens de erro do OpenCV quando uma alocação falha
+_ALLOCATION_ERRORS = ('Insufficient memory', 'Failed to allocate')
+
+
+class TaskTimeout(Exception):
+    """A tarefa excedeu o limite de tempo por imagem."""
+
+
+def _raise_timeout(signum, frame):
+    raise TaskTimeout("limite de tempo por imagem excedido")
+
+
+def apply_memory_limit(limit_bytes: int):
+    """
+    Limita o espaço de endereçamento (RLIMIT_AS) do processo atual. Acima do limite,
+    as alocações do NumPy levantam MemoryError e as do OpenCV, cv2.error, capturados
+    por `run_isolated` em vez de o sistema encerrar o processo por falta de memória.
+    """
+    if limit_bytes is None or resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit_bytes = min(limit_bytes, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (int(limit_bytes), hard))
+
+
+def classify_error(error):
+    """Motivo da falha ('tempo_limite', 'memoria' ou 'excecao') a partir da exceção."""
+    if isinstance(error, TaskTimeout):
+        return 'tempo_limite'
+    if isinstance(error, MemoryError) or any(text in str(error) for text in _ALLOCATION_ERRORS):
+        return 'memoria'
+    return 'excecao'
+
+
+def run_isolated(func, task, timeout: float = None, threads: int = None, previews=()):
+    """
+    Executa `run_probed(func, task)` capturando qualquer exceção da tarefa, para que
+    uma imagem problemática não interrompa o lote.
+
+    Com `timeout`, um alarme (SIGALRM, só na thread principal) interrompe a tarefa
+    após `timeout` segundos; dentro de uma chamada longa do OpenCV, ele só é tratado
+    quando a chamada retorna (o executor encerra o processo se ela não retornar).
+    Com `threads`, a tarefa usa esse número de threads do OpenCV (imagens que o
+    modelo de custo prevê como as mais longas da execução). Com `previews`, depois da
+    tarefa (fora do tempo medido), a densidade de bordas desses caminhos é medida para o
+    modelo de custo e volta na sonda em 'densidade_bordas': {caminho: densidade}.
+
+    Returns:
+        tuple: (resultado, sonda), como `run_probed`. Em caso de falha, o resultado é
+        None e a sonda traz 'erro': {'motivo', 'erro', 'traceback'}.
+    """
+    start = time.perf_counter()
+    previous_threads = cv2.getNumThreads()
+    if threads is not None:
+        cv2.setNumThreads(threads)
+    alarm = (timeout is not None and hasattr(signal, 'SIGALRM')
+             and threading.current_thread() is threading.main_thread())
+    if alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        result, probe = run_probed(func, task)
+        if previews:
+            probe['densidade_bordas'] = {image_path: edge_density(image_path) for image_path in previews}
+        return result, probe
+    except Exception as error:
+        lines = traceback.format_exception(type(error), error, error.__traceback__)
+        failure = {'motivo': classify_error(error), 'erro': f"{type(error).__name__}: {error}".strip(),
+                   'traceback': ''.join(lines[-TRACEBACK_LINES:]).strip()}
+        return None, {'stages': {}, 'molecules': 0, 'rejected': 0, 'elapsed': time.perf_counter() - start,
+                      'erro': failure}
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+        if threads is not None:
+            cv2.setNumThreads(previous_threads)
+
+
+def file_diagnostics(image_path, dimensions=None):
+    """Tamanho do arquivo e dimensões (lidas do cabeçalho) de uma imagem em quarentena."""
+    try:
+        size = os.path.getsize(image_path)
+    except OSError:
+        size = None
+    width, height = dimensions if dimensions else (None, None)
+    return {'largura': width, 'altura': height, 'tamanho_bytes': size}
+
+
+def slow_tasks(durations):
+    """
+    Posições das tarefas lentas: duração acima de SLOW_TASK_FACTOR vezes a mediana (e de
+    SLOW_TASK_MIN_SECONDS).
+
+    Args:
+        durations (list): Duração (s) de cada tarefa concluída.
+    """
+    if len(durations) < 2:
+        return []
+    threshold = max(SLOW_TASK_FACTOR * median(durations), SLOW_TASK_MIN_SECONDS)
+    return [position for position, seconds in enumerate(durations) if seconds > threshold]
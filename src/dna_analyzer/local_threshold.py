@@ -0,0 +1,226 @@
+# src/dna_analyzer/local_threshold.py
+import math
+import time
+import cv2
+import numpy as np
+
+# Método usado quando nenhum é informado: o limiar gaussiano do OpenCV, a referência das pipelines
+DEFAULT_THRESHOLD_METHOD = 'opencv-gaussian'
+
+# Número de filtros de média sucessivos que aproximam a gaussiana em 'gaussian-approx'
+GAUSSIAN_APPROX_PASSES = 3
+
+# Parâmetros padrão do Niblack (limiar = média + k * desvio) e do Sauvola, na forma para
+# objetos claros em fundo escuro, como no limiar das pipelines (R = faixa dinâmica do desvio)
+NIBLACK_K = 0.2
+SAUVOLA_K = 0.2
+SAUVOLA_R = 128.0
+
+
+def _gaussian_sigma(block_size):
+    """Sigma que o OpenCV usa para um kernel gaussiano de `block_size` com sigma = 0."""
+    return 0.3 * ((block_size - 1) * 0.5 - 1) + 0.8
+
+
+def box_sizes_for_gaussian(sigma, passes=GAUSSIAN_APPROX_PASSES):
+    """
+    Larguras (ímpares) de `passes` filtros de média cuja aplicação sucessiva tem a mesma
+    variância de uma gaussiana de desvio `sigma` (Wells, 1986).
+    """
+    ideal = math.sqrt(12 * sigma ** 2 / passes + 1)
+    lower = int(ideal)
+    if lower % 2 == 0:
+        lower -= 1
+    lower = max(lower, 1)
+    upper = lower + 2
+    num_lower = round((12 * sigma ** 2 - passes * lower ** 2 - 4 * passes * lower - 3 * passes) / (-4 * lower - 4))
+    return [lower if index < num_lower else upper for index in range(passes)]
+
+
+def _window_statistics(image, block_size):
+    """
+    Média e desvio padrão de cada janela block_size x block_size, por somas móveis
+    (`cv2.boxFilter` dos valores e `cv2.sqrBoxFilter` dos quadrados): o custo por pixel
+    é o mesmo qualquer que seja a janela. A borda é replicada, como no limiar do OpenCV.
+    """
+    size = (block_size, block_size)
+    mean = cv2.boxFilter(image, cv2.CV_32F, size, borderType=cv2.BORDER_REPLICATE)
+    squares = cv2.sqrBoxFilter(image, cv2.CV_32F, size, borderType=cv2.BORDER_REPLICATE)
+    # Em float32, a diferença pode ficar levemente negativa em janelas uniformes
+    return mean, np.sqrt(np.maximum(squares - mean * mean, 0.0))
+
+
+def _binary(mask):
+    return mask.astype(np.uint8) * 255
+
+
+class LocalThreshold:
+    """
+    Interface dos métodos de limiar local. `threshold` binariza uma imagem uint8 com uma
+    janela `block_size` x `block_size` e a constante `C` subtraída do limiar, e devolve
+    255 nos pixels acima do limiar local (objetos claros), como o
+    `cv2.adaptiveThreshold(..., THRESH_BINARY, ...)`.
+
+    Atributos:
+        name (str): Nome do método (chave de LOCAL_THRESHOLD_METHODS).
+        constant_cost (bool): Se o custo por pixel independe de `block_size`.
+    """
+
+    name = None
+    constant_cost = True
+
+    def radius(self, block_size):
+        """Alcance (px) da janela: pixels fora dele não influenciam o resultado."""
+        return block_size // 2
+
+    def threshold(self, image, block_size=11, C=2):
+        raise NotImplementedError
+
+    @staticmethod
+    def _above_mean(image, mean, C):
+        """Mesma comparação do OpenCV: média arredondada para uint8 e `src - média > -ceil(C)`."""
+        difference = cv2.subtract(image, cv2.convertScaleAbs(mean), dtype=cv2.CV_16S)
+        return cv2.compare(difference, -math.ceil(C), cv2.CMP_GT)
+
+
+class OpenCVGaussianThreshold(LocalThreshold):
+    """`cv2.adaptiveThreshold` com ADAPTIVE_THRESH_GAUSSIAN_C: custo cresce com `block_size`."""
+
+    name = 'opencv-gaussian'
+    constant_cost = False
+
+    def threshold(self, image, block_size=11, C=2):
+        return cv2.adaptiveThreshold(image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block_size, C)
+
+
+class MeanThreshold(LocalThreshold):
+    """
+    Média simples da janela: `cv2.adaptiveThreshold` com ADAPTIVE_THRESH_MEAN_C, cuja
+    média é um filtro de somas móveis (custo por pixel independe de `block_size`).
+    """
+
+    name = 'mean'
+
+    def threshold(self, image, block_size=11, C=2):
+        return cv2.adaptiveThreshold(image, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, block_size, C)
+
+
+class GaussianApproxThreshold(LocalThreshold):
+    """
+    Média gaussiana aproximada por GAUSSIAN_APPROX_PASSES filtros de média sucessivos
+    (mesma variância da gaussiana do OpenCV para `block_size`). Cada filtro de média
+    custa o mesmo por pixel qualquer que seja a largura. A borda da imagem original é
+    replicada uma única vez antes dos filtros, como no OpenCV, e não a cada passada.
+    """
+
+    name = 'gaussian-approx'
+
+    def radius(self, block_size):
+        return sum(size // 2 for size in box_sizes_for_gaussian(_gaussian_sigma(block_size)))
+
+    def threshold(self, image, block_size=11, C=2):
+        sizes = box_sizes_for_gaussian(_gaussian_sigma(block_size))
+        radius = sum(size // 2 for size in sizes)
+        mean = cv2.copyMakeBorder(image, radius, radius, radius, radius, cv2.BORDER_REPLICATE).astype(np.float32)
+        for size in sizes:
+            mean = cv2.blur(mean, (size, size))
+        return self._above_mean(image, mean[radius:-radius or None, radius:-radius or None], C)
+
+
+class NiblackThreshold(LocalThreshold):
+    """Niblack: limiar = média + k * desvio padrão da janela (somas móveis dos valores e dos quadrados)."""
+
+    name = 'niblack'
+
+    def __init__(self, k: float = NIBLACK_K):
+        self.k = k
+
+    def threshold(self, image, block_size=11, C=2):
+        mean, deviation = _window_statistics(image, block_size)
+        return _binary(image > mean + self.k * deviation - C)
+
+
+class SauvolaThreshold(LocalThreshold):
+    """
+    Sauvola para objetos claros: o de texto escuro aplicado à imagem invertida, ou seja,
+    limiar = 255 - (255 - média) * (1 + k * (desvio / R - 1)). Em regiões de fundo
+    uniforme (desvio baixo) o limiar sobe em direção ao branco e o ruído não vira objeto.
+    """
+
+    name = 'sauvola'
+
+    def __init__(self, k: float = SAUVOLA_K, R: float = SAUVOLA_R):
+        self.k = k
+        self.R = R
+
+    def threshold(self, image, block_size=11, C=2):
+        mean, deviation = _window_statistics(image, block_size)
+        limit = 255.0 - (255.0 - mean) * (1.0 + self.k * (deviation / self.R - 1.0))
+        return _binary(image > limit - C)
+
+
+LOCAL_THRESHOLD_METHODS = {method.name: method for method in
+                           (OpenCVGaussianThreshold, MeanThreshold, GaussianApproxThreshold,
+                            NiblackThreshold, SauvolaThreshold)}
+
+
+def get_local_threshold(name=None, **options):
+    """
+    Instancia um método de limiar local pelo nome.
+
+    Args:
+        name (str): Chave de LOCAL_THRESHOLD_METHODS ou None (DEFAULT_THRESHOLD_METHOD).
+        **options: Parâmetros do método (ex: k e R do Sauvola).
+
+    Returns:
+        LocalThreshold: O método.
+    """
+    name = name or DEFAULT_THRESHOLD_METHOD
+    if name not in LOCAL_THRESHOLD_METHODS:
+        raise ValueError(f"Método de limiar desconhecido: '{name}'. "
+                         f"Use um de: {', '.join(LOCAL_THRESHOLD_METHODS)}.")
+    return LOCAL_THRESHOLD_METHODS[name](**options)
+
+
+def benchmark_local_thresholds(images, block_sizes, methods=None, repeats=3, C=2):
+    """
+    Mede o tempo de cada método de limiar em imagens de amostra, para cada tamanho de
+    janela, e a concordância da imagem binária com a referência (DEFAULT_THRESHOLD_METHOD).
+
+    Args:
+        images (list): Imagens em escala de cinza (uint8), já desfocadas como nas pipelines.
+        block_sizes (list): Tamanhos de janela (ímpares).
+        methods (list): Métodos medidos (padrão: todos).
+        repeats (int): Repetições da medida de tempo (vale a melhor).
+        C (float): Constante subtraída do limiar.
+
+    Returns:
+        list: Uma linha por (método, janela) com 'metodo', 'janela', 'tempo_s' (todas as
+        imagens), 'ns_por_pixel', 'concordancia' (fração de pixels iguais à referência) e
+        'iou' (interseção sobre união dos pixels de objeto).
+    """
+    methods = list(methods or LOCAL_THRESHOLD_METHODS)
+    reference = get_local_threshold(DEFAULT_THRESHOLD_METHOD)
+    pixels = sum(image.size for image in images)
+    rows = []
+    for block_size in block_sizes:
+        references = [reference.threshold(image, block_size, C) > 0 for image in images]
+        for name in methods:
+            method = get_local_threshold(name)
+            elapsed = float('inf')
+            for _ in range(max(1, repeats)):
+                start = time.perf_counter()
+                binaries = [method.threshold(image, block_size, C) for image in images]
+                elapsed = min(elapsed, time.perf_counter() - start)
+            equal = sum(int(np.count_nonzero((b > 0) == r)) for b, r in zip(binaries, references))
+            intersection = sum(int(np.count_nonzero((b > 0) & r)) for b, r in zip(binaries, references))
+            union = sum(int(np.count_nonzero((b > 0) | r)) for b, r in zip(binaries, references))
+            rows.append({
+                'metodo': name,
+                'janela': block_size,
+                'tempo_s': round(elapsed, 4),
+                'ns_por_pixel': round(elapsed / max(pixels, 1) * 1e9, 2),
+                'concordancia': round(equal / max(pixels, 1), 5),
+                'iou': round(intersection / union, 5) if union else 1.0
+            })
+    return rows
@@ -0,0 +1,101 @@
+# src/dna_analyzer/memory.py
+import os
+import re
+
+# Memória de trabalho aproximada (bytes por pixel da imagem de entrada) de cada
+# etapa, incluindo os buffers temporários criados internamente pelo OpenCV.
+STAGE_BYTES_PER_PIXEL = {
+    'load_gray': 1,            # imagem uint8 decodificada
+    'load_color': 3,           # imagem BGR uint8 decodificada
+    'normalize': 40,           # redimensionamento, borda replicada e máscaras float32 (3 canais)
+    'level': 20,               # alturas float32, imagem nivelada, máscara de fundo e produtos ponderados
+    'blur': 1,                 # GaussianBlur (uint8)
+    'adaptive_threshold': 3,   # média local + imagem binária + abertura morfológica
+    'canny': 13,               # derivadas CV_16S, magnitude e mapa de bordas
+    'contours': 2,             # cópia da imagem de bordas usada pelo findContours
+    'draw': 6,                 # duas imagens BGR com os contornos classificados
+    'thinning': 4,             # cópia de trabalho, marcadores e diferença entre iterações
+    'molecule_masks': 5,       # máscara por contorno + thinning (uma molécula por vez)
+    'length_estimate': 14,     # rótulos int32, transformada de distância float32 e sua dilatação
+    'topology': 16,            # rótulos int32 com borda, thinning da imagem inteira e janelas 2x2
+    'edge_detectors': 40,      # Sobel/Laplaciano em CV_64F e Prewitt em float32
+    'edge_metrics': 9,         # mapas binários, códigos por pixel e rótulos int32 dos contornos
+}
+
+# Custo fixo de um processo de trabalho (interpretador, NumPy, OpenCV, pandas...)
+WORKER_BASELINE_BYTES = 200 * 1024 ** 2
+
+# Fração da memória disponível usada como orçamento quando nenhum é informado
+DEFAULT_BUDGET_FRACTION = 0.7
+
+_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_memory_size(value: str):
+    """
+    Converte um tamanho de memória legível ('512M', '8G', '1.5g', '1073741824') em bytes.
+
+    Raises:
+        ValueError: Se o valor não puder ser interpretado.
+    """
+    match = re.fullmatch(r"\s*([0-9]*\.?[0-9]+)\s*([kKmMgGtT]?)[iI]?[bB]?\s*", str(value))
+    if not match:
+        raise ValueError(f"Tamanho de memória inválido: '{value}' (ex: 512M, 8G).")
+    return int(float(match.group(1)) * _UNITS[match.group(2).upper()])
+
+
+def available_memory():
+    """Retorna a memória disponível do sistema em bytes (None se não puder ser determinada)."""
+    try:
+        with open('/proc/meminfo', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def default_memory_budget(num_workers: int):
+    """
+    Orçamento padrão para os dados das imagens: uma fração da memória disponível,
+    descontado o custo fixo de cada processo de trabalho.
+    """
+    available = available_memory()
+    if available is None:
+        return None
+    return max(0, int(available * DEFAULT_BUDGET_FRACTION) - num_workers * WORKER_BASELINE_BYTES)
+
+
+def estimate_peak_bytes(width: int, height: int, stages):
+    """
+    Estima a memória de pico para processar uma imagem pelas etapas informadas.
+
+    As etapas de uma pipeline rodam em sequência, mas seus resultados intermediários
+    (imagem borrada, binária, esqueleto...) permanecem vivos até o fim do
+    processamento da imagem, por isso a estimativa é a soma dos custos.
+
+    Args:
+        width (int): Largura da imagem em pixels.
+        height (int): Altura da imagem em pixels.
+        stages (iterable): Nomes das etapas (chaves de STAGE_BYTES_PER_PIXEL).
+
+    Returns:
+        int: Estimativa em bytes.
+    """
+    bytes_per_pixel = sum(STAGE_BYTES_PER_PIXEL[stage] for stage in stages)
+    return int(width) * int(height) * bytes_per_pixel
+
+
+def format_bytes(num_bytes):
+    """Formata um número de bytes para exibição (ex: '1.5 GiB')."""
+    if num_bytes is None:
+        return 'desconhecido'
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TiB"
@@ -0,0 +1,278 @@
+# src/dna_analyzer/molecule_index.py
+import os
+import numpy as np
+import pandas as pd
+from .io import Loader
+
+# Colunas da tabela por molécula usadas pelo índice (as de geometria são medidas por
+# `full-skeleton-analysis` com MOLECULE_INDEX ativo; Topologia é opcional)
+INDEX_COLUMNS = ['Dose', 'Arquivo', 'Comprimento', 'Área', 'Circularidade', 'Centroide X', 'Centroide Y',
+                 'Caixa X', 'Caixa Y', 'Caixa Largura', 'Caixa Altura']
+
+# Lado (px) das células da grade espacial de cada imagem
+INDEX_CELL_SIZE = 64
+
+# Tipos das colunas numéricas guardadas no índice (nome no arquivo, coluna da tabela)
+_NUMERIC_COLUMNS = {
+    'comprimento': ('Comprimento', np.float64),
+    'area': ('Área', np.float64),
+    'circularidade': ('Circularidade', np.float32),
+    'centroide_x': ('Centroide X', np.float32),
+    'centroide_y': ('Centroide Y', np.float32),
+    'caixa_x': ('Caixa X', np.int32),
+    'caixa_y': ('Caixa Y', np.int32),
+    'caixa_largura': ('Caixa Largura', np.int32),
+    'caixa_altura': ('Caixa Altura', np.int32)
+}
+
+
+def _codes(values):
+    """Códigos inteiros (int32) e categorias de uma coluna categórica, na ordem de aparição."""
+    codes, uniques = pd.factorize(pd.Series(values).astype(str), sort=False)
+    return codes.astype(np.int32), np.asarray(uniques, dtype=str)
+
+
+class MoleculeIndex:
+    """
+    Índice persistente das moléculas de um conjunto de imagens, para consultas
+    exploratórias por dose, comprimento, forma e posição sem refazer a segmentação.
+
+    As colunas ficam em arrays numpy (uma linha por molécula, com a imagem, a dose e
+    a topologia como códigos inteiros) e três índices secundários, calculados uma vez
+    e salvos junto com os dados:
+
+    * dose/comprimento: permutação das moléculas ordenadas por (dose, comprimento),
+      com o início de cada dose; uma faixa de comprimento em uma dose vira uma fatia
+      contígua achada por busca binária;
+    * comprimento: permutação ordenada só pelo comprimento, para consultas sem dose;
+    * grade espacial: permutação ordenada por (imagem, célula da grade do centróide),
+      com células de `cell_size` pixels; uma região de uma imagem vira uma fatia por
+      linha de células.
+
+    As demais condições (topologia, circularidade, área) são filtros vetorizados
+    sobre as candidatas do índice mais seletivo.
+    """
+
+    def __init__(self, arrays):
+        """
+        Args:
+            arrays (dict): Os arrays do índice, como produzidos por `from_table` ou
+                lidos por `load`.
+        """
+        self.arrays = arrays
+        self.cell_size = int(arrays['cell_size'])
+        self.grid_width = int(arrays['grid_width'])
+        self.cells_per_image = self.grid_width * self.grid_width
+        self.images = arrays['imagens']
+        self.doses = arrays['doses']
+        self.topologies = arrays['topologias']
+        self._image_codes = {name: code for code, name in enumerate(self.images)}
+        self._dose_codes = {name: code for code, name in enumerate(self.doses)}
+        self._sorted_dose_lengths = arrays['comprimento'][arrays['ordem_dose']]
+        self._sorted_lengths = arrays['comprimento'][arrays['ordem_comprimento']]
+
+    def __len__(self):
+        return len(self.arrays['comprimento'])
+
+    # --- Construção e persistência ---
+
+    @classmethod
+    def from_table(cls, df_molecules, cell_size=INDEX_CELL_SIZE):
+        """
+        Constrói o índice a partir da tabela por molécula (`comprimentos_por_molecula.csv`).
+
+        Args:
+            df_molecules (pd.DataFrame): Tabela com as colunas INDEX_COLUMNS (e,
+                opcionalmente, 'Topologia').
+            cell_size (int): Lado das células da grade espacial, em pixels.
+
+        Returns:
+            MoleculeIndex: O índice construído.
+        """
+        missing = [column for column in INDEX_COLUMNS if column not in df_molecules.columns]
+        if missing:
+            raise ValueError(f"Tabela de moléculas sem as colunas do índice: {', '.join(missing)}.")
+        if cell_size < 1:
+            raise ValueError(f"Tamanho de célula inválido: {cell_size} (use um inteiro positivo).")
+
+        arrays = {name: df_molecules[column].to_numpy(dtype=dtype) for name, (column, dtype) in _NUMERIC_COLUMNS.items()}
+        arrays['imagem'], arrays['imagens'] = _codes(df_molecules['Arquivo'])
+        arrays['dose'], arrays['doses'] = _codes(df_molecules['Dose'])
+        if 'Topologia' in df_molecules.columns:
+            arrays['topologia'], arrays['topologias'] = _codes(df_molecules['Topologia'].fillna(''))
+        else:
+            arrays['topologia'], arrays['topologias'] = np.zeros(len(df_molecules), dtype=np.int32), np.array([''])
+
+        # Dose (binada pelo código) e comprimento; ordenação estável para resultados reprodutíveis
+        arrays['ordem_dose'] = np.lexsort((arrays['comprimento'], arrays['dose'])).astype(np.int64)
+        arrays['inicio_dose'] = np.searchsorted(arrays['dose'][arrays['ordem_dose']],
+                                                np.arange(len(arrays['doses']) + 1)).astype(np.int64)
+        arrays['ordem_comprimento'] = np.argsort(arrays['comprimento'], kind='stable').astype(np.int64)
+
+        # Grade espacial: chave (imagem, linha, coluna) da célula do centróide
+        extent = max(int(np.max(arrays['caixa_x'] + arrays['caixa_largura'], initial=0)),
+                     int(np.max(arrays['caixa_y'] + arrays['caixa_altura'], initial=0)), 1)
+        grid_width = -(-extent // cell_size)
+        keys = cls._cell_keys(arrays, cell_size, grid_width)
+        arrays['ordem_grade'] = np.argsort(keys, kind='stable').astype(np.int64)
+        arrays['chaves_grade'] = keys[arrays['ordem_grade']]
+        arrays['cell_size'] = np.array(cell_size)
+        arrays['grid_width'] = np.array(grid_width)
+        return cls(arrays)
+
+    @staticmethod
+    def _cell_keys(arrays, cell_size, grid_width):
+        """Chave da célula do centróide de cada molécula: (imagem * linhas + linha) * colunas + coluna."""
+        last = grid_width - 1
+        column = np.clip(arrays['centroide_x'] // cell_size, 0, last).astype(np.int64)
+        row = np.clip(arrays['centroide_y'] // cell_size, 0, last).astype(np.int64)
+        return (arrays['imagem'].astype(np.int64) * grid_width + row) * grid_width + column
+
+    def save(self, path):
+        """Salva os dados e os índices em um arquivo .npz (sem pickle)."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        np.savez(path, **self.arrays)
+        print(f"Índice de moléculas salvo em: {path} ({len(self)} moléculas)")
+
+    @classmethod
+    def load(cls, path):
+        """Carrega um índice salvo com `save`."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls({name: data[name] for name in data.files})
+
+    # --- Consultas ---
+
+    def _codes_of(self, values, codes, kind):
+        """Códigos das categorias pedidas (um valor ou uma lista); categorias ausentes são ignoradas."""
+        values = [values] if isinstance(values, str) else list(values)
+        unknown = [value for value in values if value not in codes]
+        if unknown:
+            print(f"  Aviso: {kind} sem moléculas no índice: {', '.join(map(str, unknown))}")
+        return [codes[value] for value in values if value in codes]
+
+    def _length_slice(self, sorted_lengths, start, stop, min_length, max_length):
+        """Fatia [início, fim) de um trecho ordenado por comprimento dentro da faixa pedida."""
+        section = sorted_lengths[start:stop]
+        low = 0 if min_length is None else np.searchsorted(section, min_length, side='left')
+        high = len(section) if max_length is None else np.searchsorted(section, max_length, side='right')
+        return start + low, start + high
+
+    def _grid_candidates(self, image_code, region):
+        """Moléculas de uma imagem, ou só as com centróide nas células que cobrem `region`."""
+        keys, order = self.arrays['chaves_grade'], self.arrays['ordem_grade']
+        base = image_code * self.cells_per_image
+        if region is None:
+            start, stop = np.searchsorted(keys, [base, base + self.cells_per_image])
+            return order[start:stop]
+        x0, y0, x1, y1 = region
+        last = self.grid_width - 1
+        column0, column1 = (min(max(int(v) // self.cell_size, 0), last) for v in (x0, max(x1 - 1, x0)))
+        rows = range(min(max(int(y0) // self.cell_size, 0), last), min(max(int(max(y1 - 1, y0)) // self.cell_size, 0), last) + 1)
+        bounds = np.array([(base + row * self.grid_width + column0, base + row * self.grid_width + column1 + 1)
+                           for row in rows], dtype=np.int64).ravel()
+        positions = np.searchsorted(keys, bounds).reshape(-1, 2)
+        return np.concatenate([order[start:stop] for start, stop in positions])
+
+    def query(self, dose=None, min_length=None, max_length=None, topology=None, min_circularity=None,
+              max_circularity=None, min_area=None, max_area=None, image=None, region=None):
+        """
+        Moléculas que satisfazem todas as condições informadas (None = sem restrição).
+
+        Args:
+            dose (str | list): Dose ou doses, ex: '0.7 Gy'.
+            min_length, max_length (float): Faixa de comprimento (nm, inclusiva).
+            topology (str | list): 'linear', 'circular' e/ou 'ramificada'.
+            min_circularity, max_circularity (float): Faixa de circularidade do contorno.
+            min_area, max_area (float): Faixa de área (nm²).
+            image (str): Nome do arquivo da imagem.
+            region (tuple): (x0, y0, x1, y1) em pixels da imagem `image`; seleciona as
+                moléculas com o centróide na região.
+
+        Returns:
+            pd.DataFrame: As moléculas encontradas, com a coluna 'Molécula' (posição
+            no índice), em ordem crescente de posição.
+        """
+        if region is not None and image is None:
+            raise ValueError("A consulta por região requer a imagem (`image`).")
+        arrays = self.arrays
+
+        # Candidatas pelo índice mais seletivo disponível
+        if image is not None:
+            image_codes = self._codes_of(image, self._image_codes, 'Imagem')
+            candidates = self._grid_candidates(image_codes[0], region) if image_codes else np.zeros(0, np.int64)
+            need_dose, need_length = dose is not None, True
+        elif dose is not None:
+            slices = []
+            for code in self._codes_of(dose, self._dose_codes, 'Dose'):
+                start, stop = self._length_slice(self._sorted_dose_lengths, arrays['inicio_dose'][code],
+                                                 arrays['inicio_dose'][code + 1], min_length, max_length)
+                slices.append(arrays['ordem_dose'][start:stop])
+            candidates = np.concatenate(slices) if slices else np.zeros(0, np.int64)
+            need_dose, need_length = False, False
+        elif min_length is not None or max_length is not None:
+            start, stop = self._length_slice(self._sorted_lengths, 0, len(self), min_length, max_length)
+            candidates = arrays['ordem_comprimento'][start:stop]
+            need_dose, need_length = False, False
+        else:
+            candidates = np.arange(len(self))
+            need_dose, need_length = False, False
+
+        # Demais condições como filtros vetorizados sobre as candidatas
+        keep = np.ones(len(candidates), dtype=bool)
+        if need_dose:
+            keep &= np.isin(arrays['dose'][candidates], self._codes_of(dose, self._dose_codes, 'Dose'))
+        if need_length:
+            keep &= self._within(arrays['comprimento'][candidates], min_length, max_length)
+        if topology is not None:
+            topology_codes = {name: code for code, name in enumerate(self.topologies)}
+            keep &= np.isin(arrays['topologia'][candidates], self._codes_of(topology, topology_codes, 'Topologia'))
+        keep &= self._within(arrays['circularidade'][candidates], min_circularity, max_circularity)
+        keep &= self._within(arrays['area'][candidates], min_area, max_area)
+        if region is not None:
+            x0, y0, x1, y1 = region
+            x, y = arrays['centroide_x'][candidates], arrays['centroide_y'][candidates]
+            keep &= (x >= x0) & (x < x1) & (y >= y0) & (y < y1)
+        return self.rows(np.sort(candidates[keep]))
+
+    @staticmethod
+    def _within(values, low, high):
+        """Máscara de `low <= valores <= high` (limites None são ignorados)."""
+        mask = np.ones(len(values), dtype=bool)
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+        return mask
+
+    def rows(self, positions):
+        """Tabela das moléculas nas posições dadas do índice."""
+        arrays = self.arrays
+        table = {'Molécula': positions, 'Dose': self.doses[arrays['dose'][positions]],
+                 'Arquivo': self.images[arrays['imagem'][positions]]}
+        for name, (column, _) in _NUMERIC_COLUMNS.items():
+            table[column] = arrays[name][positions]
+        table['Topologia'] = self.topologies[arrays['topologia'][positions]]
+        return pd.DataFrame(table)
+
+    def crops(self, molecules, image_dir, margin=5):
+        """
+        Recorta cada molécula da sua imagem (retângulo envolvente mais `margin` pixels).
+
+        Args:
+            molecules (pd.DataFrame): Moléculas retornadas por `query` ou `rows`.
+            image_dir (str): Pasta das imagens analisadas (ex:
+                './data/processed/extended_images').
+            margin (int): Margem em volta do retângulo envolvente, em pixels.
+
+        Returns:
+            list: Um recorte (np.ndarray) por molécula, ou None se a imagem não puder ser lida.
+        """
+        loader, images, crops = Loader(), {}, []
+        boxes = molecules[['Caixa X', 'Caixa Y', 'Caixa Largura', 'Caixa Altura']].to_numpy(dtype=np.int64)
+        for filename, (x, y, w, h) in zip(molecules['Arquivo'], boxes):
+            if filename not in images:
+                images[filename] = loader.load_grayscale(os.path.join(image_dir, filename))
+            image = images[filename]
+            crops.append(None if image is None else
+                         image[max(y - margin, 0):y + h + margin, max(x - margin, 0):x + w + margin].copy())
+        return crops
@@ -0,0 +1,143 @@
+# src/dna_analyzer/parallel.py
+import os
+import cv2
+from .memory import default_memory_budget
+from .isolation import apply_memory_limit
+
+try:
+    # Dependência opcional: ajusta em tempo de execução os pools de threads do BLAS/OpenMP
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+# Variáveis lidas pelas bibliotecas BLAS/OpenMP ao serem carregadas
+THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS'
+)
+
+
+def available_cpus():
+    """Retorna o número de núcleos que este processo pode usar (respeita a afinidade de CPU)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def limit_threads(num_threads: int):
+    """
+    Limita os pools de threads internos do OpenCV e do BLAS no processo atual.
+
+    As variáveis de ambiente valem para bibliotecas carregadas depois e são herdadas
+    pelos processos filhos; o `threadpoolctl` (se instalado) ajusta também os pools
+    já carregados pelo NumPy/SciPy.
+    """
+    num_threads = max(1, int(num_threads))
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(num_threads)
+    cv2.setNumThreads(num_threads)
+    if threadpool_limits is not None:
+        threadpool_limits(limits=num_threads)
+
+
+class ParallelConfig:
+    """
+    Configuração central de paralelismo: quantos processos de trabalho e quantas
+    threads (OpenCV/BLAS) cada um pode usar.
+
+    O paralelismo entre imagens escala melhor que as threads internas do OpenCV,
+    por isso o plano padrão usa um processo por núcleo (limitado ao número de
+    imagens) e distribui os núcleos restantes como threads. O produto
+    processos × threads nunca excede os núcleos disponíveis, de forma que
+    aumentar o número de processos não causa sobreinscrição da máquina.
+
+    Os limites por imagem (`task_timeout`, `task_memory_limit`) fazem o executor
+    rodar cada imagem isolada em um processo de trabalho, mesmo com um só processo.
+    Com `cost_model`, o executor ordena as imagens pelo tempo previsto (ver CostModel).
+    """
+
+    def __init__(self, workers: int = None, threads_per_worker: int = None, cpu_count: int = None,
+                 memory_budget: int = None, task_timeout: float = None, task_memory_limit: int = None,
+                 cost_model: bool = True):
+        """
+        Args:
+            workers (int): Número de processos de trabalho (None = automático).
+            threads_per_worker (int): Threads por processo (None = automático).
+            cpu_count (int): Núcleos disponíveis (None = detectado).
+            memory_budget (int): Memória (bytes) que as imagens em processamento
+                simultâneo podem ocupar (None = fração da memória disponível).
+            task_timeout (float): Tempo máximo (s) de cada tarefa; acima dele, a imagem
+                vai para a quarentena (None = sem limite).
+            task_memory_limit (int): Espaço de endereçamento máximo (bytes) de cada
+                processo de trabalho (None = sem limite).
+            cost_model (bool): Ordena as tarefas da mais cara para a mais barata pelo
+                modelo de custo (False = na ordem recebida).
+        """
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.cpu_count = cpu_count or available_cpus()
+        self.memory_budget = memory_budget
+        self.task_timeout = task_timeout
+        self.task_memory_limit = task_memory_limit
+        self.cost_model = cost_model
+
+    @property
+    def isolated(self):
+        """Se há limites por imagem (as tarefas rodam sempre em processos de trabalho)."""
+        return self.task_timeout is not None or self.task_memory_limit is not None
+
+    def plan(self, num_tasks: int):
+        """
+        Decide o layout processos × threads para um lote de `num_tasks` imagens.
+
+        Returns:
+            ParallelConfig: Uma nova configuração com `workers` e
+            `threads_per_worker` resolvidos.
+        """
+        cores = self.cpu_count
+        num_tasks = max(1, num_tasks)
+
+        if self.workers is not None:
+            # Nunca mais processos que núcleos ou tarefas: o excedente só disputaria CPU
+            workers = max(1, min(self.workers, cores, num_tasks))
+        else:
+            workers = max(1, min(cores, num_tasks))
+
+        if self.threads_per_worker is not None:
+            threads = max(1, min(self.threads_per_worker, cores // workers or 1))
+        else:
+            threads = max(1, cores // workers)
+
+        memory_budget = self.memory_budget
+        if memory_budget is None:
+            memory_budget = default_memory_budget(workers)
+
+        return ParallelConfig(workers=workers, threads_per_worker=threads, cpu_count=cores,
+                              memory_budget=memory_budget, task_timeout=self.task_timeout,
+                              task_memory_limit=self.task_memory_limit, cost_model=self.cost_model)
+
+    def as_dict(self):
+        """Retorna o layout em formato serializável (usado no perfil da execução)."""
+        return {
+            'nucleos_disponiveis': self.cpu_count,
+            'processos': self.workers,
+            'threads_por_processo': self.threads_per_worker,
+            'orcamento_memoria_bytes': self.memory_budget,
+            'tempo_limite_por_imagem_s': self.task_timeout,
+            'memoria_limite_por_processo_bytes': self.task_memory_limit,
+            'modelo_de_custo': self.cost_model,
+            'threadpoolctl': threadpool_limits is not None
+        }
+
+    def __repr__(self):
+        return (f"ParallelConfig(workers={self.workers}, threads_per_worker={self.threads_per_worker}, "
+                f"cpu_count={self.cpu_count}, memory_budget={self.memory_budget}, "
+                f"task_timeout={self.task_timeout}, task_memory_limit={self.task_memory_limit}, "
+                f"cost_model={self.cost_model})")
+
+
+def worker_initializer(num_threads: int, memory_limit: int = None):
+    """Inicializador executado em cada processo de trabalho antes da primeira tarefa."""
+    limit_threads(num_threads)
+    apply_memory_limit(memory_limit)
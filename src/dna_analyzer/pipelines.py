@@ -1,79 +1,635 @@
 # src/dna_analyzer/pipelines.py
 import os
 import glob
+import time
+import fnmatch
+from functools import partial
 import pandas as pd
 import cv2
 import numpy as np
-from .io import Loader, Saver
+from .io import Loader, Saver, HeightMap, is_height_map
+from .io.height_map import HEIGHT_MAP_EXTENSIONS
 from .analyzer import Analyzer
 from .visualizer import Visualizer
 from .segmenter import Segmenter
 from .preprocessor import ImagePreprocessor
-from .stats_calculator import StatsCalculator
+from .stats_calculator import IncrementalDoseStats
+from .watcher import FolderWatcher
+from .isolation import run_isolated
+from .sharding import select_shard, save_partial_results, load_partial_results, canonical_order
+from .executor import BatchExecutor, is_batch_task
+from .telemetry import stage
+from .shared_ring import publish_arrays
+from .contour_store import ContourStore
+from .sparse_skeleton import SparseSkeleton
+from .molecule_index import MoleculeIndex, INDEX_COLUMNS
+from .feature_extractor import MIN_MOLECULE_AREA
+from .thinning import (
+    THINNING_CALIBRATION_FILE, THINNING_TOLERANCE, available_thinning_backends, calibrate_thinning
+)
+from .local_threshold import DEFAULT_THRESHOLD_METHOD, benchmark_local_thresholds
+from .timelapse import FrameSequence, TimeLapseAnalyzer, CHANGE_THRESHOLD, CHANGE_TILE_SIZE
+from .core import (
+    ImageContext, as_context, analyze_contours, measure_skeleton_length, measure_molecule_lengths, triage_preview, triage_full,
+    measure_height_map_skeleton_length, compare_edge_detectors, edge_comparison_tables,
+    measure_skeleton_length_batch, measure_molecule_lengths_batch,
+    dose_response_tables, aggregate_by_dose, skeleton_length_tables, analysis_tables,
+    analysis_descriptive_stats, molecule_tables, length_statistics, topology_summary
+)
+
+# Diretórios de saída das pipelines que geram tabelas (compartilhados com o comando `merge`)
+DOSE_RESPONSE_OUTPUT_DIR = './results/dose_response'
+SKELETON_LENGTH_OUTPUT_DIR = './results/figures/skeleton_length/'
+ANALYSIS_OUTPUT_DIR = './results/statistics/perimeters'
+FULL_SKELETON_OUTPUT_DIR = './results/full_skeleton_analysis'
+
+# Arquivo do índice de moléculas salvo por `full-skeleton-analysis` (ver MoleculeIndex)
+MOLECULE_INDEX_FILE = 'indice_moleculas.npz'
+
+# Etapas executadas por cada tarefa por imagem (usadas para estimar a memória de pico)
+CONTOUR_STAGES = ('load_gray', 'canny', 'contours', 'draw')
+SKELETON_LENGTH_STAGES = ('load_gray', 'blur', 'adaptive_threshold', 'thinning')
+MOLECULE_STAGES = ('load_gray', 'blur', 'adaptive_threshold', 'contours', 'molecule_masks')
+PREPROCESS_STAGES = ('load_color', 'normalize')
+# Variantes com a estimativa rápida de comprimento no lugar do thinning
+FAST_SKELETON_LENGTH_STAGES = ('load_gray', 'blur', 'adaptive_threshold', 'length_estimate')
+FAST_MOLECULE_STAGES = ('load_gray', 'blur', 'adaptive_threshold', 'contours', 'length_estimate')
+SKELETON_VIZ_STAGES = ('load_gray', 'blur', 'adaptive_threshold', 'thinning')
+EDGE_COMPARISON_STAGES = ('load_gray', 'edge_detectors')
+EDGE_METRICS_STAGES = ('load_gray', 'edge_detectors', 'edge_metrics')
+
+# Bytes por pixel das saídas que voltam ao processo principal pela memória compartilhada (ver SharedRing)
+SKELETON_VIZ_OUTPUT = 3       # imagem original + coordenadas int32 do esqueleto (até ~25% dos pixels)
+EDGE_COMPARISON_OUTPUT = 5    # imagem original + quatro mapas de bordas uint8
+
+# Modo fundido (--from-raw): as pipelines de análise leem as imagens brutas e fazem a
+# mesma normalização da pipeline `preprocess` em memória, sem o PNG intermediário
+RAW_INPUT_DIR = './data/raw'
+PROCESSED_IMAGES_DIR = './data/processed/extended_images'
+FUSED_TARGET_SIZE = 512
+
+# Nivelamento de fundo das varreduras brutas no modo fundido, antes da normalização
+# (parâmetros de `ImagePreprocessor.level`, ex: {'order': 1, 'plane': True,
+# 'exclude_molecules': True}). None mantém as imagens como estão (já niveladas).
+# A opção --level da linha de comando substitui este padrão na execução.
+FUSED_LEVELING = None
+LEVEL_STAGES = ('level',)
+
+# Mapas de altura com pelo menos este número de pixels são medidos por faixas (memória
+# limitada) nas pipelines que aceitam (`skeleton-length` com thinning), em vez de
+# convertidos inteiros para uint8
+LAZY_HEIGHT_MAP_PIXELS = 64 * 1024 * 1024
+
+# Modo atlas: imagens pequenas da mesma dose são agrupadas em lotes de até ATLAS_BATCH_SIZE
+# imagens, segmentados e esqueletizados juntos em uma única tela (resultados idênticos)
+ATLAS_BATCH_SIZE = 32
+
+# Padrão de nome de arquivo de cada dose e fator de conversão (nm/pixel) pela largura da
+# imagem, compartilhados pelas pipelines que usam as mesmas tabelas
+DEFAULT_DOSE_PATTERNS = {
+    'Sem Irradiar': '*sample_segmentation*.png',
+    '0.4 Gy': '*0,4 Gy*.png',
+    '0.7 Gy': '*0,7Gy*.png',
+    '1.0 Gy': '*1Gy*.png'
+}
+DEFAULT_CONVERSION_FACTORS = {256: 11.72, 258: 11.63, 512: 5.86, 514: 5.79, 1024: 2.93}
+
+# Limiares do controle de qualidade aplicado após o carregamento (ver QualityGate).
+# 'mode': 'tag' só sinaliza as imagens reprovadas; 'reject' (opção --reject-quality)
+# as descarta das estatísticas. Use None na configuração de uma pipeline para
+# desativar o controle.
+QUALITY_GATE = {
+    'mode': 'tag',
+    'min_std': 3.0,
+    'max_saturated_fraction': 0.25,
+    'max_saturated_lines': 0.05,
+    'max_streak_fraction': 0.05,
+    'min_edge_pixels': 50,
+    'max_edge_density': 0.5
+}
+
+
+# --- Tarefas por imagem (executadas nos processos de trabalho do BatchExecutor) ---
+
+def _fused_preprocess(from_raw, save_processed, level=None):
+    """
+    Configuração do modo fundido (None se as imagens já pré-processadas forem lidas).
+    `level` (parâmetros de `ImagePreprocessor.level`) substitui FUSED_LEVELING.
+    """
+    if not from_raw:
+        return None
+    leveling = level if level is not None else FUSED_LEVELING
+    print(f"  Modo fundido: lendo imagens brutas de '{RAW_INPUT_DIR}' e "
+          + ("nivelando e " if leveling is not None else "") + f"normalizando em memória "
+          f"({FUSED_TARGET_SIZE}px)" + (f", salvando em '{PROCESSED_IMAGES_DIR}'." if save_processed else "."))
+    return {
+        'input_dir': RAW_INPUT_DIR,
+        'target_size': FUSED_TARGET_SIZE,
+        'output_dir': PROCESSED_IMAGES_DIR if save_processed else None,
+        'level': leveling
+    }
+
+def _quality_gate(reject_quality=False):
+    """Parâmetros do controle de qualidade da execução: QUALITY_GATE, no modo 'reject' se pedido."""
+    return dict(QUALITY_GATE, mode='reject') if reject_quality else QUALITY_GATE
+
+def _task_stages(stages, preprocess):
+    """Etapas de uma tarefa para a estimativa de memória, incluindo a normalização no modo fundido."""
+    if preprocess is None:
+        return stages
+    return (LEVEL_STAGES if preprocess.get('level') is not None else ()) + PREPROCESS_STAGES + stages
 
+def _find_images(input_dir, pattern):
+    """
+    Arquivos de `input_dir` que correspondem ao padrão de uma dose, incluindo os mapas de
+    altura exportados com o mesmo nome (o padrão com .npy/.tif/.tiff no lugar de .png).
+    """
+    patterns = [pattern]
+    if pattern.endswith('.png'):
+        patterns += [pattern[:-len('.png')] + extension for extension in HEIGHT_MAP_EXTENSIONS]
+    return sorted({path for p in patterns for path in glob.glob(os.path.join(input_dir, p))})
+
+def _load_analysis_image(image_path, preprocess=None, lazy=False):
+    """
+    Carrega uma imagem em escala de cinza para análise.
+
+    No modo fundido (`preprocess` informado), a imagem bruta é lida uma única vez,
+    normalizada em memória com `normalize_size_with_blur_padding` e convertida
+    para escala de cinza; a versão normalizada só é gravada em disco se
+    `preprocess['output_dir']` estiver definido. Com `preprocess['level']`, as alturas
+    são lidas em float32 e niveladas (`ImagePreprocessor.level`) antes da normalização.
+
+    Mapas de altura (ver HeightMap) são lidos na precisão nativa e convertidos para
+    uint8 uma única vez. Com `lazy`, os mapas com pelo menos LAZY_HEIGHT_MAP_PIXELS
+    pixels são devolvidos como HeightMap, sem conversão, para as etapas que os
+    consomem por faixas.
+    """
+    loader = Loader()
+    if preprocess is None:
+        with stage('load'):
+            if lazy and is_height_map(image_path):
+                height_map = loader.load_height_map(image_path)
+                if height_map is None or height_map.size < LAZY_HEIGHT_MAP_PIXELS:
+                    return height_map.to_uint8() if height_map is not None else None
+                return height_map
+            return loader.load_grayscale(image_path)
+
+    height_map, leveling = is_height_map(image_path), preprocess.get('level')
+    # Mapas de altura e imagens niveladas seguem em escala de cinza
+    grayscale = height_map or leveling is not None
+    with stage('load'):
+        if leveling is not None:
+            # O nivelamento trabalha sobre as alturas contínuas (float32)
+            original_image = loader.load_heights(image_path)
+        else:
+            original_image = loader.load_grayscale(image_path) if height_map else loader.load_color(image_path)
+    if original_image is None:
+        return None
+    if leveling is not None:
+        with stage('level'):
+            preprocessor = ImagePreprocessor(target_size=preprocess['target_size'])
+            original_image = preprocessor.leveled_to_uint8(preprocessor.level(original_image, **leveling))
+    with stage('normalize'):
+        processed_image = ImagePreprocessor(target_size=preprocess['target_size']) \
+            .normalize_size_with_blur_padding(original_image)
+    if preprocess['output_dir']:
+        with stage('save'):
+            # Mapas de altura são gravados como o PNG de 8 bits normalizado
+            filename = os.path.splitext(os.path.basename(image_path))[0] + '.png' if height_map \
+                else os.path.basename(image_path)
+            Saver(output_directory=preprocess['output_dir']).save_image(processed_image, filename)
+    return processed_image if grayscale else cv2.cvtColor(processed_image, cv2.COLOR_BGR2GRAY)
+
+def _load_batch_images(image_paths, conversion_factors):
+    """
+    Carrega as imagens de um lote de atlas.
+
+    Returns:
+        tuple: (índices das imagens carregadas, imagens, fatores de conversão)
+    """
+    loaded, images, factors = [], [], []
+    for index, image_path in enumerate(image_paths):
+        image = _load_analysis_image(image_path)
+        if image is None: continue
+        loaded.append(index)
+        images.append(image)
+        factors.append(conversion_factors.get(image.shape[1]))
+    return loaded, images, factors
+
+def _scatter_batch(num_images, loaded, outcomes):
+    """Resultados por imagem do lote, com None nas que não puderam ser carregadas."""
+    results = [None] * num_images
+    for index, outcome in zip(loaded, outcomes):
+        results[index] = outcome
+    return results
+
+def _atlas_dispatch(task, single_func, batch_func):
+    """Executa uma tarefa de imagem única ou um lote de atlas com a função correspondente."""
+    return batch_func(task) if is_batch_task(task) else single_func(task)
+
+def _atlas_batches(tasks, max_side, batch_size=ATLAS_BATCH_SIZE):
+    """
+    Agrupa as tarefas de imagens pequenas (lado até `max_side`, lido do cabeçalho) em
+    lotes de até `batch_size` imagens da mesma dose.
+
+    Returns:
+        list: Listas de índices das tarefas; as de um só índice rodam normalmente.
+    """
+    loader = Loader()
+    groups, open_batches = [], {}
+    for index, (dose, image_path) in enumerate(tasks):
+        dimensions = loader.read_dimensions(image_path)
+        if dimensions is None or max(dimensions) > max_side:
+            groups.append([index])
+            continue
+        batch = open_batches.get(dose)
+        if batch is None or len(batch) >= batch_size:
+            batch = open_batches[dose] = []
+            groups.append(batch)
+        batch.append(index)
+    return groups
+
+def _run_tasks(executor, single_func, batch_func, tasks, stages, atlas_max_side=None):
+    """
+    Executa as tarefas e devolve um resultado por tarefa, na ordem das tarefas. Com
+    `atlas_max_side`, as imagens pequenas são processadas em lotes de atlas por `batch_func`.
+    """
+    if not atlas_max_side:
+        return executor.run(single_func, tasks, stages=stages)
+
+    groups = _atlas_batches(tasks, atlas_max_side)
+    batched = sum(len(group) for group in groups if len(group) > 1)
+    if batched:
+        print(f"  Atlas: {batched} imagens pequenas em {sum(len(group) > 1 for group in groups)} lote(s)")
+    grouped_tasks = [tasks[group[0]] if len(group) == 1 else (tasks[group[0]][0], tuple(tasks[i][1] for i in group))
+                     for group in groups]
+    grouped_results = executor.run(partial(_atlas_dispatch, single_func=single_func, batch_func=batch_func),
+                                   grouped_tasks, stages=stages)
+
+    results = [None] * len(tasks)
+    for group, result in zip(groups, grouped_results):
+        if len(group) == 1:
+            results[group[0]] = result
+        elif result is not None:
+            # Lote concluído (um lote que falhou, ver BatchExecutor.quarantine, fica com None em todas as imagens)
+            for index, outcome in zip(group, result):
+                results[index] = outcome
+    return results
+
+def _contour_statistics(image, image_path, analyzer_config=None, quality_config=None, contours_dir=None):
+    """
+    Aplica `analyze_contours` a uma imagem carregada (ou ao seu ImageContext). Com
+    `contours_dir`, salva os contornos classificados em `<contours_dir>/<nome da imagem>.npz`.
+    """
+    contours_path = None
+    if contours_dir is not None:
+        contours_path = os.path.join(contours_dir, os.path.basename(image_path) + '.npz')
+    return analyze_contours(image, analyzer_config, quality_config, contours_path)
+
+def _skeleton_length(image, image_path, conversion_factors, quality_config=None, length_method='thinning'):
+    """
+    Aplica `measure_skeleton_length` a uma imagem carregada (ou ao seu ImageContext), ou
+    `measure_height_map_skeleton_length` a um mapa de altura grande lido por faixas.
+    """
+    # Determina o fator de conversão a partir da largura da imagem
+    width = image.shape[1]
+    conversion_factor = conversion_factors.get(width)
+    if conversion_factor is None:
+        print(f"  ERRO: Fator de conversão não encontrado para a resolução {width}px. Pulando {os.path.basename(image_path)}.")
+    if isinstance(image, HeightMap):
+        if quality_config is not None:
+            print(f"  Aviso: controle de qualidade não aplicado a {os.path.basename(image_path)} (mapa lido por faixas).")
+        return measure_height_map_skeleton_length(image, conversion_factor), {}
+    return measure_skeleton_length(image, conversion_factor, quality_config, length_method)
+
+def _molecule_lengths(image, image_path, conversion_factors, quality_config=None, length_method='thinning',
+                      topology_config=None, geometry=False):
+    """Aplica `measure_molecule_lengths` a uma imagem carregada (ou ao seu ImageContext)."""
+    return measure_molecule_lengths(image, conversion_factors.get(image.shape[1]), quality_config, length_method,
+                                    topology_config, geometry)
+
+def _classified_images(image, image_path, analyzer_config=None):
+    """
+    Estatísticas e imagens com os contornos de DNA e de RNA de uma imagem carregada (ou
+    do seu ImageContext), para os gráficos da pipeline `visualization-per-dose`.
+    """
+    results = as_context(image).contour_analysis(analyzer_config)
+    return {'statistics': dict(results["statistics"]), 'dna_image': results["dna_image"],
+            'rna_image': results["rna_image"]}
+
+def _image_task(task, compute, preprocess=None, lazy=False):
+    """
+    Carrega a imagem de uma tarefa e aplica `compute(imagem, caminho)` (uma das funções
+    acima, com a configuração da pipeline); retorna None se ela não puder ser carregada.
+    Com `lazy`, mapas de altura grandes chegam a `compute` como HeightMap.
+    """
+    image_path = task[1]
+    image = _load_analysis_image(image_path, preprocess, lazy)
+    if image is None:
+        return None
+    return compute(image, image_path)
+
+def _multi_pipeline_task(task, computes, preprocess=None):
+    """
+    Tarefa do comando `run`: carrega a imagem uma única vez e aplica o `compute` de cada
+    pipeline da tarefa ao mesmo ImageContext, que reaproveita as etapas em comum.
 
-def run_dose_response_pipeline():
-    """Executa a análise de dose-resposta e gera os gráficos."""
+    Args:
+        task (tuple): (dose, caminho, nomes das pipelines que usam a imagem).
+        computes (dict): Função `compute(imagem, caminho)` de cada pipeline.
+
+    Returns:
+        dict: O resultado de cada pipeline, ou None se a imagem não puder ser carregada.
+    """
+    _, image_path, names = task
+    image = _load_analysis_image(image_path, preprocess)
+    if image is None:
+        return None
+    context = ImageContext(image)
+    return {name: computes[name](context, image_path) for name in names}
+
+def _skeleton_length_batch_task(task, conversion_factors, quality_config=None, length_method='thinning'):
+    """Lote de atlas de `_skeleton_length`: um resultado (ou None) por imagem."""
+    _, image_paths = task
+    loaded, images, factors = _load_batch_images(image_paths, conversion_factors)
+    for index, image, factor in zip(loaded, images, factors):
+        if factor is None:
+            print(f"  ERRO: Fator de conversão não encontrado para a resolução {image.shape[1]}px. "
+                  f"Pulando {os.path.basename(image_paths[index])}.")
+    outcomes = measure_skeleton_length_batch(images, factors, quality_config, length_method)
+    return _scatter_batch(len(image_paths), loaded, outcomes)
+
+def _molecule_lengths_batch_task(task, conversion_factors, quality_config=None, length_method='thinning',
+                                 topology_config=None, geometry=False):
+    """Lote de atlas de `_molecule_lengths`: um resultado (ou None) por imagem."""
+    _, image_paths = task
+    loaded, images, factors = _load_batch_images(image_paths, conversion_factors)
+    for index, image, factor in zip(loaded, images, factors):
+        if factor is None:
+            print(f"  ERRO: Fator de conversão não encontrado para a resolução {image.shape[1]}px. "
+                  f"Pulando {os.path.basename(image_paths[index])}.")
+    outcomes = measure_molecule_lengths_batch(images, factors, quality_config, length_method, topology_config, geometry)
+    return _scatter_batch(len(image_paths), loaded, outcomes)
+
+def _skeleton_viz_task(task, slot=None):
+    """
+    Esqueletiza uma imagem para a visualização; a imagem e as coordenadas do esqueleto
+    esparso voltam ao processo principal pelo slot de memória compartilhada.
+    """
+    _, image_path = task
+    with stage('load'):
+        image = Loader().load_grayscale(image_path)
+    if image is None:
+        return None
+    with stage('skeleton'):
+        skeleton = Analyzer().run_skeleton_pipeline(image, sparse=True)['skeleton']
+    components = skeleton.components
+    result = publish_arrays(slot, {'original': image, 'pontos': components.points, 'deslocamentos': components.offsets,
+                                   'rotulos': components.metadata['rotulo']})
+    result['forma'] = skeleton.shape
+    return result
+
+def _edge_comparison_task(task, segmenter_config, slot=None):
+    """Aplica todos os detectores de borda a uma imagem; a imagem e os mapas voltam pelo slot."""
+    _, image_path = task
+    with stage('load'):
+        image = Loader().load_grayscale(image_path)
+    if image is None:
+        return None
+    with stage('edges'):
+        edge_results = Segmenter(**segmenter_config).detect_all_edges(image)
+    return publish_arrays(slot, {'original': image, **edge_results})
+
+def _edge_metrics_task(task, segmenter_config, figure_paths=(), slot=None):
+    """
+    Métricas da comparação de detectores de uma imagem; a imagem e os mapas de bordas
+    só voltam (pelo slot) para as imagens sorteadas para as figuras.
+    """
+    _, image_path = task
+    with stage('load'):
+        image = Loader().load_grayscale(image_path)
+    if image is None:
+        return None
+    with stage('edges'):
+        edge_results = Segmenter(**segmenter_config).detect_all_edges(image)
+    with stage('metrics'):
+        result = {'metricas': compare_edge_detectors(edge_results)}
+    if image_path in figure_paths:
+        result.update(publish_arrays(slot, {'original': image, **edge_results}))
+    return result
+
+def _preprocess_task(task, output_dir, target_size):
+    """Normaliza uma imagem bruta e a salva; retorna o tamanho final (largura, altura) ou None."""
+    _, image_path = task
+    filename = os.path.basename(image_path)
+    print(f"Processando: {filename}")
+
+    # 1. Carrega a imagem colorida
+    with stage('load'):
+        original_image = Loader().load_color(image_path)
+    if original_image is None:
+        return None
+
+    # 2. Usa o preprocessor para normalizar a imagem
+    with stage('normalize'):
+        processed_image = ImagePreprocessor(target_size=target_size).normalize_size_with_blur_padding(original_image)
+
+    # 3. Salva a imagem resultante
+    with stage('save'):
+        Saver(output_directory=output_dir).save_image(processed_image, filename)
+    return processed_image.shape[1], processed_image.shape[0]
+
+def _triage_preview_task(task, reduction, conversion_factors, analyzer_config, rules):
+    """Analisa uma imagem em resolução reduzida e sinaliza se a prévia é ambígua (ou None)."""
+    _, image_path = task
+    loader = Loader()
+    with stage('load'):
+        dimensions = loader.read_dimensions(image_path)
+        image = loader.load_grayscale_reduced(image_path, reduction)
+    if image is None:
+        return None
+
+    # Converte para a escala completa usando a largura real lida do cabeçalho
+    full_width = dimensions[0] if dimensions else image.shape[1] * reduction
+    row = triage_preview(image, full_width / image.shape[1], conversion_factors.get(full_width), analyzer_config, rules)
+    row['Resolução'] = f"1/{reduction}"
+    return row
+
+def _triage_full_task(task, conversion_factors, analyzer_config):
+    """Reprocessa uma imagem em resolução completa (contornos e comprimento do esqueleto)."""
+    _, image_path = task
+    with stage('load'):
+        image = Loader().load_grayscale(image_path)
+    if image is None:
+        return None
+    row = triage_full(image, conversion_factors.get(image.shape[1]), analyzer_config)
+    row['Resolução'] = "completa"
+    return row
+
+def _run_plan(plan, parallel=None, metrics=None):
+    """
+    Executa o plano de uma pipeline de análise por imagem e grava as suas saídas.
+
+    O plano (montado pelas funções `_<pipeline>_plan`) é um dicionário com o nome da
+    pipeline ('name'), as tarefas (dose, caminho) ('tasks'), a configuração do modo
+    fundido ('preprocess'), as etapas para a estimativa de memória ('stages'), a função
+    `compute(imagem, caminho)` aplicada a cada imagem ('compute'), opcionalmente a tarefa
+    de lote de atlas ('batch', 'atlas_max_side'), se `compute` aceita mapas de altura
+    grandes lidos por faixas ('lazy') e a função `finish(resultados, executor, início)`
+    que monta as tabelas e grava as saídas ('finish').
+    """
+    executor = BatchExecutor(parallel, metrics=metrics)
+    started = time.time()
+    task_results = _run_tasks(executor, partial(_image_task, compute=plan['compute'], preprocess=plan['preprocess'],
+                                                lazy=plan.get('lazy', False)),
+                              plan.get('batch'), plan['tasks'], plan['stages'], plan.get('atlas_max_side'))
+    plan['finish'](task_results, executor, started)
+
+def _task_results(tasks, task_results):
+    """Associa os metadados (dose, nome do arquivo) de cada tarefa ao seu resultado."""
+    return [({'dose': dose, 'arquivo': os.path.basename(image_path)}, outcome)
+            for (dose, image_path), outcome in zip(tasks, task_results)]
+
+def _report_quality(df_quality):
+    """Resume no terminal quantas imagens o controle de qualidade rejeitou ou sinalizou."""
+    if df_quality.empty:
+        return
+    rejected = int((df_quality['Qualidade'] == 'rejeitada').sum())
+    flagged = int((df_quality['Qualidade'] == 'sinalizada').sum())
+    if rejected or flagged:
+        print(f"  Controle de qualidade: {rejected} imagem(ns) rejeitada(s), {flagged} sinalizada(s).")
+
+def _save_quality_table(df_quality, output_dir):
+    """Salva a tabela de qualidade por imagem, se o controle de qualidade estiver ativo."""
+    if not df_quality.empty:
+        Saver(output_dir).save_dataframe(df_quality, "qualidade_imagens.csv")
+
+def _save_run_profile(output_dir, pipeline, executor, num_images, started, shard=None):
+    """
+    Salva o perfil da execução (duração, número de imagens e layout de paralelismo) e,
+    se houver, a lista de imagens em quarentena (falhas e imagens lentas, com diagnóstico).
+    """
+    profile = {
+        'pipeline': pipeline,
+        'inicio': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(started)),
+        'duracao_s': round(time.time() - started, 3),
+        'imagens': num_images,
+        'shard': list(shard) if shard is not None else None,
+        'paralelismo': executor.layout.as_dict() if executor.layout is not None else None,
+        'execucao': executor.stats
+    }
+    suffix = "" if shard is None else f".shard-{shard[0]}-of-{shard[1]}"
+    Saver(output_dir).save_json(profile, f"run_profile{suffix}.json")
+    if executor.quarantine:
+        failed = sum(entry['motivo'] != 'lenta' for entry in executor.quarantine)
+        print(f"  Quarentena: {failed} imagem(ns) com falha, {len(executor.quarantine) - failed} lenta(s); "
+              f"as tabelas e gráficos usam apenas as imagens concluídas.")
+        Saver(output_dir).save_dataframe(pd.DataFrame(executor.quarantine), f"quarentena{suffix}.csv")
+
+
+def run_dose_response_pipeline(shard=None, parallel=None, metrics=None, from_raw=False, save_processed=False,
+                               reject_quality=False, level=None):
+    """
+    Executa a análise de dose-resposta e gera os gráficos.
+
+    Args:
+        shard (tuple): Tupla (i, N) para processar apenas a fatia i de N das imagens
+            e salvar resultados parciais (combinados depois com `merge`).
+        parallel (ParallelConfig): Processos e threads por processo (None = automático).
+        metrics (RunMetrics): Métricas de progresso exportadas durante a execução.
+        from_raw (bool): Modo fundido: lê as imagens brutas e as normaliza em memória.
+        save_processed (bool): No modo fundido, também salva as imagens normalizadas.
+        reject_quality (bool): Descarta das estatísticas as imagens reprovadas no controle
+            de qualidade (por padrão, elas só são sinalizadas).
+        level (dict): No modo fundido, parâmetros do nivelamento de fundo (opção --level);
+            None usa FUSED_LEVELING.
+    """
+    preprocess = _fused_preprocess(from_raw, save_processed, level)
+    _run_plan(_dose_response_plan(shard, preprocess, reject_quality), parallel, metrics)
+
+def _dose_response_plan(shard=None, preprocess=None, reject_quality=False):
+    """Plano da pipeline `dose-response` (ver `_run_plan`)."""
     print("Executando a pipeline de Análise de Dose-Resposta...")
 
     # --- Configuração ---
     INPUT_DIR = './data/processed/extended_images'  # Diretório principal com todas as imagens
-    OUTPUT_DIR = './results/dose_response'
+    OUTPUT_DIR = DOSE_RESPONSE_OUTPUT_DIR
 
     # Dicionário mapeando a dose para um padrão de nome de arquivo
-    DOSE_PATTERNS = {
-        'Sem Irradiar': '*sample_segmentation*.png',
-        '0.4 Gy': '*0,4 Gy*.png',
-        '0.7 Gy': '*0,7Gy*.png',
-        '1.0 Gy': '*1Gy*.png'
-    }
+    DOSE_PATTERNS = DEFAULT_DOSE_PATTERNS
 
     ANALYZER_CONFIG = {
         'segmenter': {'canny_threshold1': 100, 'canny_threshold2': 200},
         'extractor': {'circularity_threshold': 0.8}
     }
 
+    QUALITY_CONFIG = _quality_gate(reject_quality)  # None desativa o controle de qualidade
+
+    # Pasta onde os contornos DNA/RNA de cada imagem são salvos (ContourStore .npz),
+    # para redesenhar as sobreposições sem segmentar de novo. None desativa.
+    CONTOURS_DIR = os.path.join(OUTPUT_DIR, 'contornos')
+
     # --- Lógica ---
-    loader, analyzer, visualizer, saver = Loader(), Analyzer(config=ANALYZER_CONFIG), Visualizer(), Saver(OUTPUT_DIR)
+    if preprocess is not None:
+        INPUT_DIR = preprocess['input_dir']
 
     # --- Processamento ---
-    all_individual_results = []
+    tasks = []
 
     # Itera sobre cada dose e seu padrão
     for dose, pattern in DOSE_PATTERNS.items():
         # Usa glob para encontrar todos os arquivos que correspondem ao padrão no diretório de entrada
-        image_paths = glob.glob(os.path.join(INPUT_DIR, pattern))
+        image_paths = select_shard(_find_images(INPUT_DIR, pattern), shard)
         
         if not image_paths:
             print(f"  Aviso: Nenhuma imagem encontrada para a dose '{dose}' com o padrão '{pattern}'")
             continue
             
         print(f"  Encontradas {len(image_paths)} imagens para a dose: {dose}")
+        tasks.extend((dose, image_path) for image_path in image_paths)
+
+    def finish(task_results, executor, started):
+        _save_run_profile(OUTPUT_DIR, 'dose-response', executor, len(tasks), started, shard)
+
+        # Converte os resultados individuais em DataFrames do Pandas
+        tables = dose_response_tables(_task_results(tasks, task_results))
+        df_individual, df_quality = tables['individuais'], tables['qualidade']
+        _report_quality(df_quality)
+
+        if shard is not None:
+            # Salva mesmo sem resultados, para que o `merge` saiba que o shard foi executado
+            save_partial_results(OUTPUT_DIR, 'dose-response', shard,
+                                 {'individuais': df_individual, 'qualidade': df_quality}, doses=DOSE_PATTERNS.keys())
+            return
+
+        _save_quality_table(df_quality, OUTPUT_DIR)
+
+        if df_individual.empty:
+            print("Nenhuma imagem foi processada. Encerrando pipeline.")
+            return
+
+        _finalize_dose_response(df_individual, OUTPUT_DIR)
+
+    # Processa todas as imagens (em paralelo, se houver mais de um núcleo)
+    return {
+        'name': 'dose-response',
+        'tasks': tasks,
+        'preprocess': preprocess,
+        'stages': _task_stages(CONTOUR_STAGES, preprocess),
+        'compute': partial(_contour_statistics, analyzer_config=ANALYZER_CONFIG, quality_config=QUALITY_CONFIG,
+                           contours_dir=CONTOURS_DIR),
+        'finish': finish
+    }
 
-        # Itera sobre cada imagem encontrada para a dose atual
-        for image_path in image_paths:
-            image = loader.load_grayscale(image_path)
-            if image is None: continue
-            
-            results = analyzer.process(image)
-            current_result = results["statistics"]
-            current_result['Dose'] = dose
-            current_result['Arquivo'] = os.path.basename(image_path) # Adiciona o nome do arquivo para rastreabilidade
-            all_individual_results.append(current_result)
-
-    if not all_individual_results:
-        print("Nenhuma imagem foi processada. Encerrando pipeline.")
-        return
+def _finalize_dose_response(df_individual, output_dir):
+    """Agrega os resultados por dose, salva os CSVs e gera os gráficos de dose-resposta."""
+    saver = Saver(output_dir)
 
     # --- Agregação e Salvamento dos Resultados ---
-    # Converte a lista de resultados individuais em um DataFrame do Pandas
-    df_individual = pd.DataFrame(all_individual_results)
     saver.save_dataframe(df_individual, "resultados_individuais_por_arquivo.csv")
 
-    # Usa groupby para agregar os resultados por dose (calculando média e desvio padrão)
-    # Seleciona apenas colunas numéricas para as operações de agregação
-    numeric_cols = df_individual.select_dtypes(include=['number']).columns
-    df_aggregated = df_individual.groupby('Dose')[numeric_cols].agg(['mean', 'std']).round(2)
+    # Agrega os resultados por dose (calculando média e desvio padrão)
+    df_aggregated = aggregate_by_dose(df_individual)
     saver.save_dataframe(df_aggregated, "resultados_agregados_por_dose.csv")
 
     print("\n--- Resultados Agregados por Dose (Média) ---")
@@ -85,74 +641,102 @@ def run_dose_response_pipeline():
     results_for_plot = df_mean.to_dict('records')
     
     visualizer = Visualizer()
-    visualizer.plot_dose_response(results_for_plot, output_dir=OUTPUT_DIR)
+    visualizer.plot_dose_response(results_for_plot, output_dir=output_dir)
     
     print("Pipeline de Análise de Dose-Resposta concluída.")
 
-def run_skeleton_analysis_pipeline():
-    """Executa a análise de esqueletização e visualiza os resultados."""
+def run_skeleton_analysis_pipeline(parallel=None, metrics=None):
+    """
+    Executa a análise de esqueletização e visualiza os resultados.
+
+    As imagens são esqueletizadas nos processos de trabalho e os esqueletos voltam
+    pela memória compartilhada; os gráficos são exibidos pelo processo principal.
+
+    Args:
+        parallel (ParallelConfig): Processos e threads por processo (None = automático).
+        metrics (RunMetrics): Métricas de progresso exportadas durante a execução.
+    """
     print("Executando a pipeline de Visualização de Esqueleto...")
 
     # --- Configuração ---
     INPUT_DIR = './data/processed/extended_images'  # Diretório principal com todas as imagens
 
     # Dicionário mapeando a dose para um padrão de nome de arquivo
-    DOSE_PATTERNS = {
-        'Sem Irradiar': '*sample_segmentation*.png',
-        '0.4 Gy': '*0,4 Gy*.png',
-        '0.7 Gy': '*0,7Gy*.png',
-        '1.0 Gy': '*1Gy*.png'
-    }
+    DOSE_PATTERNS = DEFAULT_DOSE_PATTERNS
 
     # --- Lógica ---
-    loader, analyzer, visualizer = Loader(), Analyzer(), Visualizer()
+    visualizer = Visualizer()
+    tasks = []
 
     for dose, pattern in DOSE_PATTERNS.items():
         # Usa glob para encontrar todos os arquivos que correspondem ao padrão no diretório de entrada
         image_paths = glob.glob(os.path.join(INPUT_DIR, pattern))
         print(f"  Analisando {len(image_paths)} imagens para a dose: {dose}")
+        tasks.extend((dose, image_path) for image_path in image_paths)
+
+    def show(task, result):
+        if result is None:
+            return None
+        dose, image_path = task
+        components = ContourStore(result['pontos'], result['deslocamentos'], {'rotulo': result['rotulos']})
+        visualizer.plot_skeleton_overlay(
+            original_image=result['original'],
+            skeleton_image=SparseSkeleton(result['forma'], components),
+            dose_label=f"{dose} - {os.path.basename(image_path)}"
+        )
+        return True
 
-        for image_path in image_paths:
-            # Carrega a imagem em escala de cinza
-            image = loader.load_grayscale(image_path)
-            if image is None: continue
+    BatchExecutor(parallel, metrics=metrics).run(_skeleton_viz_task, tasks, stages=SKELETON_VIZ_STAGES,
+                                                 shared_output=SKELETON_VIZ_OUTPUT, consume=show)
 
-            # Executa a análise de esqueleto
-            results = analyzer.run_skeleton_pipeline(image)
+    print("Pipeline de Visualização de Esqueleto concluída.")
 
-            visualizer.plot_skeleton_overlay(
-                original_image=results['original'],
-                skeleton_image=results['skeleton'],
-                dose_label=f"{dose} - {os.path.basename(image_path)}"
-            )
+def run_comparison_pipeline(parallel=None, metrics=None, edge_metrics=False):
+    """
+    Executa a comparação de algoritmos de detecção de borda.
 
-    print("Pipeline de Visualização de Esqueleto concluída.")
+    Por padrão, todas as imagens da pasta geram os mapas de bordas e a figura de
+    comparação. No modo de métricas (`edge_metrics`), cada imagem gera as métricas de
+    `compare_edge_detectors` (densidade de bordas, Dice/IoU entre detectores, contornos e
+    continuidade), agregadas por dose; as imagens e figuras só são salvas para uma
+    amostra por dose.
 
-def run_comparison_pipeline():
-    """Executa a comparação de algoritmos de detecção de borda."""
+    Os detectores rodam nos processos de trabalho e os mapas de bordas voltam pela
+    memória compartilhada; o processo principal salva as imagens e os gráficos.
+
+    Args:
+        parallel (ParallelConfig): Processos e threads por processo (None = automático).
+        metrics (RunMetrics): Métricas de progresso exportadas durante a execução.
+        edge_metrics (bool): Ativa o modo de métricas por dose (opção --edge-metrics).
+    """
     print("Executando a pipeline de Comparação de Algoritmos...")
 
     # --- Configuração ---
     INPUT_DIR = './data/processed/extended_images'  # Diretório de entrada
     OUTPUT_DIR = './results/figures/compare_methods'  # Nome da pasta de saída
 
-    # --- Lógica ---
-    loader, segmenter, visualizer, saver = Loader(), Segmenter(canny_threshold1=50, canny_threshold2=150), Visualizer(), Saver(OUTPUT_DIR)
-
-    image_files = [f for f in os.listdir(INPUT_DIR) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
+    SEGMENTER_CONFIG = {'canny_threshold1': 50, 'canny_threshold2': 150}
 
+    METRICS_MODE = edge_metrics     # False: mapas de bordas e figura de todas as imagens
+    FIGURE_SAMPLES_PER_DOSE = 2     # Imagens por dose com mapas e figura salvos (modo de métricas)
 
-    for filename in image_files:
-        image_path = os.path.join(INPUT_DIR, filename)
+    # Dicionário mapeando a dose para um padrão de nome de arquivo (modo de métricas)
+    DOSE_PATTERNS = DEFAULT_DOSE_PATTERNS
 
-        original_image = loader.load_grayscale(image_path)
-        if original_image is None: continue
+    # --- Lógica ---
+    visualizer, saver = Visualizer(), Saver(OUTPUT_DIR)
 
-        # 1. Obter todos os resultados de detecção de borda
-        edge_results = segmenter.detect_all_edges(original_image)
+    def save(task, edge_results):
+        # 1. Os resultados de detecção de borda chegam do processo de trabalho
+        if edge_results is None:
+            return None
+        metrics_result = edge_results.pop('metricas', None)
+        if 'original' not in edge_results:
+            return metrics_result
+        original_image = edge_results.pop('original')
 
         # 2. Salvar cada imagem de resultado separadamente
-        base_name = os.path.splitext(filename)[0]
+        base_name = os.path.splitext(os.path.basename(task[1]))[0]
         for algo_name, result_image in edge_results.items():
             # A classe Saver já adiciona o OUTPUT_DIR, então passamos apenas o nome do arquivo
             saver.save_image(result_image, f"{base_name}_{algo_name}.png")
@@ -168,157 +752,209 @@ def run_comparison_pipeline():
             save_path=comparison_save_path, 
             show_plot=True
         )
+        return metrics_result if metrics_result is not None else True
+
+    if not METRICS_MODE:
+        image_files = [f for f in os.listdir(INPUT_DIR) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
+        tasks = [(None, os.path.join(INPUT_DIR, filename)) for filename in image_files]
+        BatchExecutor(parallel, metrics=metrics).run(partial(_edge_comparison_task, segmenter_config=SEGMENTER_CONFIG),
+                                                     tasks, stages=EDGE_COMPARISON_STAGES,
+                                                     shared_output=EDGE_COMPARISON_OUTPUT, consume=save)
+        print("Pipeline de Comparação de Algoritmos concluída.")
+        return
+
+    tasks, figure_paths = [], set()
+    for dose, pattern in DOSE_PATTERNS.items():
+        image_paths = _find_images(INPUT_DIR, pattern)
+        if not image_paths:
+            print(f"  Aviso: Nenhuma imagem encontrada para a dose '{dose}' com o padrão '{pattern}'")
+            continue
+        print(f"  Encontradas {len(image_paths)} imagens para a dose: {dose}")
+        tasks.extend((dose, image_path) for image_path in image_paths)
+        # Amostra espaçada ao longo da lista ordenada (a mesma a cada execução)
+        num_samples = min(FIGURE_SAMPLES_PER_DOSE, len(image_paths))
+        if num_samples:
+            figure_paths.update(image_paths[int(index)] for index in np.linspace(0, len(image_paths) - 1, num_samples))
+
+    started = time.time()
+    executor = BatchExecutor(parallel, metrics=metrics)
+    task_results = executor.run(partial(_edge_metrics_task, segmenter_config=SEGMENTER_CONFIG,
+                                        figure_paths=frozenset(figure_paths)),
+                                tasks, stages=EDGE_METRICS_STAGES, shared_output=EDGE_COMPARISON_OUTPUT, consume=save)
+    _save_run_profile(OUTPUT_DIR, 'compare-edges', executor, len(tasks), started)
+
+    tables = edge_comparison_tables(_task_results(tasks, task_results))
+    df_individual, df_detectors = tables['individuais'], tables['detectores']
+    if df_individual.empty:
+        print("Nenhuma imagem foi processada. Encerrando pipeline.")
+        return
 
-        # Opcional: break para rodar para apenas uma imagem
-        # break
+    saver.save_dataframe(df_individual, "metricas_bordas_por_arquivo.csv")
+    saver.save_dataframe(aggregate_by_dose(df_individual), "metricas_bordas_agregadas_por_dose.csv")
+    saver.save_dataframe(df_detectors, "metricas_bordas_por_detector.csv")
 
+    print("\n--- Detectores por Dose (Média) ---")
+    print(df_detectors.to_string(index=False))
+    print(f"  Figuras salvas para {len(figure_paths)} de {len(tasks)} imagens.")
     print("Pipeline de Comparação de Algoritmos concluída.")
 
-def run_preprocessing_task_pipeline():
+def run_preprocessing_task_pipeline(parallel=None, metrics=None):
     # --- Configuração ---
     INPUT_DIR = './data/raw'
     OUTPUT_DIR = './data/processed/extended_images'
     TARGET_SIZE = 512
 
     # --- Inicialização dos Objetos ---
-    loader = Loader()
-    preprocessor = ImagePreprocessor(target_size=TARGET_SIZE)
-    saver = Saver(output_directory=OUTPUT_DIR)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    executor = BatchExecutor(parallel, metrics=metrics)
 
     # --- Processamento ---
-    image_files = [f for f in os.listdir(INPUT_DIR) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
+    image_files = sorted(f for f in os.listdir(INPUT_DIR) if f.lower().endswith(('.png', '.jpg', '.jpeg')))
+    tasks = [(None, os.path.join(INPUT_DIR, filename)) for filename in image_files]
 
-    for filename in image_files:
-        print(f"Processando: {filename}")
-        image_path = os.path.join(INPUT_DIR, filename)
+    final_sizes = executor.run(partial(_preprocess_task, output_dir=OUTPUT_DIR, target_size=TARGET_SIZE), tasks,
+                               stages=PREPROCESS_STAGES)
 
-        # 1. Carrega a imagem colorida
-        original_image = loader.load_color(image_path)
-        if original_image is None:
+    for filename, final_size in zip(image_files, final_sizes):
+        if final_size is None:
             continue
-
-        # 2. Usa o preprocessor para normalizar a imagem
-        processed_image = preprocessor.normalize_size_with_blur_padding(original_image)
-        
-        # 3. Salva a imagem resultante
-        saver.save_image(processed_image, filename)
-        
-        print(f'Tamanho final da imagem {filename}: {processed_image.shape[1]}x{processed_image.shape[0]}')
+        print(f'Tamanho final da imagem {filename}: {final_size[0]}x{final_size[1]}')
 
     print("\nPré-processamento de imagens concluído.")
 
-def run_skeleton_length_analysis_pipeline():
+def run_skeleton_length_analysis_pipeline(shard=None, parallel=None, metrics=None, from_raw=False, save_processed=False,
+                                          reject_quality=False, level=None):
+    preprocess = _fused_preprocess(from_raw, save_processed, level)
+    _run_plan(_skeleton_length_plan(shard, preprocess, reject_quality), parallel, metrics)
+
+def _skeleton_length_plan(shard=None, preprocess=None, reject_quality=False):
+    """Plano da pipeline `skeleton-length` (ver `_run_plan`)."""
     # --- Configuração ---
     INPUT_DIR = './data/processed/extended_images'  # Diretório principal com todas as imagens
-    OUTPUT_DIR = './results/figures/skeleton_length/'  # Nome da pasta de saída para os gráficos
+    OUTPUT_DIR = SKELETON_LENGTH_OUTPUT_DIR  # Nome da pasta de saída para os gráficos
 
     # Dicionário mapeando a dose para um padrão de nome de arquivo
-    DOSE_PATTERNS = {
-        'Sem Irradiar': '*sample_segmentation*.png',
-        '0.4 Gy': '*0,4 Gy*.png',
-        '0.7 Gy': '*0,7Gy*.png',
-        '1.0 Gy': '*1Gy*.png'
-    }
+    DOSE_PATTERNS = DEFAULT_DOSE_PATTERNS
 
     # Metadados: Fator de conversão (nm por pixel) baseado na largura da imagem
-    CONVERSION_FACTORS = {
-        256: 11.72,
-        258: 11.63,
-        512: 5.86,
-        514: 5.79,
-        1024: 2.93
-    }
+    CONVERSION_FACTORS = DEFAULT_CONVERSION_FACTORS
+
+    QUALITY_CONFIG = _quality_gate(reject_quality)  # None desativa o controle de qualidade
+
+    # 'thinning' (exato) ou as estimativas rápidas 'width' / 'perimeter' (sem thinning,
+    # fatores provisórios, ver feature_extractor.LENGTH_CALIBRATION)
+    LENGTH_METHOD = 'thinning'
+
+    # Imagens com lado até este valor são processadas em lotes de atlas (None desativa)
+    ATLAS_MAX_SIDE = 300
     
-    # --- Inicialização dos Objetos ---
-    loader = Loader()
-    analyzer = Analyzer()
-    visualizer = Visualizer()
+    # --- Inicialização ---
+    if preprocess is not None:
+        INPUT_DIR = preprocess['input_dir']
     
     # --- Processamento ---
-    all_results = []
+    tasks = []
 
     for dose, pattern in DOSE_PATTERNS.items():
         # Usa glob para encontrar todos os arquivos que correspondem ao padrão no diretório de entrada
-        image_paths = glob.glob(os.path.join(INPUT_DIR, pattern))
+        image_paths = select_shard(_find_images(INPUT_DIR, pattern), shard)
         print(f"Processando amostra da dose: {dose}...")
+        tasks.extend((dose, image_path) for image_path in image_paths)
+
+    def finish(task_results, executor, started):
+        _save_run_profile(OUTPUT_DIR, 'skeleton-length', executor, len(tasks), started, shard)
+        tables = skeleton_length_tables(_task_results(tasks, task_results))
+        _report_quality(tables['qualidade'])
+
+        # --- Relatório Final ---
+        if shard is not None:
+            save_partial_results(OUTPUT_DIR, 'skeleton-length', shard, tables, doses=DOSE_PATTERNS.keys())
+            return
+
+        _save_quality_table(tables['qualidade'], OUTPUT_DIR)
+
+        if tables['individuais'].empty:
+            print("\nNenhuma imagem foi processada com sucesso.")
+            return
+
+        _finalize_skeleton_length(tables['individuais'].to_dict('records'), OUTPUT_DIR)
+
+    # Executa a pipeline de quantificação em cada imagem (em paralelo, se possível)
+    # (no modo fundido as imagens são normalizadas para FUSED_TARGET_SIZE, sem atlas)
+    stages = SKELETON_LENGTH_STAGES if LENGTH_METHOD == 'thinning' else FAST_SKELETON_LENGTH_STAGES
+    return {
+        'name': 'skeleton-length',
+        'tasks': tasks,
+        'preprocess': preprocess,
+        'stages': _task_stages(stages, preprocess),
+        'compute': partial(_skeleton_length, conversion_factors=CONVERSION_FACTORS, quality_config=QUALITY_CONFIG,
+                           length_method=LENGTH_METHOD),
+        'batch': partial(_skeleton_length_batch_task, conversion_factors=CONVERSION_FACTORS,
+                         quality_config=QUALITY_CONFIG, length_method=LENGTH_METHOD),
+        'atlas_max_side': ATLAS_MAX_SIDE if preprocess is None else None,
+        'lazy': LENGTH_METHOD == 'thinning',
+        'finish': finish
+    }
 
-        for image_path in image_paths:
-            image = loader.load_grayscale(image_path)
-            if image is None: continue
-
-            # Determina o fator de conversão a partir da largura da imagem
-            width = image.shape[1]
-            conversion_factor = CONVERSION_FACTORS.get(width)
-            if conversion_factor is None:
-                print(f"  ERRO: Fator de conversão não encontrado para a resolução {width}px. Pulando dose.")
-                continue
-
-            # Executa a nova pipeline de quantificação, passando o fator de conversão
-            results = analyzer.run_skeleton_quantification_pipeline(image, conversion_factor)
-            
-            all_results.append({
-                'Dose': dose,
-                'Comprimento Esquelético': results['comprimento_esqueletico_nm']
-            })
-    
-    # --- Relatório Final ---
-    if not all_results:
-        print("\nNenhuma imagem foi processada com sucesso.")
-        return
-
+def _finalize_skeleton_length(all_results, output_dir):
+    """Exibe os comprimentos por imagem e gera o gráfico de comprimento vs. dose."""
     print("\n--- Resultados Numéricos Finais ---")
     for r in all_results:
         print(f"Dose: {r['Dose']}, Comprimento Esquelético: {r['Comprimento Esquelético']:.2f} nm")
 
     # Gera o gráfico final
-    visualizer.plot_skeleton_length_vs_dose(all_results, output_dir=OUTPUT_DIR)
+    visualizer = Visualizer()
+    visualizer.plot_skeleton_length_vs_dose(all_results, output_dir=output_dir)
+
+def run_visualization_per_dose_pipeline(parallel=None, metrics=None):
+    _run_plan(_visualization_per_dose_plan(), parallel, metrics)
 
-def run_visualization_per_dose_pipeline():
+def _visualization_per_dose_plan(shard=None, preprocess=None, reject_quality=False):
+    """
+    Plano da pipeline `visualization-per-dose` (ver `_run_plan`). Ela só exibe os
+    gráficos e não grava tabelas, de modo que não há resultados parciais a combinar:
+    com `shard` (no comando `run`), exibe apenas a fatia de imagens do nó. O controle
+    de qualidade não é aplicado (`reject_quality` é ignorado).
+    """
     # --- Configuração ---
     INPUT_DIR = './data/processed/extended_images'  # Diretório principal com todas as imagens
 
     # Dicionário mapeando a dose para um padrão de nome de arquivo
-    DOSE_PATTERNS = {
-        'Sem Irradiar': '*sample_segmentation*.png',
-        '0.4 Gy': '*0,4 Gy*.png',
-        '0.7 Gy': '*0,7Gy*.png',
-        '1.0 Gy': '*1Gy*.png'
-    }
+    DOSE_PATTERNS = DEFAULT_DOSE_PATTERNS
 
     ANALYZER_CONFIG = {
         'segmenter': {'canny_threshold1': 100, 'canny_threshold2': 200},
         'extractor': {'circularity_threshold': 0.8}
     }
 
-    # --- Inicialização dos Objetos ---
-    loader = Loader()
-    analyzer = Analyzer(config=ANALYZER_CONFIG)
-    visualizer = Visualizer()
-    
-    # --- Processamento e Visualização ---
-    all_results = []
+    # --- Lógica ---
+    if preprocess is not None:
+        INPUT_DIR = preprocess['input_dir']
+
+    # --- Processamento ---
+    tasks = []
 
     # Itera sobre cada dose e seu padrão
     for dose, pattern in DOSE_PATTERNS.items():
         # Usa glob para encontrar todos os arquivos que correspondem ao padrão no diretório de entrada
-        image_paths = glob.glob(os.path.join(INPUT_DIR, pattern))
+        image_paths = select_shard(sorted(glob.glob(os.path.join(INPUT_DIR, pattern))), shard)
         
         if not image_paths:
             print(f"  Aviso: Nenhuma imagem encontrada para a dose '{dose}' com o padrão '{pattern}'")
             continue
             
         print(f"  Encontradas {len(image_paths)} imagens para a dose: {dose}")
+        tasks.extend((dose, image_path) for image_path in image_paths)
 
-        # Itera sobre cada imagem encontrada para a dose atual
-        for image_path in image_paths:
+    def finish(task_results, executor, started):
+        visualizer = Visualizer()
+        all_results = []
 
-            image = loader.load_grayscale(image_path)
-            if image is None:
+        # --- Visualização ---
+        for (dose, _), results in zip(tasks, task_results):
+            if results is None:
                 continue
 
-            # A classe Analyzer já faz todo o processamento e retorna tudo o que precisamos
-            results = analyzer.process(image)
-            
             # Adiciona a informação da dose e armazena
             current_stats = results["statistics"]
             current_stats['Dose'] = dose
@@ -331,150 +967,778 @@ def run_visualization_per_dose_pipeline():
                 title_prefix=dose
             )
 
-    # --- Relatório Final no Console ---
-    if not all_results:
-        print("\nNenhuma imagem foi processada com sucesso.")
-        return
+        # --- Relatório Final no Console ---
+        if not all_results:
+            print("\nNenhuma imagem foi processada com sucesso.")
+            return
+
+        print("\n--- Resultados Numéricos Finais ---")
+        for result in all_results:
+            print(f"Dose: {result['Dose']}")
+            print(f"  Número de fragmentos de DNA detectados: {result['Num DNA']}")
+            print(f"  Soma total dos perímetros de DNA: {result['Perímetro DNA']:.2f}")
+            print(f"  Número de fragmentos de RNA detectados: {result['Num RNA']}")
+            print(f"  Soma total dos perímetros de RNA: {result['Perímetro RNA']:.2f}\n")
+
+    return {
+        'name': 'visualization-per-dose',
+        'tasks': tasks,
+        'preprocess': preprocess,
+        'stages': _task_stages(CONTOUR_STAGES, preprocess),
+        'compute': partial(_classified_images, analyzer_config=ANALYZER_CONFIG),
+        'finish': finish
+    }
 
-    print("\n--- Resultados Numéricos Finais ---")
-    for result in all_results:
-        print(f"Dose: {result['Dose']}")
-        print(f"  Número de fragmentos de DNA detectados: {result['Num DNA']}")
-        print(f"  Soma total dos perímetros de DNA: {result['Perímetro DNA']:.2f}")
-        print(f"  Número de fragmentos de RNA detectados: {result['Num RNA']}")
-        print(f"  Soma total dos perímetros de RNA: {result['Perímetro RNA']:.2f}\n")
-
-def run_analysis_pipeline():
+def run_analysis_pipeline(shard=None, parallel=None, metrics=None, from_raw=False, save_processed=False,
+                          reject_quality=False, level=None):
+    preprocess = _fused_preprocess(from_raw, save_processed, level)
+    _run_plan(_analysis_plan(shard, preprocess, reject_quality), parallel, metrics)
+
+def _analysis_plan(shard=None, preprocess=None, reject_quality=False):
+    """Plano da pipeline `analysis` (ver `_run_plan`)."""
     # --- Configuração ---
     INPUT_DIR = './data/processed/extended_images'  # Diretório de entrada
-    OUTPUT_DIR = './results/statistics/perimeters'  # Nome da pasta de saída
+    OUTPUT_DIR = ANALYSIS_OUTPUT_DIR  # Nome da pasta de saída
 
     ANALYZER_CONFIG = {
         'segmenter': {'canny_threshold1': 100, 'canny_threshold2': 200},
         'extractor': {'circularity_threshold': 0.8}
     }
 
-    # --- Inicialização dos Objetos ---
-    loader = Loader()
-    analyzer = Analyzer(config=ANALYZER_CONFIG)
-    saver = Saver(output_directory=OUTPUT_DIR)
-    stats_calculator = StatsCalculator()
+    QUALITY_CONFIG = _quality_gate(reject_quality)  # None desativa o controle de qualidade
+
+    # --- Inicialização ---
+    if preprocess is not None:
+        INPUT_DIR = preprocess['input_dir']
 
     # --- Processamento ---
-    image_files = [f for f in os.listdir(INPUT_DIR) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-    all_stats = []
+    image_files = sorted(f for f in os.listdir(INPUT_DIR)
+                         if f.lower().endswith(('.png', '.jpg', '.jpeg') + HEIGHT_MAP_EXTENSIONS))
+    image_files = select_shard(image_files, shard)
+    print(f"Processando {len(image_files)} imagens...")
 
-    for filename in image_files:
-        print(f"Processando {filename}...")
-        image_path = os.path.join(INPUT_DIR, filename)
+    tasks = [(None, os.path.join(INPUT_DIR, filename)) for filename in image_files]
 
-        image = loader.load_grayscale(image_path)
-        if image is None:
-            continue
+    def finish(task_results, executor, started):
+        _save_run_profile(OUTPUT_DIR, 'analysis', executor, len(tasks), started, shard)
 
-        results = analyzer.process(image)
-        
-        stats = results["statistics"]
-        stats['Imagem'] = filename
-        all_stats.append(stats)
-        
-        # Opcional: Salvar imagens individuais de DNA/RNA pode ser feito aqui se necessário
-        # base_name = os.path.splitext(filename)[0]
-        # saver.save_image(results["dna_image"], f"{base_name}_dna.png")
-        # saver.save_image(results["rna_image"], f"{base_name}_rna.png")
-
-    # --- Finalização e Geração de Relatórios ---
-    if not all_stats:
-        print("Nenhuma imagem processada. Encerrando.")
-        return
+        # --- Finalização e Geração de Relatórios ---
+        # 1. Criar o DataFrame de resultados por imagem (como antes)
+        tables = analysis_tables(_task_results(tasks, task_results))
+        df_results = tables['individuais']
+        _report_quality(tables['qualidade'])
+
+        if shard is not None:
+            save_partial_results(OUTPUT_DIR, 'analysis', shard, tables)
+            return
+
+        _save_quality_table(tables['qualidade'], OUTPUT_DIR)
+
+        if df_results.empty:
+            print("Nenhuma imagem processada. Encerrando.")
+            return
+
+        _finalize_analysis(df_results, OUTPUT_DIR)
+
+    return {
+        'name': 'analysis',
+        'tasks': tasks,
+        'preprocess': preprocess,
+        'stages': _task_stages(CONTOUR_STAGES, preprocess),
+        'compute': partial(_contour_statistics, analyzer_config=ANALYZER_CONFIG, quality_config=QUALITY_CONFIG),
+        'finish': finish
+    }
+
+def _finalize_analysis(df_results, output_dir):
+    """Salva a tabela por imagem e as estatísticas descritivas gerais."""
+    saver = Saver(output_directory=output_dir)
 
-    # 1. Criar e salvar o DataFrame de resultados por imagem (como antes)
-    df_results = pd.DataFrame(all_stats)
-    df_results = df_results[['Imagem', 'Num DNA', 'Perímetro DNA', 'Num RNA', 'Perímetro RNA']]
     saver.save_dataframe(df_results, "resultados_perimetros.csv")
 
     # 2. Calcular e salvar as estatísticas descritivas gerais
     print("\nCalculando estatísticas descritivas gerais...")
-    df_descriptive_stats = stats_calculator.calculate_descriptive_stats(df_results)
+    df_descriptive_stats = analysis_descriptive_stats(df_results)
     saver.save_dataframe(df_descriptive_stats, "estatisticas_descritivas_gerais.csv")
     
     print("\nAnálise e geração de estatísticas concluídas com sucesso.")
 
-def run_full_skeleton_analysis_pipeline():
+def run_full_skeleton_analysis_pipeline(shard=None, parallel=None, metrics=None, from_raw=False, save_processed=False,
+                                        reject_quality=False, level=None):
     """
     Pipeline completa que extrai o comprimento de cada molécula individualmente,
     calcula estatísticas descritivas e gera gráficos de distribuição.
+
+    Args:
+        shard (tuple): Tupla (i, N) para processar apenas a fatia i de N das imagens
+            e salvar resultados parciais (combinados depois com `merge`).
+        parallel (ParallelConfig): Processos e threads por processo (None = automático).
+        metrics (RunMetrics): Métricas de progresso exportadas durante a execução.
+        from_raw (bool): Modo fundido: lê as imagens brutas e as normaliza em memória.
+        save_processed (bool): No modo fundido, também salva as imagens normalizadas.
+        reject_quality (bool): Descarta das estatísticas as imagens reprovadas no controle
+            de qualidade (por padrão, elas só são sinalizadas).
+        level (dict): No modo fundido, parâmetros do nivelamento de fundo (opção --level);
+            None usa FUSED_LEVELING.
     """
+    preprocess = _fused_preprocess(from_raw, save_processed, level)
+    _run_plan(_full_skeleton_analysis_plan(shard, preprocess, reject_quality), parallel, metrics)
+
+def _full_skeleton_analysis_plan(shard=None, preprocess=None, reject_quality=False):
+    """Plano da pipeline `full-skeleton-analysis` (ver `_run_plan`)."""
     print("Executando a pipeline de Análise Estatística de Esqueletos...")
     # --- Configuração ---
     INPUT_DIR = './data/processed/extended_images'  # Diretório principal com todas as imagens
-    OUTPUT_DIR = './results/full_skeleton_analysis'
-    DOSE_PATTERNS = {
-        'Sem Irradiar': '*sample_segmentation*.png', '0.4 Gy': '*0,4 Gy*.png',
-        '0.7 Gy': '*0,7Gy*.png', '1.0 Gy': '*1Gy*.png'
-    }
+    OUTPUT_DIR = FULL_SKELETON_OUTPUT_DIR
+    DOSE_PATTERNS = DEFAULT_DOSE_PATTERNS
     CONVERSION_FACTORS = { 512: 5.86, 1024: 2.93 } # nm/pixel
+    QUALITY_CONFIG = _quality_gate(reject_quality)  # None desativa o controle de qualidade
+    # 'thinning' (exato) ou as estimativas rápidas 'width' / 'perimeter' (sem thinning,
+    # fatores provisórios, ver feature_extractor.LENGTH_CALIBRATION)
+    LENGTH_METHOD = 'thinning'
+    # Topologia do esqueleto de cada molécula (extremidades, ramificações, laços e comprimento
+    # geodésico); ramos terminais com até 'spur_length' pixels são podados. None desativa.
+    TOPOLOGY_CONFIG = {'spur_length': 5}
+    # Mede a geometria de cada molécula (área, circularidade, centróide e retângulo
+    # envolvente) e salva o índice de moléculas (indice_moleculas.npz) para consultas
+    MOLECULE_INDEX = True
+    # Imagens com lado até este valor são processadas em lotes de atlas (None desativa).
+    # Desativado: as imagens pequenas o bastante para o atlas (256/258 px) não têm fator
+    # de conversão em CONVERSION_FACTORS e seriam puladas de qualquer forma
+    ATLAS_MAX_SIDE = None
     
     # --- Inicialização ---
-    loader, analyzer, stats_calc, visualizer, saver = Loader(), Analyzer(), StatsCalculator(), Visualizer(), Saver(OUTPUT_DIR)
-    all_lengths = []
+    if preprocess is not None:
+        INPUT_DIR = preprocess['input_dir']
+    tasks = []
 
     for dose, pattern in DOSE_PATTERNS.items():
-        image_paths = glob.glob(os.path.join(INPUT_DIR, pattern))
+        image_paths = select_shard(_find_images(INPUT_DIR, pattern), shard)
         if not image_paths: continue
         print(f"  Processando {len(image_paths)} imagens para a dose: {dose}")
+        tasks.extend((dose, image_path) for image_path in image_paths)
+
+    # Segmenta e esqueletiza cada molécula de cada imagem (em paralelo, se possível)
+    stages = MOLECULE_STAGES if LENGTH_METHOD == 'thinning' else FAST_MOLECULE_STAGES
+    if TOPOLOGY_CONFIG is not None:
+        stages += ('topology',)
+
+    def finish(task_results, executor, started):
+        _save_run_profile(OUTPUT_DIR, 'full-skeleton-analysis', executor, len(tasks), started, shard)
+
+        tables = molecule_tables(_task_results(tasks, task_results))
+        _report_quality(tables['qualidade'])
+
+        if shard is not None:
+            save_partial_results(OUTPUT_DIR, 'full-skeleton-analysis', shard, tables, doses=DOSE_PATTERNS.keys())
+            return
+
+        _save_quality_table(tables['qualidade'], OUTPUT_DIR)
+
+        if tables['moleculas'].empty:
+            print("Nenhum comprimento de molécula foi extraído.")
+            return
+
+        _finalize_full_skeleton_analysis(tables['moleculas'], OUTPUT_DIR)
+
+    return {
+        'name': 'full-skeleton-analysis',
+        'tasks': tasks,
+        'preprocess': preprocess,
+        'stages': _task_stages(stages, preprocess),
+        'compute': partial(_molecule_lengths, conversion_factors=CONVERSION_FACTORS, quality_config=QUALITY_CONFIG,
+                           length_method=LENGTH_METHOD, topology_config=TOPOLOGY_CONFIG, geometry=MOLECULE_INDEX),
+        'batch': partial(_molecule_lengths_batch_task, conversion_factors=CONVERSION_FACTORS,
+                         quality_config=QUALITY_CONFIG, length_method=LENGTH_METHOD, topology_config=TOPOLOGY_CONFIG,
+                         geometry=MOLECULE_INDEX),
+        'atlas_max_side': ATLAS_MAX_SIDE if preprocess is None else None,
+        'finish': finish
+    }
 
-        for image_path in image_paths:
-            image = loader.load_grayscale(image_path)
-            if image is None: continue
-
-            conversion_factor = CONVERSION_FACTORS.get(image.shape[1])
-            if conversion_factor is None: continue
-
-            # Executa a pipeline de segmentação para obter a imagem binária
-            blurred = analyzer.preprocessor.apply_gaussian_blur(image)
-            binary_image = analyzer.segmenter.segment_with_adaptive_threshold(blurred)
-
-            # Encontra os contornos de cada molécula individual
-            contours, _ = cv2.findContours(binary_image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-            # Para cada contorno, cria uma máscara, extrai seu esqueleto e calcula o comprimento
-            for contour in contours:
-                # Ignora ruídos muito pequenos
-                if cv2.contourArea(contour) < 5: continue
-                
-                mask = np.zeros_like(binary_image)
-                cv2.drawContours(mask, [contour], -1, 255, thickness=cv2.FILLED)
-                
-                skeleton = analyzer.extractor.extract_skeleton(mask)
-                length = analyzer.extractor.calculate_skeleton_length(skeleton, conversion_factor)
-                
-                if length > 0:
-                    all_lengths.append({'Dose': dose, 'Comprimento': length})
-
-    if not all_lengths:
-        print("Nenhum comprimento de molécula foi extraído.")
-        return
+def _finalize_full_skeleton_analysis(df_lengths, output_dir):
+    """Calcula as estatísticas descritivas e inferenciais dos comprimentos e gera os gráficos."""
+    visualizer, saver = Visualizer(), Saver(output_dir)
 
     # --- Análise Estatística e Visualização ---
-    df_lengths = pd.DataFrame(all_lengths)
+    saver.save_dataframe(df_lengths, "comprimentos_por_molecula.csv")
     
-    # 1. Calcular estatísticas descritivas
-    df_stats = stats_calc.calculate_length_descriptive_stats(df_lengths)
+    # 1. Calcular as estatísticas descritivas e a análise inferencial
+    df_stats, inferential_report = length_statistics(df_lengths)
     print("\n--- Estatísticas Descritivas por Dose ---")
     print(df_stats)
     saver.save_dataframe(df_stats, "estatisticas_descritivas_comprimento.csv")
     
     # 2. Gerar e salvar gráficos de distribuição
-    visualizer.plot_length_histogram(df_lengths, output_dir=OUTPUT_DIR)
-    visualizer.plot_length_boxplot(df_lengths, output_dir=OUTPUT_DIR)
+    visualizer.plot_length_histogram(df_lengths, output_dir=output_dir)
+    visualizer.plot_length_boxplot(df_lengths, output_dir=output_dir)
 
     # 3. Gerar e salvar o gráfico de dispersão
-    visualizer.plot_mean_length_vs_dose_scatter(df_stats, output_dir=OUTPUT_DIR)
+    visualizer.plot_mean_length_vs_dose_scatter(df_stats, output_dir=output_dir)
 
-    # 4. Realizar e salvar a análise estatística inferencial
-    inferential_report = stats_calc.perform_inferential_analysis(df_lengths)
+    # 4. Salvar o relatório da análise estatística inferencial
     print("\n" + inferential_report)
     saver.save_text(inferential_report, "relatorio_analise_inferencial.txt")
+
+    # 5. Resumo da topologia dos esqueletos (linear, circular, ramificada) por dose
+    df_topology = topology_summary(df_lengths)
+    if df_topology is not None:
+        print("\n--- Topologia dos Esqueletos por Dose ---")
+        print(df_topology)
+        saver.save_dataframe(df_topology, "topologia_por_dose.csv")
+
+    # 6. Índice persistente das moléculas, quando a geometria foi medida
+    if all(column in df_lengths.columns for column in INDEX_COLUMNS):
+        MoleculeIndex.from_table(df_lengths).save(os.path.join(output_dir, MOLECULE_INDEX_FILE))
     
-    print("Pipeline de Análise Estatística de Esqueletos concluída.")
\ No newline at end of file
+    print("Pipeline de Análise Estatística de Esqueletos concluída.")
+
+# Pipelines de análise por imagem que o comando `run` executa em uma única passada
+PIPELINE_PLANS = {
+    'dose-response': _dose_response_plan,
+    'skeleton-length': _skeleton_length_plan,
+    'analysis': _analysis_plan,
+    'full-skeleton-analysis': _full_skeleton_analysis_plan,
+    'visualization-per-dose': _visualization_per_dose_plan
+}
+
+def run_pipelines(names, shard=None, parallel=None, metrics=None, from_raw=False, save_processed=False,
+                  reject_quality=False, level=None):
+    """
+    Executa várias pipelines de análise por imagem em uma única passada pelas imagens.
+
+    As tarefas das pipelines são unidas por arquivo: cada imagem é carregada (e, no modo
+    fundido, normalizada) uma única vez, e um ImageContext compartilhado entre as
+    pipelines reaproveita o controle de qualidade, o `Analyzer.process`, o desfoque e
+    o limiar adaptativo. No fim, cada pipeline grava as suas saídas de sempre (tabelas,
+    gráficos, resultados parciais com `shard`), idênticas às de uma execução isolada.
+    O modo atlas não é usado nesta passada.
+
+    Args:
+        names (list): Nomes das pipelines (chaves de PIPELINE_PLANS).
+        shard, parallel, metrics, from_raw, save_processed, reject_quality, level: Como nas
+            pipelines individuais.
+    """
+    unknown = [name for name in names if name not in PIPELINE_PLANS]
+    if unknown:
+        raise ValueError(f"Pipelines não suportadas pelo comando 'run': {', '.join(unknown)}. "
+                         f"Disponíveis: {', '.join(PIPELINE_PLANS)}.")
+    names = list(dict.fromkeys(names))
+    preprocess = _fused_preprocess(from_raw, save_processed, level)
+    plans = [PIPELINE_PLANS[name](shard, preprocess, reject_quality) for name in names]
+
+    # União das imagens, na ordem em que aparecem nos planos (a dose é a primeira definida)
+    images = {}
+    for plan in plans:
+        for dose, image_path in plan['tasks']:
+            entry = images.setdefault(image_path, [dose, []])
+            if entry[0] is None:
+                entry[0] = dose
+            entry[1].append(plan['name'])
+    tasks = [(dose, image_path, tuple(plan_names)) for image_path, (dose, plan_names) in images.items()]
+    stages = tuple(dict.fromkeys(name for plan in plans for name in plan['stages']))
+    print(f"\nExecutando {', '.join(names)} em uma única passada por {len(tasks)} imagens...")
+
+    executor = BatchExecutor(parallel, metrics=metrics)
+    started = time.time()
+    computes = {plan['name']: plan['compute'] for plan in plans}
+    results = executor.run(partial(_multi_pipeline_task, computes=computes, preprocess=preprocess), tasks,
+                           stages=stages)
+
+    # Distribui os resultados de cada imagem entre as pipelines, na ordem das tarefas de cada uma
+    by_path = {task[1]: result for task, result in zip(tasks, results)}
+    for plan in plans:
+        plan['finish']([None if by_path[image_path] is None else by_path[image_path][plan['name']]
+                        for _, image_path in plan['tasks']], executor, started)
+
+def run_watch_pipeline():
+    """
+    Observa o diretório de imagens brutas e analisa cada nova imagem assim que ela
+    termina de ser gravada: pré-processamento, análise de contornos e comprimento
+    do esqueleto, com agregados por dose atualizados incrementalmente.
+    """
+    print("Executando a pipeline de Observação de Diretório...")
+    # --- Configuração ---
+    INPUT_DIR = './data/raw'
+    PROCESSED_DIR = './data/processed/extended_images'
+    OUTPUT_DIR = './results/watch'
+    TARGET_SIZE = 512
+    SETTLE_TIME = 2.0    # segundos sem alteração para considerar o arquivo completo
+    POLL_INTERVAL = 1.0
+    DOSE_PATTERNS = DEFAULT_DOSE_PATTERNS
+    CONVERSION_FACTORS = DEFAULT_CONVERSION_FACTORS  # nm/pixel
+    ANALYZER_CONFIG = {
+        'segmenter': {'canny_threshold1': 100, 'canny_threshold2': 200},
+        'extractor': {'circularity_threshold': 0.8}
+    }
+    INDIVIDUAL_CSV = "resultados_individuais_por_arquivo.csv"
+    ARCHIVE_CSV = "acervo_existente.csv"   # Imagens já na pasta na primeira observação (nunca analisadas)
+
+    # --- Inicialização ---
+    os.makedirs(INPUT_DIR, exist_ok=True)
+    loader, preprocessor = Loader(), ImagePreprocessor(target_size=TARGET_SIZE)
+    analyzer, saver, processed_saver = Analyzer(config=ANALYZER_CONFIG), Saver(OUTPUT_DIR), Saver(PROCESSED_DIR)
+    metric_columns = ['Num RNA', 'Perímetro RNA', 'Num DNA', 'Perímetro DNA', 'Comprimento Esquelético']
+    running_stats = IncrementalDoseStats(metric_columns)
+    individual_csv_path = os.path.join(OUTPUT_DIR, INDIVIDUAL_CSV)
+    write_header = not os.path.exists(individual_csv_path)
+
+    # O acervo presente na primeira observação nunca é analisado. Ao reiniciar, os agregados
+    # partem da tabela individual já gravada (que continua a ser estendida), e as imagens que
+    # chegaram com a observação parada (fora do acervo e da tabela) são analisadas agora
+    archive_csv_path = os.path.join(OUTPUT_DIR, ARCHIVE_CSV)
+    if not os.path.exists(archive_csv_path):
+        existing = sorted(name for name in os.listdir(INPUT_DIR) if not name.startswith('.'))
+        saver.save_dataframe(pd.DataFrame({'Arquivo': existing}), ARCHIVE_CSV)
+    skipped = set(pd.read_csv(archive_csv_path)['Arquivo'].astype(str))
+    if not write_header:
+        previous = pd.read_csv(individual_csv_path)
+        for row in previous.to_dict('records'):
+            running_stats.update(row['Dose'], row)
+        skipped.update(previous['Arquivo'].astype(str))
+        print(f"  Retomando: {len(previous)} imagem(ns) já analisada(s) em '{individual_csv_path}'.")
+    watcher = FolderWatcher(INPUT_DIR, settle_time=SETTLE_TIME, poll_interval=POLL_INTERVAL,
+                            process_existing=lambda path: os.path.basename(path) not in skipped)
+
+    def classify_dose(filename):
+        for dose, pattern in DOSE_PATTERNS.items():
+            if fnmatch.fnmatch(filename, pattern):
+                return dose
+        return None
+
+    def analyze(image_path):
+        """Linha de resultados de uma imagem, ou None se ela não puder ser lida."""
+        filename = os.path.basename(image_path)
+        original_image = loader.load_color(image_path)
+        if original_image is None:
+            return None
+
+        # 1. Pré-processamento (a imagem normalizada também vai para o acervo processado)
+        processed_image = preprocessor.normalize_size_with_blur_padding(original_image)
+        processed_saver.save_image(processed_image, filename)
+        gray_image = cv2.cvtColor(processed_image, cv2.COLOR_BGR2GRAY)
+
+        # 2. Análise de contornos (DNA/RNA)
+        row = analyzer.process(gray_image)["statistics"]
+
+        # 3. Comprimento do esqueleto
+        conversion_factor = CONVERSION_FACTORS.get(gray_image.shape[1])
+        if conversion_factor is not None:
+            quantification = analyzer.run_skeleton_quantification_pipeline(gray_image, conversion_factor)
+            row['Comprimento Esquelético'] = quantification['comprimento_esqueletico_nm']
+        else:
+            row['Comprimento Esquelético'] = np.nan
+        return row
+
+    def handle_new_files(paths):
+        nonlocal write_header
+        new_rows = []
+        for image_path in paths:
+            filename = os.path.basename(image_path)
+            dose = classify_dose(filename)
+            if dose is None:
+                print(f"  Aviso: '{filename}' não corresponde a nenhum padrão de dose. Ignorando.")
+                continue
+
+            # Uma varredura corrompida ou inesperada não pode encerrar a observação
+            row, probe = run_isolated(analyze, image_path)
+            failure = probe.get('erro')
+            if failure is not None:
+                print(f"  ERRO: '{filename}' não pôde ser analisado ({failure['motivo']}): {failure['erro']}")
+                continue
+            if row is None:
+                # Provavelmente ainda em gravação: tenta novamente mais tarde
+                if not watcher.requeue(image_path):
+                    print(f"  ERRO: '{filename}' não pôde ser lido após várias tentativas.")
+                continue
+            row['Dose'] = dose
+            row['Arquivo'] = filename
+            new_rows.append(row)
+            print(f"  {filename} ({dose}) analisado em {probe['elapsed']:.2f}s")
+
+        if not new_rows:
+            return
+
+        # --- Atualização incremental dos resultados ---
+        # Os agregados só incluem as linhas gravadas na tabela individual: se a gravação
+        # falhar, as imagens ficam fora de ambos e são analisadas de novo ao reiniciar
+        try:
+            pd.DataFrame(new_rows).to_csv(individual_csv_path, mode='a', header=write_header, index=False)
+        except OSError as error:
+            print(f"  ERRO: não foi possível gravar '{individual_csv_path}': {error}")
+            return
+        write_header = False
+        for row in new_rows:
+            running_stats.update(row['Dose'], row)
+        try:
+            saver.save_dataframe(running_stats.aggregated().reset_index(), "resultados_agregados_por_dose.csv")
+            saver.save_dataframe(
+                running_stats.descriptive('Comprimento Esquelético').reset_index(),
+                "estatisticas_descritivas_comprimento.csv"
+            )
+        except OSError as error:
+            print(f"  ERRO: não foi possível gravar os agregados em '{OUTPUT_DIR}': {error}")
+
+    print(f"  Observando '{INPUT_DIR}' (modo: {watcher.mode}). Pressione Ctrl+C para encerrar.")
+    watcher.watch(handle_new_files)
+    print("Pipeline de Observação de Diretório concluída.")
+
+def run_merge_pipeline(targets=None):
+    """
+    Combina os resultados parciais gerados com `--shard i/N` em vários nós e refaz,
+    sobre a tabela completa, as agregações, relatórios e gráficos exatamente como
+    em uma execução de nó único.
+
+    Args:
+        targets (list): Nomes das pipelines a combinar. Se vazio, combina todas as
+            que tiverem resultados parciais.
+    """
+    print("Executando a combinação de resultados parciais...")
+    # Pipeline -> (diretório de saída, tabela parcial, coluna de arquivo, finalização)
+    MERGEABLE = {
+        'dose-response': (DOSE_RESPONSE_OUTPUT_DIR, 'individuais', 'Arquivo',
+                          _finalize_dose_response),
+        'skeleton-length': (SKELETON_LENGTH_OUTPUT_DIR, 'individuais', 'Arquivo',
+                            lambda df, out: _finalize_skeleton_length(df.to_dict('records'), out)),
+        'analysis': (ANALYSIS_OUTPUT_DIR, 'individuais', 'Imagem', _finalize_analysis),
+        'full-skeleton-analysis': (FULL_SKELETON_OUTPUT_DIR, 'moleculas', 'Arquivo',
+                                   _finalize_full_skeleton_analysis)
+    }
+
+    for name in targets or []:
+        if name not in MERGEABLE:
+            print(f"Erro: A pipeline '{name}' não gera resultados parciais. Opções: {', '.join(MERGEABLE)}")
+            return
+
+    merged_any = False
+    for name in (targets or MERGEABLE):
+        output_dir, table, file_column, finalize = MERGEABLE[name]
+        try:
+            tables, doses = load_partial_results(output_dir)
+        except ValueError as e:
+            print(f"  ERRO ({name}): {e}")
+            continue
+        if tables is None:
+            if targets:
+                print(f"  Aviso: Nenhum resultado parcial encontrado para '{name}' em {output_dir}")
+            continue
+
+        if 'qualidade' in tables:
+            _save_quality_table(canonical_order(tables['qualidade'], doses, file_column), output_dir)
+
+        if table not in tables:
+            print(f"  Aviso: Os resultados parciais de '{name}' estão vazios.")
+            continue
+
+        df = canonical_order(tables[table], doses, file_column)
+        print(f"  Combinando '{name}': {len(df)} linhas de resultados parciais.")
+        finalize(df, output_dir)
+        merged_any = True
+
+    if not merged_any:
+        print("Nenhum resultado parcial foi combinado.")
+        return
+    print("Combinação de resultados parciais concluída.")
+
+def run_triage_pipeline(parallel=None, metrics=None):
+    """
+    Triagem rápida de um acervo grande: analisa cada imagem em resolução reduzida
+    para obter estatísticas aproximadas por dose e reprocessa automaticamente em
+    resolução completa apenas as imagens cuja prévia é ambígua.
+
+    Args:
+        parallel (ParallelConfig): Processos e threads por processo (None = automático).
+        metrics (RunMetrics): Métricas de progresso exportadas durante a execução.
+    """
+    print("Executando a pipeline de Triagem em Baixa Resolução...")
+    # --- Configuração ---
+    INPUT_DIR = './data/processed/extended_images'
+    OUTPUT_DIR = './results/triage'
+    REDUCTION = 4  # decodifica com cv2.IMREAD_REDUCED_GRAYSCALE_4
+    DOSE_PATTERNS = DEFAULT_DOSE_PATTERNS
+    CONVERSION_FACTORS = DEFAULT_CONVERSION_FACTORS  # nm/pixel (resolução completa)
+    ANALYZER_CONFIG = {
+        'segmenter': {'canny_threshold1': 100, 'canny_threshold2': 200},
+        'extractor': {'circularity_threshold': 0.8}
+    }
+    # Critérios para reprocessar uma imagem em resolução completa
+    TRIAGE_RULES = {
+        'circularity_margin': 0.1,       # |circularidade - limiar| abaixo disso é ambígua
+        'max_ambiguous_fraction': 0.25,  # fração máxima de contornos ambíguos
+        'min_contours': 3,               # menos contornos que isso: imagem esparsa
+        'max_contours_per_megapixel': 400  # mais contornos que isso: imagem densa
+    }
+
+    # --- Inicialização ---
+    executor = BatchExecutor(parallel, metrics=metrics)
+    saver = Saver(OUTPUT_DIR)
+    started = time.time()
+    tasks = []
+
+    for dose, pattern in DOSE_PATTERNS.items():
+        image_paths = sorted(glob.glob(os.path.join(INPUT_DIR, pattern)))
+        if not image_paths: continue
+        print(f"  Encontradas {len(image_paths)} imagens para a dose: {dose}")
+        tasks.extend((dose, image_path) for image_path in image_paths)
+
+    # --- Etapa 1: prévia em resolução reduzida ---
+    print(f"\nEtapa 1: prévia com redução 1/{REDUCTION}...")
+    rows = executor.run(partial(_triage_preview_task, reduction=REDUCTION, conversion_factors=CONVERSION_FACTORS,
+                                analyzer_config=ANALYZER_CONFIG, rules=TRIAGE_RULES), tasks)
+
+    # --- Etapa 2: resolução completa apenas para as prévias ambíguas ---
+    flagged = [i for i, row in enumerate(rows) if row is not None and row['Ambígua']]
+    print(f"\nEtapa 2: {len(flagged)} de {len(tasks)} imagens ambíguas serão reprocessadas em resolução completa...")
+    if flagged:
+        full_rows = executor.run(partial(_triage_full_task, conversion_factors=CONVERSION_FACTORS,
+                                         analyzer_config=ANALYZER_CONFIG), [tasks[i] for i in flagged])
+        for i, full_row in zip(flagged, full_rows):
+            if full_row is None: continue
+            full_row['Ambígua'] = True
+            full_row['Motivo'] = rows[i]['Motivo']
+            rows[i] = full_row
+
+    results = []
+    for (dose, image_path), row in zip(tasks, rows):
+        if row is None: continue
+        row['Dose'] = dose
+        row['Arquivo'] = os.path.basename(image_path)
+        results.append(row)
+
+    if not results:
+        print("Nenhuma imagem foi processada. Encerrando pipeline.")
+        return
+
+    # --- Resultados ---
+    df_triage = pd.DataFrame(results)
+    df_triage = df_triage[['Dose', 'Arquivo', 'Resolução', 'Ambígua', 'Motivo', 'Num DNA', 'Perímetro DNA',
+                           'Num RNA', 'Perímetro RNA', 'Comprimento Esquelético']]
+    saver.save_dataframe(df_triage, "triagem_por_arquivo.csv")
+
+    metric_cols = ['Num DNA', 'Perímetro DNA', 'Num RNA', 'Perímetro RNA', 'Comprimento Esquelético']
+    df_aggregated = df_triage.groupby('Dose')[metric_cols].agg(['mean', 'std']).round(2)
+    saver.save_dataframe(df_aggregated.reset_index(), "triagem_agregada_por_dose.csv")
+
+    print("\n--- Visão Geral por Dose (Média, prévia + reprocessadas) ---")
+    print(df_aggregated.xs('mean', axis=1, level=1))
+
+    _save_run_profile(OUTPUT_DIR, 'triage', executor, len(tasks), started)
+    print("Pipeline de Triagem em Baixa Resolução concluída.")
+
+def run_length_calibration_pipeline():
+    """
+    Calibra as estimativas rápidas de comprimento ('width' e 'perimeter') contra o
+    comprimento por thinning, molécula a molécula, e mede a aceleração obtida.
+    O fator calculado pode ser usado em `FeatureExtractor(length_calibration=...)`
+    ou em `feature_extractor.LENGTH_CALIBRATION`.
+    """
+    print("Executando a calibração das estimativas rápidas de comprimento...")
+    # --- Configuração ---
+    INPUT_DIR = './data/processed/extended_images'
+    OUTPUT_DIR = './results/length_calibration'
+    METHODS = ('width', 'perimeter')
+
+    # --- Inicialização ---
+    loader, analyzer, saver = Loader(), Analyzer(), Saver(OUTPUT_DIR)
+    extractor = analyzer.extractor
+    image_files = sorted(f for f in os.listdir(INPUT_DIR) if f.lower().endswith(('.png', '.jpg', '.jpeg')))
+    paired = {method: ([], []) for method in METHODS}
+    timings = {'thinning': 0.0, **{method: 0.0 for method in METHODS}}
+    rows = []
+
+    for filename in image_files:
+        image = loader.load_grayscale(os.path.join(INPUT_DIR, filename))
+        if image is None: continue
+        blurred = analyzer.preprocessor.apply_gaussian_blur(image)
+        binary_image = analyzer.segmenter.segment_with_adaptive_threshold(blurred)
+        contours, _ = cv2.findContours(binary_image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        # Tempo de cada método sobre a mesma imagem binária
+        start = time.perf_counter()
+        for contour in contours:
+            if cv2.contourArea(contour) < MIN_MOLECULE_AREA: continue
+            mask = np.zeros_like(binary_image)
+            cv2.drawContours(mask, [contour], -1, 255, thickness=cv2.FILLED)
+            extractor.extract_skeleton(mask)
+        timings['thinning'] += time.perf_counter() - start
+        for method in METHODS:
+            start = time.perf_counter()
+            extractor.estimate_molecule_lengths(binary_image, contours, method=method)
+            timings[method] += time.perf_counter() - start
+
+            thinning, estimates = extractor.paired_molecule_lengths(binary_image, contours, method)
+            paired[method][0].extend(thinning)
+            paired[method][1].extend(estimates)
+            rows.extend({'Imagem': filename, 'Método': method, 'Thinning (px)': t, 'Estimativa (px)': e}
+                        for t, e in zip(thinning, estimates))
+
+    if not rows:
+        print("Nenhuma molécula encontrada para a calibração.")
+        return
+
+    report = {}
+    for method in METHODS:
+        summary = extractor.calibrate_length_estimator(*paired[method])
+        summary['fator_atual'] = extractor.length_calibration[method]
+        summary['aceleracao'] = round(timings['thinning'] / timings[method], 1) if timings[method] > 0 else None
+        report[method] = summary
+        print(f"  {method}: fator {summary['fator']} (atual: {summary['fator_atual']}), "
+              f"erro relativo mediano {summary['erro_relativo_mediano']:.1%}, p95 {summary['erro_relativo_p95']:.1%}, "
+              f"{summary['aceleracao']}x mais rápido que o thinning ({summary['moleculas']} moléculas)")
+
+    saver.save_dataframe(pd.DataFrame(rows), "comprimentos_pareados.csv")
+    saver.save_json(report, "calibracao_comprimento.json")
+    print("Calibração das estimativas de comprimento concluída.")
+
+
+def run_thinning_calibration_pipeline():
+    """
+    Mede o tempo e o erro de cada backend de thinning disponível nas imagens binárias
+    das pipelines e salva o mais rápido dentro da tolerância, usado a partir daí pelo
+    modo 'auto' (ver thinning.py).
+    """
+    print("Executando a calibração dos backends de thinning...")
+    # --- Configuração ---
+    INPUT_DIR = './data/processed/extended_images'
+    OUTPUT_DIR, CALIBRATION_FILENAME = os.path.split(THINNING_CALIBRATION_FILE)
+    TOLERANCE = THINNING_TOLERANCE  # Erro relativo máximo do comprimento por imagem
+    MAX_IMAGES = 20                 # Imagens de amostra usadas na medida
+    # Kernels de limpeza das imagens binárias esqueletizadas pelas pipelines
+    # ((1, 1) em skeleton-length, (2, 2) na topologia e nas máscaras de moléculas)
+    CLEANUP_KERNELS = ((1, 1), (2, 2))
+
+    # --- Inicialização ---
+    loader, saver = Loader(), Saver(OUTPUT_DIR)
+    image_files = sorted(f for f in os.listdir(INPUT_DIR) if f.lower().endswith(('.png', '.jpg', '.jpeg')))
+    binary_images = []
+    for filename in image_files[:MAX_IMAGES]:
+        image = loader.load_grayscale(os.path.join(INPUT_DIR, filename))
+        if image is None: continue
+        context = ImageContext(image)
+        binary_images.extend(context.binary(kernel) for kernel in CLEANUP_KERNELS)
+
+    if not binary_images:
+        print("Nenhuma imagem encontrada para a calibração.")
+        return
+
+    print(f"  Backends disponíveis: {', '.join(available_thinning_backends())}")
+    report = calibrate_thinning(binary_images, tolerance=TOLERANCE)
+    for name, row in report['backends'].items():
+        print(f"  {name}: {row['tempo_s']:.3f} s, erro relativo máximo {row['erro_max']:.1%} "
+              f"(mediano {row['erro_mediano']:.1%})" + (", idêntico à referência" if row['identico'] else ""))
+    print(f"  Backend escolhido (tolerância {TOLERANCE:.1%}): {report['backend']}")
+
+    saver.save_dataframe(pd.DataFrame([{'Backend': name, **row} for name, row in report['backends'].items()]),
+                         "backends_thinning.csv")
+    saver.save_json(report, CALIBRATION_FILENAME)
+    print("Calibração dos backends de thinning concluída.")
+
+
+def run_threshold_benchmark_pipeline():
+    """
+    Compara os métodos de limiar local (local_threshold.py) com o limiar gaussiano do
+    OpenCV em janelas de tamanhos crescentes: tempo por pixel e concordância da imagem
+    binária com a referência.
+    """
+    print("Executando o benchmark dos métodos de limiar local...")
+    # --- Configuração ---
+    INPUT_DIR = './data/processed/extended_images'
+    OUTPUT_DIR = './results/threshold_benchmark'
+    MAX_IMAGES = 20                     # Imagens de amostra usadas na medida
+    BLOCK_SIZES = (11, 51, 101, 151)    # Janelas do limiar (11 = padrão das pipelines)
+    REPEATS = 3                         # Repetições da medida de tempo (vale a melhor)
+
+    # --- Inicialização ---
+    loader, saver, preprocessor = Loader(), Saver(OUTPUT_DIR), ImagePreprocessor()
+    image_files = sorted(f for f in os.listdir(INPUT_DIR) if f.lower().endswith(('.png', '.jpg', '.jpeg')))
+    images = []
+    for filename in image_files[:MAX_IMAGES]:
+        image = loader.load_grayscale(os.path.join(INPUT_DIR, filename))
+        if image is None: continue
+        # Mesmo desfoque aplicado antes do limiar nas pipelines
+        images.append(preprocessor.apply_gaussian_blur(image))
+
+    if not images:
+        print("Nenhuma imagem encontrada para o benchmark.")
+        return
+
+    rows = benchmark_local_thresholds(images, BLOCK_SIZES, repeats=REPEATS)
+    for row in rows:
+        print(f"  janela {row['janela']:>3} | {row['metodo']:<16} {row['ns_por_pixel']:7.2f} ns/pixel, "
+              f"concordância com '{DEFAULT_THRESHOLD_METHOD}' {row['concordancia']:.2%} (IoU {row['iou']:.3f})")
+
+    saver.save_dataframe(pd.DataFrame(rows), "benchmark_limiar_local.csv")
+    print("Benchmark dos métodos de limiar local concluído.")
+
+
+def run_timelapse_pipeline():
+    """
+    Analisa filmes de HS-AFM (pilhas de quadros, vídeos ou pastas de quadros): segmenta
+    o primeiro quadro por inteiro e, nos seguintes, só as regiões alteradas (ver
+    TimeLapseAnalyzer), acompanha cada molécula entre os quadros e salva a série do
+    comprimento de cada molécula ao longo do tempo.
+    """
+    print("Executando a pipeline de Filmes de HS-AFM...")
+    # --- Configuração ---
+    INPUT_DIR = './data/timelapse'      # Um filme por arquivo (.npy, .tif, vídeo) ou subpasta
+    OUTPUT_DIR = './results/timelapse'
+    CONVERSION_FACTORS = {256: 11.72, 512: 5.86, 1024: 2.93}  # nm/pixel, pela largura do quadro
+    FRAME_INTERVAL = None               # Segundos entre quadros (None: o FPS do vídeo, se houver)
+    CHANGE_CONFIG = {'change_threshold': CHANGE_THRESHOLD, 'tile_size': CHANGE_TILE_SIZE}
+    # O Sauvola separa as moléculas do fundo; com o limiar gaussiano padrão, o fundo vira um
+    # único componente que cobre o quadro e precisa ser esqueletizado de novo a cada alteração
+    ANALYZER_CONFIG = {'segmenter': {'threshold_method': 'sauvola'}}
+
+    # --- Inicialização ---
+    if not os.path.isdir(INPUT_DIR):
+        print(f"  ERRO: Pasta de filmes '{INPUT_DIR}' não encontrada.")
+        return
+    saver = Saver(OUTPUT_DIR)
+    movies = sorted(os.path.join(INPUT_DIR, name) for name in os.listdir(INPUT_DIR) if not name.startswith('.'))
+
+    for movie_path in movies:
+        name = os.path.splitext(os.path.basename(movie_path))[0]
+        try:
+            sequence = FrameSequence(movie_path)
+        except ValueError as error:
+            print(f"  ERRO: {error}")
+            continue
+        interval = FRAME_INTERVAL or (1.0 / sequence.fps if sequence.fps else None)
+
+        analyzer, rows, segmented, reused = None, [], [], 0
+        started = time.perf_counter()
+        for frame_index, frame in enumerate(sequence):
+            if analyzer is None:
+                conversion_factor = CONVERSION_FACTORS.get(frame.shape[1])
+                if conversion_factor is None:
+                    print(f"  Aviso: sem fator de conversão para quadros de {frame.shape[1]}px em '{name}'. Ignorando.")
+                    break
+                analyzer = TimeLapseAnalyzer(conversion_factor, analyzer=Analyzer(config=ANALYZER_CONFIG),
+                                             **CHANGE_CONFIG)
+            result = analyzer.process(frame)
+            segmented.append(result['fracao_segmentada'])
+            reused += result['reaproveitadas']
+            time_s = round(frame_index * interval, 6) if interval else np.nan
+            rows.extend({'Quadro': frame_index, 'Tempo (s)': time_s, **row} for row in result['moleculas'])
+        elapsed = time.perf_counter() - started
+        if not segmented or not rows:
+            print(f"  Aviso: nenhuma molécula medida em '{name}'.")
+            continue
+
+        df_lengths = pd.DataFrame(rows).round({'Comprimento': 2})
+        lengths = df_lengths.groupby('Molécula')['Comprimento']
+        df_tracks = pd.DataFrame({
+            'Primeiro Quadro': df_lengths.groupby('Molécula')['Quadro'].min(),
+            'Último Quadro': df_lengths.groupby('Molécula')['Quadro'].max(),
+            'Quadros': lengths.size(),
+            'Comprimento Inicial': lengths.first(),
+            'Comprimento Final': lengths.last(),
+            'Comprimento Médio': lengths.mean().round(2)
+        }).reset_index()
+        df_tracks['Variação Relativa'] = ((df_tracks['Comprimento Final'] - df_tracks['Comprimento Inicial'])
+                                          / df_tracks['Comprimento Inicial']).round(4)
+        saver.save_dataframe(df_lengths, f"{name}_comprimentos_por_quadro.csv")
+        saver.save_dataframe(df_tracks, f"{name}_trajetorias.csv")
+        print(f"  {name}: {len(segmented)} quadros em {elapsed:.2f}s ({len(segmented) / elapsed:.1f} quadros/s), "
+              f"{len(df_tracks)} moléculas acompanhadas; {np.mean(segmented[1:] or [1.0]):.1%} dos pixels "
+              f"segmentados de novo por quadro, {reused / len(df_lengths):.1%} dos comprimentos reaproveitados.")
+
+    print("Pipeline de Filmes de HS-AFM concluída.")
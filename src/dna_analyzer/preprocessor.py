@@ -1,7 +1,54 @@
 # src/dna_analyzer/preprocessor.py
+import re
 import cv2
 import numpy as np
 
+# Nivelamento de fundo (ver `ImagePreprocessor.level`): grau do polinômio ajustado a cada
+# linha de varredura
+LEVEL_LINE_ORDER = 1
+
+# Pixels mais altos que a mediana do fundo nivelado por mais que MOLECULE_SIGMA desvios
+# robustos (1,4826 x MAD) são moléculas e ficam fora do reajuste; a máscara é dilatada
+# por MOLECULE_DILATION pixels para excluir também as bordas das moléculas
+MOLECULE_SIGMA = 3.0
+MOLECULE_DILATION = 3
+
+# A localização das moléculas usa estatísticas robustas (medianas) de uma amostra regular
+# dos pixels (1 coluna em MOLECULE_SAMPLE_STEP), que bastam para estimá-las
+MOLECULE_SAMPLE_STEP = 4
+
+# Percentis das alturas niveladas levados a 0 e 255 na conversão para uint8 (os extremos,
+# como picos de ruído da ponta, saturam em vez de comprimir a faixa útil)
+LEVEL_OUTPUT_PERCENTILES = (0.5, 99.5)
+
+
+def parse_level(spec: str):
+    """
+    Converte a especificação 'método[:grau]' da linha de comando nos parâmetros de
+    `ImagePreprocessor.level` (ex: 'polynomial:2' -> {'method': 'polynomial', 'order': 2}).
+
+    O método é 'polynomial' ou 'median'; sem grau, usa LEVEL_LINE_ORDER.
+
+    Raises:
+        ValueError: Se a especificação for inválida.
+    """
+    match = re.fullmatch(r"\s*(polynomial|median)\s*(?::\s*(\d+)\s*)?", spec or "")
+    if not match:
+        raise ValueError(f"Nivelamento inválido: '{spec}' (use polynomial[:GRAU] ou median, ex: polynomial:2).")
+    method, order = match.group(1), match.group(2)
+    if method == 'median' and order is not None:
+        raise ValueError(f"Nivelamento inválido: '{spec}' (o método 'median' não tem grau).")
+    if method == 'median':
+        return {'method': method}
+    return {'method': method, 'order': int(order) if order is not None else LEVEL_LINE_ORDER}
+
+
+def _line_design(width, order):
+    """Matriz de Vandermonde (largura x grau + 1) da posição na linha, escalada para [-1, 1]."""
+    x = np.linspace(-1.0, 1.0, width) if width > 1 else np.zeros(1)
+    return np.vander(x, order + 1, increasing=True).astype(np.float32)
+
+
 class ImagePreprocessor:
     """
     Realiza tarefas de pré-processamento, como normalização de tamanho e preenchimento.
@@ -72,4 +119,152 @@ class ImagePreprocessor:
         """
         Aplica um filtro GaussianBlur para suavizar a imagem e reduzir ruído.
         """
-        return cv2.GaussianBlur(image, ksize, 0)
\ No newline at end of file
+        return cv2.GaussianBlur(image, ksize, 0)
+
+    # --- Nivelamento de fundo (AFM) ---
+
+    def level_plane(self, image, mask=None):
+        """
+        Remove o plano z = a + b*x + c*y ajustado por mínimos quadrados (inclinação da
+        amostra). As somas das equações normais saem das somas por linha e por coluna,
+        sem montar a matriz de projeto do tamanho da imagem.
+
+        Args:
+            image (numpy.ndarray): Alturas (2D; convertidas para float32).
+            mask (numpy.ndarray): Pixels usados no ajuste (True = fundo); padrão: todos.
+
+        Returns:
+            numpy.ndarray: A imagem nivelada (float32).
+        """
+        image = np.asarray(image, dtype=np.float32)
+        h, w = image.shape
+        x = np.linspace(-1.0, 1.0, w) if w > 1 else np.zeros(1)
+        y = np.linspace(-1.0, 1.0, h) if h > 1 else np.zeros(1)
+        if mask is None:
+            weighted = image
+            row_weights, col_weights, weights_x = np.full(h, float(w)), np.full(w, float(h)), np.full(h, x.sum())
+        else:
+            weights = mask.astype(np.float32)
+            weighted = image * weights
+            row_weights, col_weights = weights.sum(axis=1), weights.sum(axis=0)
+            weights_x = weights @ x.astype(np.float32)
+        # Equações normais de [1, x, y], montadas com produtos de vetores por linha e por coluna
+        normal = np.array([
+            [row_weights.sum(), col_weights @ x, row_weights @ y],
+            [col_weights @ x, col_weights @ (x * x), weights_x @ y],
+            [row_weights @ y, weights_x @ y, row_weights @ (y * y)]
+        ])
+        row_sums = weighted.sum(axis=1)
+        rhs = np.array([row_sums.sum(), (weighted @ x.astype(np.float32)).sum(), row_sums @ y])
+        a, b, c = np.linalg.lstsq(normal, rhs, rcond=None)[0]
+        return image - (b * x).astype(np.float32)[np.newaxis, :] - (a + c * y).astype(np.float32)[:, np.newaxis]
+
+    def level_lines(self, image, order=LEVEL_LINE_ORDER, mask=None, method='polynomial'):
+        """
+        Remove de cada linha de varredura um polinômio de grau `order` (ou a mediana),
+        corrigindo os desníveis entre linhas e a inclinação ao longo delas.
+
+        Todas as linhas são ajustadas de uma vez, como um único problema de mínimos
+        quadrados em lote: sem máscara, a matriz de projeto é a mesma em todas as linhas e
+        os coeficientes saem de um único produto pela pseudo-inversa; com máscara, as
+        equações normais de cada linha (somas ponderadas pela máscara) vêm de dois produtos
+        matriciais e são resolvidas juntas. Linhas com pixels de fundo insuficientes usam o
+        ajuste sem máscara.
+
+        Args:
+            image (numpy.ndarray): Alturas (2D; convertidas para float32).
+            order (int): Grau do polinômio de cada linha (0 = deslocamento médio).
+            mask (numpy.ndarray): Pixels usados no ajuste (True = fundo); padrão: todos.
+            method (str): 'polynomial' ou 'median' (deslocamento pela mediana da linha).
+
+        Returns:
+            numpy.ndarray: A imagem nivelada (float32).
+        """
+        image = np.asarray(image, dtype=np.float32)
+        if method == 'median':
+            if mask is None:
+                offsets = np.median(image, axis=1)
+            else:
+                # Mediana só do fundo de cada linha: com os pixels excluídos levados a +inf e as
+                # linhas ordenadas, os do fundo ocupam as primeiras `contagem` posições
+                background = np.where(mask, image, np.inf)
+                background.sort(axis=1)
+                counts = mask.sum(axis=1)
+                rows = np.arange(len(image))
+                lower, upper = np.maximum(counts - 1, 0) // 2, counts // 2
+                offsets = (background[rows, lower] + background[rows, np.minimum(upper, image.shape[1] - 1)]) / 2
+                offsets = np.where(counts > 0, offsets, np.median(image, axis=1))
+            return image - offsets[:, np.newaxis].astype(np.float32)
+        if method != 'polynomial':
+            raise ValueError(f"Método de nivelamento por linha desconhecido: '{method}'. Use 'polynomial' ou 'median'.")
+
+        design = _line_design(image.shape[1], order)
+        coefficients = image @ np.linalg.pinv(design).T
+        if mask is not None:
+            weights = mask.astype(np.float32)
+            terms = order + 1
+            # Equações normais por linha: G[r] = V^T diag(m_r) V e b[r] = V^T (m_r * z_r)
+            products = (design[:, :, np.newaxis] * design[:, np.newaxis, :]).reshape(len(design), terms * terms)
+            normal = (weights @ products).reshape(-1, terms, terms).astype(np.float64)
+            rhs = ((image * weights) @ design).astype(np.float64)
+            solvable = weights.sum(axis=1) > terms
+            if solvable.any():
+                coefficients[solvable] = np.linalg.solve(normal[solvable], rhs[solvable][:, :, np.newaxis])[:, :, 0]
+        return image - coefficients @ design.T
+
+    def molecule_mask(self, leveled, sigma=MOLECULE_SIGMA, dilation=MOLECULE_DILATION):
+        """
+        Pixels de fundo de uma imagem já nivelada: exclui as moléculas (pixels acima da
+        mediana por mais que `sigma` desvios robustos), com a máscara dilatada por
+        `dilation` pixels.
+
+        Returns:
+            numpy.ndarray: Máscara booleana (True = fundo).
+        """
+        # Mediana e desvio robusto estimados em uma amostra regular dos pixels
+        sample = leveled[::MOLECULE_SAMPLE_STEP, ::MOLECULE_SAMPLE_STEP]
+        median = float(np.median(sample))
+        spread = 1.4826 * float(np.median(np.abs(sample - median)))
+        molecules = (leveled > median + sigma * spread).astype(np.uint8)
+        if dilation:
+            molecules = cv2.dilate(molecules, np.ones((2 * dilation + 1, 2 * dilation + 1), np.uint8))
+        return molecules == 0
+
+    def level(self, image, order=LEVEL_LINE_ORDER, plane=True, exclude_molecules=True, method='polynomial'):
+        """
+        Nivelamento de fundo de uma varredura de AFM: plano global (opcional) e ajuste por
+        linha. Com `exclude_molecules`, uma primeira passada robusta (plano e mediana de
+        cada linha) localiza as moléculas (`molecule_mask`), e o plano e as linhas são
+        ajustados só com os pixels de fundo, para que as moléculas não puxem o fundo da
+        sua linha para cima.
+
+        Args:
+            image (numpy.ndarray): Alturas em escala de cinza (ex: `HeightMap.to_float32()`).
+            order (int): Grau do polinômio de cada linha.
+            plane (bool): Se remove também o plano global.
+            exclude_molecules (bool): Se reajusta excluindo as moléculas.
+            method (str): Ajuste por linha, 'polynomial' ou 'median'.
+
+        Returns:
+            numpy.ndarray: A imagem nivelada (float32).
+        """
+        image = np.asarray(image, dtype=np.float32)
+        if not exclude_molecules:
+            return self.level_lines(self.level_plane(image) if plane else image, order, method=method)
+        # Primeira passada robusta às moléculas (deslocamento de cada linha pela mediana), só
+        # para localizá-las; o ajuste pedido é feito em seguida apenas com o fundo
+        rough = self.level_plane(image) if plane else image
+        rough = rough - np.median(rough[:, ::MOLECULE_SAMPLE_STEP], axis=1)[:, np.newaxis]
+        mask = self.molecule_mask(rough)
+        return self.level_lines(self.level_plane(image, mask) if plane else image, order, mask=mask, method=method)
+
+    @staticmethod
+    def leveled_to_uint8(leveled, percentiles=LEVEL_OUTPUT_PERCENTILES):
+        """Leva as alturas niveladas para 0-255 (percentis `percentiles` -> 0 e 255)."""
+        low, high = np.percentile(leveled, percentiles)
+        scaled = leveled - np.float32(low)
+        if high > low:
+            scaled *= np.float32(255.0 / (high - low))
+        scaled += 0.5
+        np.clip(scaled, 0, 255, out=scaled)
+        return scaled.astype(np.uint8)
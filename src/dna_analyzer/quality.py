@@ -0,0 +1,145 @@
+# src/dna_analyzer/quality.py
+import numpy as np
+from scipy.ndimage import median_filter
+
+# Percentil dos níveis de cinza que representa o fundo de uma linha ou coluna no teste de
+# listras: as moléculas são claras e ocupam uma fração pequena de cada linha, então o
+# percentil baixo acompanha o nível do fundo (que uma falha da ponta desloca), e não o
+# conteúdo de moléculas da linha, que a média acompanharia
+STREAK_PERCENTILE = 10
+
+# Piso (níveis de cinza) da escala robusta do teste de listras, para que perfis de fundo
+# muito suaves não transformem variações mínimas em listras
+STREAK_MIN_SCALE = 1.0
+
+
+class QualityGate:
+    """
+    Controle de qualidade barato, aplicado logo após o carregamento da imagem,
+    para descartar (ou sinalizar) aquisições com falha antes das etapas caras
+    de desfoque, limiarização e esqueletização.
+
+    Todas as métricas vêm de operações vetorizadas sobre a imagem: o histograma
+    (média, variância e saturação), o nível de fundo por linha e por coluna (listras),
+    a fração saturada de cada linha (linhas de varredura saturadas) e as diferenças
+    entre pixels vizinhos (densidade de bordas).
+    """
+
+    def __init__(self, mode: str = 'tag', min_std: float = 3.0, max_saturated_fraction: float = 0.25,
+                 max_saturated_lines: float = 0.05, streak_zscore: float = 8.0,
+                 max_streak_fraction: float = 0.05, edge_threshold: int = 20,
+                 min_edge_pixels: int = 50, max_edge_density: float = 0.5):
+        """
+        Args:
+            mode (str): 'tag' apenas sinaliza as imagens reprovadas e deixa a análise
+                prosseguir; 'reject' as descarta.
+            min_std (float): Desvio padrão mínimo dos níveis de cinza (abaixo: quadro plano).
+            max_saturated_fraction (float): Fração máxima de pixels em 0 ou 255.
+            max_saturated_lines (float): Fração máxima de linhas de varredura com mais
+                da metade dos pixels saturados.
+            streak_zscore (float): Desvio robusto (em MADs) do nível de fundo de uma
+                linha/coluna em relação às vizinhas para considerá-la uma listra.
+            max_streak_fraction (float): Fração máxima de linhas/colunas com listras.
+            edge_threshold (int): Diferença mínima entre pixels vizinhos para contar uma borda.
+            min_edge_pixels (int): Número mínimo de pixels de borda (abaixo: sem estrutura).
+                É um número absoluto, e não uma fração, para que um campo grande com poucas
+                moléculas não seja reprovado.
+            max_edge_density (float): Fração máxima de pixels de borda (acima: ruído/deriva).
+        """
+        if mode not in ('reject', 'tag'):
+            raise ValueError(f"Modo de controle de qualidade inválido: '{mode}' (use 'reject' ou 'tag').")
+        self.mode = mode
+        self.min_std = min_std
+        self.max_saturated_fraction = max_saturated_fraction
+        self.max_saturated_lines = max_saturated_lines
+        self.streak_zscore = streak_zscore
+        self.max_streak_fraction = max_streak_fraction
+        self.edge_threshold = edge_threshold
+        self.min_edge_pixels = min_edge_pixels
+        self.max_edge_density = max_edge_density
+
+    def _streak_fraction(self, profile):
+        """Fração de entradas de um perfil (fundo por linha ou coluna) que destoam das vizinhas."""
+        if profile.size < 5:
+            return 0.0
+        residual = profile - median_filter(profile, size=9, mode='nearest')
+        mad = np.median(np.abs(residual - np.median(residual)))
+        scale = max(1.4826 * mad, STREAK_MIN_SCALE)
+        return float(np.mean(np.abs(residual) > self.streak_zscore * scale))
+
+    def compute_metrics(self, image):
+        """
+        Calcula as métricas de qualidade de uma imagem em escala de cinza.
+
+        Returns:
+            dict: Média, desvio padrão, fração saturada, fração de linhas saturadas,
+            fração de listras, pixels de borda e densidade de bordas.
+        """
+        if image.dtype != np.uint8:
+            image = np.clip(image, 0, 255).astype(np.uint8)
+
+        # Histograma: uma passada sobre os pixels fornece média, variância e saturação
+        histogram = np.bincount(image.ravel(), minlength=256).astype(np.float64)
+        total = histogram.sum()
+        levels = np.arange(256)
+        mean = (histogram @ levels) / total
+        variance = (histogram @ (levels - mean) ** 2) / total
+        saturated_fraction = (histogram[0] + histogram[255]) / total
+
+        # Linhas de varredura saturadas
+        saturated = (image == 0) | (image == 255)
+        saturated_lines = float(np.mean(saturated.mean(axis=1) > 0.5))
+
+        # Listras (linhas ou colunas com o nível de fundo destoante, típicas de falhas da ponta):
+        # o fundo de cada linha/coluna é o percentil STREAK_PERCENTILE, indiferente às moléculas
+        row_rank = STREAK_PERCENTILE * (image.shape[1] - 1) // 100
+        col_rank = STREAK_PERCENTILE * (image.shape[0] - 1) // 100
+        row_background = np.partition(image, row_rank, axis=1)[:, row_rank].astype(np.float64)
+        col_background = np.partition(image, col_rank, axis=0)[col_rank, :].astype(np.float64)
+        streak_fraction = max(self._streak_fraction(row_background), self._streak_fraction(col_background))
+
+        # Densidade de bordas pelas diferenças entre vizinhos horizontais e verticais
+        signed = image.astype(np.int16)
+        edges_x = np.abs(np.diff(signed, axis=1)) > self.edge_threshold
+        edges_y = np.abs(np.diff(signed, axis=0)) > self.edge_threshold
+        edge_pixels = np.count_nonzero(edges_x) + np.count_nonzero(edges_y)
+        edge_density = edge_pixels / max(edges_x.size + edges_y.size, 1)
+
+        return {
+            'Média': float(mean),
+            'Desvio Padrão': float(np.sqrt(variance)),
+            'Fração Saturada': float(saturated_fraction),
+            'Linhas Saturadas': saturated_lines,
+            'Fração Listras': streak_fraction,
+            'Pixels Borda': int(edge_pixels),
+            'Densidade Bordas': float(edge_density)
+        }
+
+    def assess(self, image):
+        """
+        Avalia uma imagem e decide se ela segue para a análise.
+
+        Returns:
+            dict: 'status' ('ok', 'sinalizada' ou 'rejeitada'), 'motivo' (texto,
+            vazio se ok) e 'metricas' (o dicionário de `compute_metrics`).
+        """
+        metrics = self.compute_metrics(image)
+        reasons = []
+        if metrics['Desvio Padrão'] < self.min_std:
+            reasons.append(f"quadro plano (desvio padrão {metrics['Desvio Padrão']:.1f})")
+        if metrics['Fração Saturada'] > self.max_saturated_fraction:
+            reasons.append(f"saturada ({metrics['Fração Saturada']:.0%} dos pixels)")
+        if metrics['Linhas Saturadas'] > self.max_saturated_lines:
+            reasons.append(f"linhas de varredura saturadas ({metrics['Linhas Saturadas']:.0%})")
+        if metrics['Fração Listras'] > self.max_streak_fraction:
+            reasons.append(f"listras ({metrics['Fração Listras']:.0%} das linhas ou colunas)")
+        if metrics['Pixels Borda'] < self.min_edge_pixels:
+            reasons.append(f"sem estrutura ({metrics['Pixels Borda']} pixels de borda)")
+        elif metrics['Densidade Bordas'] > self.max_edge_density:
+            reasons.append(f"ruído excessivo (densidade de bordas {metrics['Densidade Bordas']:.0%})")
+
+        if not reasons:
+            status = 'ok'
+        else:
+            status = 'rejeitada' if self.mode == 'reject' else 'sinalizada'
+        return {'status': status, 'motivo': "; ".join(reasons), 'metricas': metrics}
@@ -1,29 +1,43 @@
 # src/dna_analyzer/segmenter.py
 import cv2
 import numpy as np
+from .contour_store import ContourStore
+from .local_threshold import get_local_threshold
 
 class Segmenter:
     """Classe para segmentar moléculas em uma imagem usando detecção de bordas."""
 
-    def __init__(self, canny_threshold1: int = 100, canny_threshold2: int = 200):
+    def __init__(self, canny_threshold1: int = 100, canny_threshold2: int = 200,
+                 threshold_method: str = None, threshold_options: dict = None):
         """
-        Inicializa o segmentador com os limiares do Canny.
+        Inicializa o segmentador com os limiares do Canny e o método do limiar local.
+
+        Args:
+            threshold_method (str): Método de `segment_with_adaptive_threshold` (chave de
+                LOCAL_THRESHOLD_METHODS; padrão: o limiar gaussiano do OpenCV). Para janelas
+                grandes, 'gaussian-approx' e 'mean' têm custo independente do tamanho do bloco.
+            threshold_options (dict): Parâmetros do método (ex: {'k': 0.3} para 'sauvola').
         """
         self.canny_threshold1 = canny_threshold1
         self.canny_threshold2 = canny_threshold2
+        self.local_threshold = get_local_threshold(threshold_method, **(threshold_options or {}))
 
-    def segment(self, image):
+    def segment(self, image, compact=False):
         """
         Aplica o detector de bordas Canny e encontra os contornos.
 
         Args:
             image (numpy.ndarray): A imagem de entrada em escala de cinza.
+            compact (bool): Se True, devolve os contornos em um ContourStore (um único
+                buffer de pontos) em vez da tupla de arrays do `cv2.findContours`.
 
         Returns:
-            tuple: Uma tupla contendo a lista de contornos e a imagem de bordas.
+            tuple: Uma tupla contendo os contornos e a imagem de bordas.
         """
         edges = cv2.Canny(image, self.canny_threshold1, self.canny_threshold2)
         contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if compact:
+            return ContourStore.from_contours(contours), edges
         return contours, edges
 
     def detect_canny_edges(self, image):
@@ -66,10 +80,7 @@ class Segmenter:
         Retorna uma imagem binária.
         """
         # Aplica limiar adaptativo para binarizar a imagem
-        binary_image = cv2.adaptiveThreshold(
-            image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY, block_size, C
-        )
+        binary_image = self.local_threshold.threshold(image, block_size, C)
 
         # Remove pequenos ruídos com uma operação de abertura morfológica
         if cleanup_kernel_size:
@@ -77,4 +88,36 @@ class Segmenter:
             clean_binary = cv2.morphologyEx(binary_image, cv2.MORPH_OPEN, kernel)
             return clean_binary
         
-        return binary_image
\ No newline at end of file
+        return binary_image
+
+    def region_halo(self, blur_ksize=(5, 5), block_size=11, cleanup_kernel_size=(2, 2)):
+        """
+        Linhas de vizinhança de que cada linha da imagem binária depende: metade do
+        kernel do desfoque, o alcance do limiar local e o da abertura (erosão seguida
+        de dilatação).
+        """
+        halo = blur_ksize[1] // 2 + self.local_threshold.radius(block_size)
+        if cleanup_kernel_size:
+            halo += 2 * (cleanup_kernel_size[0] - 1)
+        return halo
+
+    def segment_region(self, height_map, rows, blur_ksize=(5, 5), block_size=11, C=2, cleanup_kernel_size=(2, 2)):
+        """
+        Linhas [início, fim) da imagem binária de um mapa de altura (desfoque gaussiano +
+        `segment_with_adaptive_threshold`), lendo e convertendo para uint8 só essas linhas
+        e a margem de `region_halo` acima e abaixo. O resultado é idêntico às mesmas
+        linhas da segmentação do mapa inteiro.
+
+        Args:
+            height_map (HeightMap): O mapa de altura.
+            rows (tuple): (início, fim) das linhas.
+
+        Returns:
+            numpy.ndarray: As linhas da imagem binária (uint8, 0/255).
+        """
+        start, stop = rows
+        halo = self.region_halo(blur_ksize, block_size, cleanup_kernel_size)
+        top, bottom = max(start - halo, 0), min(stop + halo, height_map.shape[0])
+        blurred = cv2.GaussianBlur(height_map.to_uint8((top, bottom)), blur_ksize, 0)
+        binary = self.segment_with_adaptive_threshold(blurred, block_size, C, cleanup_kernel_size)
+        return binary[start - top:stop - top]
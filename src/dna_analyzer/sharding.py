@@ -0,0 +1,147 @@
+# src/dna_analyzer/sharding.py
+import os
+import re
+import glob
+import json
+import hashlib
+import pandas as pd
+
+PARTIALS_DIRNAME = 'partials'
+
+
+def parse_shard(spec: str):
+    """
+    Converte a especificação 'i/N' da linha de comando em uma tupla (i, N).
+
+    O índice começa em 1 (ex: '1/4' a '4/4' para quatro nós).
+
+    Raises:
+        ValueError: Se a especificação for inválida.
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", spec or "")
+    if not match:
+        raise ValueError(f"Especificação de shard inválida: '{spec}' (use o formato i/N, ex: 1/4).")
+    index, count = int(match.group(1)), int(match.group(2))
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Shard fora do intervalo: '{spec}' (i deve estar entre 1 e N).")
+    return index, count
+
+
+def shard_of(image_path: str, count: int):
+    """
+    Retorna o shard (1..count) ao qual uma imagem pertence.
+
+    Usa um hash estável do nome do arquivo (e não o `hash()` do Python, que muda
+    entre execuções), de modo que todos os nós calculam a mesma partição sem
+    precisar se comunicar.
+    """
+    digest = hashlib.md5(os.path.basename(image_path).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+def select_shard(image_paths, shard):
+    """
+    Filtra uma lista de caminhos mantendo apenas os do shard informado.
+
+    Args:
+        image_paths (list): Caminhos das imagens.
+        shard (tuple): Tupla (i, N) ou None para manter todos os caminhos.
+    """
+    if shard is None:
+        return list(image_paths)
+    index, count = shard
+    return [path for path in image_paths if shard_of(path, count) == index]
+
+
+def save_partial_results(output_dir: str, pipeline: str, shard, tables: dict, doses=None):
+    """
+    Salva as tabelas parciais de um nó em `<output_dir>/partials/`, junto com um
+    manifesto JSON usado pelo comando `merge` para validar e ordenar os resultados.
+
+    Args:
+        output_dir (str): Diretório de saída da pipeline.
+        pipeline (str): Nome da pipeline (ex: 'full-skeleton-analysis').
+        shard (tuple): Tupla (i, N) deste nó.
+        tables (dict): Nome da tabela -> DataFrame (ex: {'moleculas': df}).
+        doses (list): Ordem das doses usada pela pipeline.
+    """
+    index, count = shard
+    partials_dir = os.path.join(output_dir, PARTIALS_DIRNAME)
+    os.makedirs(partials_dir, exist_ok=True)
+    prefix = f"shard-{index}-of-{count}"
+
+    for name, df in tables.items():
+        path = os.path.join(partials_dir, f"{prefix}.{name}.csv")
+        df.to_csv(path, index=False)
+        print(f"Resultados parciais salvos em: {path}")
+
+    manifest = {
+        'pipeline': pipeline,
+        'shard': index,
+        'num_shards': count,
+        'doses': list(doses or []),
+        'tables': {name: len(df) for name, df in tables.items()}
+    }
+    with open(os.path.join(partials_dir, f"{prefix}.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+def load_partial_results(output_dir: str):
+    """
+    Lê e concatena as tabelas parciais de todos os shards de uma pipeline.
+
+    Returns:
+        tuple: (dict nome da tabela -> DataFrame, lista ordenada de doses), ou
+        (None, None) se não houver resultados parciais.
+
+    Raises:
+        ValueError: Se os shards forem de partições diferentes ou estiverem incompletos.
+    """
+    partials_dir = os.path.join(output_dir, PARTIALS_DIRNAME)
+    manifest_paths = sorted(glob.glob(os.path.join(partials_dir, "shard-*-of-*.json")))
+    if not manifest_paths:
+        return None, None
+
+    manifests = []
+    for path in manifest_paths:
+        with open(path, encoding='utf-8') as f:
+            manifests.append((path, json.load(f)))
+
+    counts = {m['num_shards'] for _, m in manifests}
+    if len(counts) != 1:
+        raise ValueError(f"Resultados parciais de partições diferentes em {partials_dir}: N = {sorted(counts)}.")
+    count = counts.pop()
+    found = {m['shard'] for _, m in manifests}
+    missing = sorted(set(range(1, count + 1)) - found)
+    if missing:
+        raise ValueError(f"Faltam os shards {missing} de {count} em {partials_dir}.")
+
+    doses = []
+    tables = {}
+    for path, manifest in sorted(manifests, key=lambda item: item[1]['shard']):
+        for dose in manifest['doses']:
+            if dose not in doses:
+                doses.append(dose)
+        prefix = path[:-len('.json')]
+        for name, num_rows in manifest['tables'].items():
+            if num_rows == 0:
+                continue  # shard sem resultados (o CSV não tem nem cabeçalho)
+            # round_trip garante que os floats relidos sejam idênticos aos calculados no nó
+            tables.setdefault(name, []).append(pd.read_csv(f"{prefix}.{name}.csv", float_precision="round_trip"))
+
+    merged = {name: pd.concat(frames, ignore_index=True) for name, frames in tables.items()}
+    return merged, doses
+
+
+def canonical_order(df: pd.DataFrame, doses: list, file_column: str):
+    """
+    Ordena as linhas como em uma execução de nó único: pela ordem das doses e,
+    dentro de cada dose, pelo nome do arquivo. A ordenação é estável, preservando
+    a ordem das moléculas dentro de cada imagem.
+    """
+    keys = [file_column]
+    if doses and 'Dose' in df.columns:
+        df = df.assign(_ordem_dose=df['Dose'].map({dose: i for i, dose in enumerate(doses)}))
+        keys = ['_ordem_dose', file_column]
+    ordered = df.sort_values(keys, kind='stable').reset_index(drop=True)
+    return ordered.drop(columns=['_ordem_dose'], errors='ignore')
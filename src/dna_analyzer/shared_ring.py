@@ -0,0 +1,146 @@
+# src/dna_analyzer/shared_ring.py
+from collections import deque
+from multiprocessing import shared_memory
+import numpy as np
+
+# Alinhamento (bytes) do início de cada array dentro de um slot
+SLOT_ALIGNMENT = 64
+
+# Blocos de memória compartilhada já abertos neste processo (um por anel, reaproveitado entre tarefas)
+_attached = {}
+
+
+def _align(size):
+    return -(-int(size) // SLOT_ALIGNMENT) * SLOT_ALIGNMENT
+
+
+def _attach(name):
+    """Abre (uma vez por processo) o bloco de memória compartilhada `name`."""
+    memory = _attached.get(name)
+    if memory is None:
+        memory = _attached[name] = shared_memory.SharedMemory(name=name)
+    return memory
+
+
+class SlotArray:
+    """Descritor de um array publicado em um slot: posição no bloco, dimensões e tipo."""
+
+    def __init__(self, offset, shape, dtype):
+        self.offset = offset
+        self.shape = shape
+        self.dtype = dtype
+
+
+class RingSlot:
+    """
+    Um slot do anel, como enviado a uma tarefa: só o nome do bloco, a posição e o
+    tamanho (serializado em poucos bytes, sem copiar a memória).
+    """
+
+    def __init__(self, name, index, offset, size):
+        self.name = name
+        self.index = index
+        self.offset = offset
+        self.size = size
+
+    def publish(self, arrays):
+        """
+        Copia os arrays para o slot, em sequência, e devolve os seus descritores.
+
+        Args:
+            arrays (dict): Arrays a publicar (ex: {'binaria': ..., 'esqueleto': ...}).
+
+        Returns:
+            dict: Um SlotArray por array que coube no slot; os que não couberem
+            (ex: imagem maior que a prevista) são devolvidos como estão, para
+            seguirem serializados pela fila.
+        """
+        buffer = _attach(self.name).buf
+        published, used = {}, 0
+        for key, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            if used + array.nbytes > self.size:
+                published[key] = array
+                continue
+            offset = self.offset + used
+            np.ndarray(array.shape, array.dtype, buffer=buffer, offset=offset)[...] = array
+            published[key] = SlotArray(offset, array.shape, array.dtype.str)
+            used += _align(array.nbytes)
+        return published
+
+
+def publish_arrays(slot, arrays):
+    """
+    Publica as saídas grandes de uma tarefa no seu slot (`RingSlot.publish`). Sem
+    slot (execução no próprio processo), devolve os arrays como estão.
+    """
+    return slot.publish(arrays) if slot is not None else dict(arrays)
+
+
+class SharedRing:
+    """
+    Anel de slots de tamanho fixo em um único bloco de `multiprocessing.shared_memory`,
+    usado para devolver as saídas grandes das tarefas (imagens, máscaras, esqueletos,
+    mapas de bordas) ao processo principal sem serializá-las pela fila.
+
+    O processo principal reserva um slot para cada tarefa em execução (`acquire`) e
+    envia à tarefa só o descritor do slot. A tarefa copia as suas saídas para o slot
+    (`publish_arrays`) e devolve pela fila apenas os descritores e os metadados. O
+    processo principal lê as saídas como views NumPy do bloco (`resolve`), sem cópia,
+    e libera o slot (`release`) depois de consumi-las.
+    """
+
+    def __init__(self, num_slots, slot_bytes):
+        """
+        Args:
+            num_slots (int): Número de slots (tarefas simultâneas).
+            slot_bytes (int): Capacidade de cada slot em bytes.
+        """
+        self.num_slots = int(num_slots)
+        self.slot_bytes = _align(max(slot_bytes, SLOT_ALIGNMENT))
+        self._memory = shared_memory.SharedMemory(create=True, size=self.num_slots * self.slot_bytes)
+        self._free = deque(range(self.num_slots))
+
+    @property
+    def name(self):
+        return self._memory.name
+
+    def acquire(self):
+        """Reserva um slot livre (RingSlot) ou retorna None se todos estiverem em uso."""
+        if not self._free:
+            return None
+        index = self._free.popleft()
+        return RingSlot(self.name, index, index * self.slot_bytes, self.slot_bytes)
+
+    def release(self, slot):
+        """Devolve o slot ao anel; as views lidas dele deixam de ser válidas."""
+        if slot is not None:
+            self._free.append(slot.index)
+
+    def resolve(self, result):
+        """
+        Troca os descritores (SlotArray) de um resultado em dicionário por views do
+        bloco compartilhado; os demais valores (e resultados que não são dicionários)
+        passam sem alteração.
+        """
+        if not isinstance(result, dict):
+            return result
+        buffer = self._memory.buf
+        return {key: np.ndarray(value.shape, np.dtype(value.dtype), buffer=buffer, offset=value.offset)
+                if isinstance(value, SlotArray) else value
+                for key, value in result.items()}
+
+    def close(self):
+        """Fecha e remove o bloco compartilhado."""
+        try:
+            self._memory.close()
+        except BufferError:
+            # Ainda há views do bloco em uso: o mapeamento é liberado quando elas forem descartadas
+            pass
+        self._memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
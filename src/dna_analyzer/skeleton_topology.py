@@ -0,0 +1,176 @@
+# src/dna_analyzer/skeleton_topology.py
+import cv2
+import numpy as np
+
+# Deslocamentos (dy, dx) dos 8 vizinhos, em sentido horário a partir do canto superior
+# esquerdo; o vizinho k contribui com o bit 2**k para o código de vizinhança do pixel.
+NEIGHBOUR_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1))
+
+
+def _branch_lut():
+    """
+    Número de ramos que saem de um pixel do esqueleto para cada código de vizinhança
+    (0 a 255): as sequências contínuas de vizinhos marcados ao redor do pixel
+    (número de cruzamentos).
+    """
+    codes = np.arange(256)
+    bits = (codes[:, None] >> np.arange(8)) & 1
+    return np.sum((bits == 0) & (np.roll(bits, -1, axis=1) == 1), axis=1).astype(np.uint8)
+
+
+# Ramos por código de vizinhança: 1 = extremidade, 2 = pixel de passagem, 3+ = junção
+BRANCH_LUT = _branch_lut()
+
+# Contribuição de cada janela 2x2 (bits: superior esquerdo, superior direito, inferior
+# esquerdo, inferior direito) para 4 vezes o número de Euler com conectividade 8
+# (método dos bit-quads de Gray): +1 com um pixel, -1 com três, -2 nas duas diagonais.
+EULER_LUT = np.array([0, 1, 1, 0, 1, 0, -2, -1, 1, -2, 0, -1, 0, -1, -1, 0], dtype=np.int64)
+
+
+class SkeletonTopology:
+    """
+    Análise topológica vetorizada de esqueletos: extremidades, junções, laços e
+    comprimento geodésico de todos os componentes de uma vez.
+
+    Os vizinhos de cada pixel do esqueleto são codificados em um byte (equivalente a
+    uma convolução com os pesos 1, 2, ..., 128, calculada apenas nos pixels do
+    esqueleto) e classificados por tabelas de consulta; as medidas de cada componente
+    são somadas com `np.bincount` sobre os rótulos. O custo fica próximo de uma
+    passada de filtro sobre a imagem.
+    """
+
+    def __init__(self, spur_length: int = 5):
+        """
+        Args:
+            spur_length (int): Ramos terminais (da extremidade até uma junção) com até
+                este número de pixels são podados antes das medidas; 0 desativa a poda.
+        """
+        if spur_length < 0:
+            raise ValueError(f"Comprimento de poda inválido: {spur_length} (use um inteiro >= 0).")
+        self.spur_length = int(spur_length)
+
+    @staticmethod
+    def _neighbour_codes(flat, positions, width):
+        """
+        Código de vizinhança (0 a 255) dos pixels nas posições lineares `positions` de um
+        esqueleto com borda de 1 pixel e `width` colunas, achatado em `flat`.
+        """
+        codes = np.zeros(len(positions), dtype=np.uint8)
+        for bit, (dy, dx) in enumerate(NEIGHBOUR_OFFSETS):
+            codes |= flat.take(positions + (dy * width + dx)) << np.uint8(bit)
+        return codes
+
+    def _prune_spurs(self, flat, positions, width):
+        """
+        Poda os ramos terminais curtos (modificando `flat`): remove as extremidades de
+        `positions` `spur_length` vezes e depois regenera, a partir das extremidades que
+        restaram, os pixels removidos das pontas dos ramos longos.
+        """
+        neighbour_steps = np.array([dy * width + dx for dy, dx in NEIGHBOUR_OFFSETS])
+        removed = []
+        for _ in range(self.spur_length):
+            ends = BRANCH_LUT[self._neighbour_codes(flat, positions, width)] == 1
+            if not ends.any():
+                break
+            flat[positions[ends]] = 0
+            removed.append(positions[ends])
+            positions = positions[~ends]
+        if not removed:
+            return
+
+        # Regenera por até `spur_length` passos a partir das extremidades restantes
+        was_removed = np.zeros_like(flat)
+        was_removed[np.concatenate(removed)] = 1
+        front = positions[BRANCH_LUT[self._neighbour_codes(flat, positions, width)] == 1]
+        for _ in range(self.spur_length):
+            if front.size == 0:
+                break
+            candidates = (front[:, None] + neighbour_steps).ravel()
+            front = np.unique(candidates[was_removed.take(candidates) == 1])
+            was_removed[front] = 0
+            flat[front] = 1
+
+    def analyze(self, skeleton, labels=None):
+        """
+        Mede a topologia de cada componente de um esqueleto.
+
+        Args:
+            skeleton (np.ndarray): Esqueleto binário (pixels > 0), com 1 pixel de largura.
+            labels (np.ndarray): Imagem de rótulos (int32) que define os componentes, ex:
+                os componentes conexos da imagem binária de origem. Se None, usa os
+                componentes conexos (conectividade 8) do próprio esqueleto.
+
+        Returns:
+            dict: Arrays indexados pelo rótulo (0 = fundo): 'comprimento' (geodésico, em
+            pixels, com passos diagonais valendo √2), 'pixels', 'extremidades',
+            'ramificacoes' (grupos de pixels de junção), 'lacos' (pelo número de Euler)
+            e 'topologia' ('linear', 'circular', 'ramificada' ou '' sem esqueleto);
+            e 'esqueleto', a imagem do esqueleto podado (uint8, 0/255).
+        """
+        skeleton = (np.asarray(skeleton) > 0).astype(np.uint8)
+        if labels is None:
+            num_labels, labels = cv2.connectedComponents(skeleton, connectivity=8)
+        else:
+            num_labels = int(labels.max()) + 1 if labels.size else 1
+        padded = np.pad(skeleton, 1)
+        flat_labels = np.pad(labels.astype(np.int32, copy=False), 1).ravel()
+        flat, width = padded.ravel(), padded.shape[1]
+        positions = np.flatnonzero(flat)
+
+        # Poda: só os componentes com junção têm ramos terminais a remover
+        if self.spur_length > 0 and positions.size:
+            branches = BRANCH_LUT[self._neighbour_codes(flat, positions, width)]
+            has_junction = np.zeros(num_labels, dtype=bool)
+            has_junction[flat_labels[positions[branches >= 3]]] = True
+            has_junction[0] = False
+            prunable = has_junction[flat_labels[positions]]
+            if prunable.any():
+                self._prune_spurs(flat, positions[prunable], width)
+                positions = np.flatnonzero(flat)
+
+        pixel_labels = flat_labels[positions]
+        branches = BRANCH_LUT[self._neighbour_codes(flat, positions, width)]
+        pixels = np.bincount(pixel_labels, minlength=num_labels)
+        endpoints = np.bincount(pixel_labels[branches == 1], minlength=num_labels)
+
+        # Junções: grupos de pixels vizinhos com 3 ou mais ramos contam como uma
+        junction_positions = positions[branches >= 3]
+        junction_image = np.zeros_like(padded)
+        junction_image.ravel()[junction_positions] = 1
+        num_clusters, clusters = cv2.connectedComponents(junction_image, connectivity=8)
+        cluster_labels = np.zeros(num_clusters, dtype=np.int64)
+        cluster_labels[clusters.ravel()[junction_positions]] = flat_labels[junction_positions]
+        junction_counts = np.bincount(cluster_labels[1:], minlength=num_labels)
+
+        # Comprimento geodésico: arestas para a direita e para baixo valem 1 e as
+        # diagonais √2, exceto quando um passo ortogonal já liga os dois pixels
+        right = flat.take(positions + 1)
+        down = flat.take(positions + width)
+        down_right = flat.take(positions + width + 1) & (1 - right) & (1 - down)
+        down_left = flat.take(positions + width - 1) & (1 - flat.take(positions - 1)) & (1 - down)
+        weights = right + down + np.sqrt(2) * (down_right + down_left.astype(np.float64))
+        lengths = np.bincount(pixel_labels, weights=weights, minlength=num_labels)
+
+        # Laços: número de Euler de cada componente pelos bit-quads (janelas 2x2, com o
+        # canto superior esquerdo em cada posição)
+        quads = cv2.filter2D(padded, cv2.CV_8U, np.array([[1, 2], [4, 8]], np.float32),
+                             anchor=(0, 0), borderType=cv2.BORDER_CONSTANT).ravel()
+        corners = np.flatnonzero(quads)
+        quad_labels = np.maximum.reduce([flat_labels[corners], flat_labels[corners + 1],
+                                         flat_labels[corners + width], flat_labels[corners + width + 1]])
+        euler = np.bincount(quad_labels, weights=EULER_LUT[quads[corners]], minlength=num_labels) / 4
+        loops = np.where(pixels > 0, np.maximum(np.rint(1 - euler), 0), 0).astype(np.int64)
+
+        topology = np.select([pixels == 0, junction_counts > 0, loops > 0], ['', 'ramificada', 'circular'], 'linear')
+        pixels[0] = endpoints[0] = junction_counts[0] = loops[0] = 0
+        lengths[0] = 0.0
+        topology[0] = ''
+        return {
+            'comprimento': lengths,
+            'pixels': pixels,
+            'extremidades': endpoints,
+            'ramificacoes': junction_counts,
+            'lacos': loops,
+            'topologia': topology,
+            'esqueleto': padded[1:-1, 1:-1] * np.uint8(255)
+        }
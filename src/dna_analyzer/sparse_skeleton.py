@@ -0,0 +1,137 @@
+# src/dna_analyzer/sparse_skeleton.py
+import cv2
+import numpy as np
+from .contour_store import ContourStore
+from .skeleton_topology import SkeletonTopology
+
+
+class SparseSkeleton:
+    """
+    Esqueleto esparso: as coordenadas (x, y) dos pixels de cada componente, em um
+    ContourStore (um único buffer de pontos com os deslocamentos de cada
+    componente), mais as dimensões da imagem de origem.
+
+    Um esqueleto costuma cobrir poucos por cento do quadro, então guardar só as
+    coordenadas (int16 após `compact`, 4 bytes por pixel do esqueleto) ocupa uma
+    fração da imagem densa uint8 e é serializado como poucos arrays. O comprimento
+    de cada componente é a sua contagem de pixels, lida dos deslocamentos sem
+    reconstruir a imagem.
+    """
+
+    def __init__(self, shape, components):
+        """
+        Args:
+            shape (tuple): (altura, largura) da imagem de origem.
+            components (ContourStore): Pixels (x, y) de cada componente.
+        """
+        self.shape = tuple(int(v) for v in shape[:2])
+        self.components = components
+
+    @classmethod
+    def from_image(cls, skeleton, labels=None):
+        """
+        Converte uma imagem de esqueleto (saída do thinning) para a forma esparsa.
+
+        Args:
+            skeleton (np.ndarray): Esqueleto binário (pixels > 0).
+            labels (np.ndarray): Rótulos que definem os componentes (ex: os componentes
+                conexos da imagem binária de origem). Se None, usa os componentes conexos
+                (conectividade 8) do próprio esqueleto.
+
+        Returns:
+            SparseSkeleton: Um componente por rótulo com pixels no esqueleto, na ordem
+            dos rótulos; a coluna 'rotulo' do ContourStore guarda o rótulo de cada um.
+        """
+        skeleton = np.asarray(skeleton)
+        if labels is None:
+            _, labels = cv2.connectedComponents((skeleton > 0).astype(np.uint8), connectivity=8)
+        ys, xs = np.nonzero(skeleton)
+        pixel_labels = labels[ys, xs]
+        order = np.argsort(pixel_labels, kind='stable')
+        present, counts = np.unique(pixel_labels[order], return_counts=True)
+        offsets = np.zeros(len(present) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        points = np.stack((xs[order], ys[order]), axis=1).astype(np.int32)
+        return cls(skeleton.shape, ContourStore(points, offsets, {'rotulo': present.astype(np.int32)}))
+
+    def __len__(self):
+        return len(self.components)
+
+    @property
+    def nbytes(self):
+        """Memória ocupada pelas coordenadas, deslocamentos e rótulos."""
+        return self.components.nbytes
+
+    def compact(self):
+        """Cópia com as coordenadas em int16 (se couberem), metade da memória."""
+        return SparseSkeleton(self.shape, self.components.compact())
+
+    # --- Consultas ---
+
+    def pixel_counts(self):
+        """Número de pixels do esqueleto de cada componente."""
+        return self.components.counts
+
+    def lengths(self, conversion_factor=1.0):
+        """Comprimento de cada componente (pixels * fator de conversão)."""
+        return self.pixel_counts() * conversion_factor
+
+    def total_length(self, conversion_factor=1.0):
+        """Comprimento total, igual a `FeatureExtractor.calculate_skeleton_length` da imagem densa."""
+        return int(self.components.offsets[-1]) * conversion_factor
+
+    def component(self, index):
+        """Coordenadas (x, y) dos pixels do componente `index`, shape (k, 2)."""
+        return self.components[index].reshape(-1, 2)
+
+    def to_image(self):
+        """Reconstrói a imagem densa do esqueleto (uint8, 0/255)."""
+        image = np.zeros(self.shape, dtype=np.uint8)
+        points = self.components.points
+        image[points[:, 1], points[:, 0]] = 255
+        return image
+
+    def to_labels(self):
+        """Imagem (int32) com o índice + 1 do componente em cada pixel do esqueleto e 0 no fundo."""
+        labels = np.zeros(self.shape, dtype=np.int32)
+        points = self.components.points
+        labels[points[:, 1], points[:, 0]] = np.repeat(np.arange(1, len(self) + 1, dtype=np.int32), self.pixel_counts())
+        return labels
+
+    def topology(self, topology=None):
+        """
+        Topologia de cada componente (extremidades, ramificações, laços, comprimento
+        geodésico), medida pela SkeletonTopology só no retângulo que contém o esqueleto.
+
+        Args:
+            topology (SkeletonTopology): Analisador a usar (padrão: SkeletonTopology()).
+
+        Returns:
+            dict: Os arrays de `SkeletonTopology.analyze` (exceto 'esqueleto'), com um
+            valor por componente.
+        """
+        topology = topology or SkeletonTopology()
+        points = self.components.points
+        if len(self) == 0:
+            return {name: np.zeros(0) for name in ('comprimento', 'pixels', 'extremidades', 'ramificacoes',
+                                                   'lacos', 'topologia')}
+        x0, y0 = points.min(axis=0)
+        x1, y1 = points.max(axis=0) + 1
+        labels = np.zeros((y1 - y0, x1 - x0), dtype=np.int32)
+        labels[points[:, 1] - y0, points[:, 0] - x0] = np.repeat(np.arange(1, len(self) + 1, dtype=np.int32),
+                                                                self.pixel_counts())
+        result = topology.analyze(labels > 0, labels)
+        return {name: values[1:] for name, values in result.items() if name != 'esqueleto'}
+
+    # --- Persistência ---
+
+    def save(self, path):
+        """Salva em um .npz (ou em uma pasta de .npy, como o ContourStore)."""
+        self.components.attrs['forma'] = np.array(self.shape, dtype=np.int64)
+        self.components.save(path)
+
+    @classmethod
+    def load(cls, path, mmap=False):
+        """Carrega um esqueleto salvo com `save`."""
+        components = ContourStore.load(path, mmap)
+        return cls(components.attrs['forma'], components)
@@ -1,7 +1,9 @@
 # src/dna_analyzer/stats_calculator.py
 import pandas as pd
+import numpy as np
 from scipy import stats
 from itertools import combinations
+from bisect import insort
 import re
 
 class StatsCalculator:
@@ -184,4 +186,83 @@ class StatsCalculator:
         except Exception as e:
             report.append(f"  - Erro ao calcular correlação com médias: {e}")
 
-        return "\n".join(report)
\ No newline at end of file
+        return "\n".join(report)
+
+class IncrementalDoseStats:
+    """
+    Mantém estatísticas por dose atualizadas incrementalmente, sem reprocessar
+    os resultados anteriores. Usado pelo modo de observação de diretório.
+
+    Média e variância são atualizadas pelo algoritmo de Welford; mediana e quartis
+    vêm de listas ordenadas por inserção binária, reproduzindo os mesmos valores
+    que `groupby(...).agg(...)` e `calculate_length_descriptive_stats` dariam
+    sobre a tabela completa.
+    """
+
+    def __init__(self, columns: list):
+        """
+        Args:
+            columns (list): Nomes das colunas numéricas acompanhadas.
+        """
+        self.columns = list(columns)
+        self._moments = {}   # (dose, coluna) -> [n, média, M2, mínimo, máximo]
+        self._sorted = {}    # (dose, coluna) -> lista ordenada de valores
+        self._doses = []
+
+    def update(self, dose: str, values: dict):
+        """Adiciona uma observação (ex: os resultados de uma imagem) ao grupo `dose`."""
+        if dose not in self._doses:
+            self._doses.append(dose)
+        for column in self.columns:
+            value = values.get(column)
+            if value is None or value != value:  # ignora ausentes e NaN
+                continue
+            value = float(value)
+            key = (dose, column)
+            moments = self._moments.setdefault(key, [0, 0.0, 0.0, value, value])
+            moments[0] += 1
+            delta = value - moments[1]
+            moments[1] += delta / moments[0]
+            moments[2] += delta * (value - moments[1])
+            moments[3] = min(moments[3], value)
+            moments[4] = max(moments[4], value)
+            insort(self._sorted.setdefault(key, []), value)
+
+    def _summary(self, dose, column):
+        n, mean, m2, minimum, maximum = self._moments.get((dose, column), [0, np.nan, np.nan, np.nan, np.nan])
+        std = np.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+        values = self._sorted.get((dose, column), [])
+        if values:
+            q1, q2, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+        else:
+            q1 = q2 = q3 = np.nan
+        return {'count': n, 'mean': mean, 'median': q2, 'std': std, 'min': minimum,
+                'max': maximum, 'Q1 (25%)': q1, 'Q2 (50%)': q2, 'Q3 (75%)': q3}
+
+    def aggregated(self):
+        """
+        Retorna média e desvio padrão por dose, no mesmo formato (colunas MultiIndex)
+        de `df.groupby('Dose')[colunas].agg(['mean', 'std']).round(2)`.
+        """
+        if not self._doses:
+            return pd.DataFrame()
+        doses = sorted(self._doses)
+        data = {}
+        for column in self.columns:
+            for stat in ('mean', 'std'):
+                data[(column, stat)] = [self._summary(dose, column)[stat] for dose in doses]
+        df = pd.DataFrame(data, index=pd.Index(doses, name='Dose'))
+        return df.round(2)
+
+    def descriptive(self, column: str):
+        """
+        Retorna as estatísticas descritivas de `column` por dose, com as mesmas colunas
+        de `StatsCalculator.calculate_length_descriptive_stats`.
+        """
+        if not self._doses:
+            return pd.DataFrame()
+        doses = sorted(d for d in self._doses if (d, column) in self._moments)
+        rows = [self._summary(dose, column) for dose in doses]
+        df = pd.DataFrame(rows, index=pd.Index(doses, name='Dose'))
+        df = df[['mean', 'median', 'std', 'min', 'max', 'Q1 (25%)', 'Q2 (50%)', 'Q3 (75%)']]
+        return df.round(2)
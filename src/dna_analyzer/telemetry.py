@@ -0,0 +1,298 @@
+# src/dna_analyzer/telemetry.py
+import os
+import time
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Limites (s) dos buckets do histograma de latência por etapa
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Janela (s) usada para calcular as taxas instantâneas (imagens/s, moléculas/s)
+RATE_WINDOW = 60.0
+
+# --- Sonda por tarefa (executada dentro dos processos de trabalho) ---
+
+_probe = {'stages': {}, 'molecules': 0, 'rejected': 0}
+
+
+@contextmanager
+def stage(name: str):
+    """Mede a duração de uma etapa da tarefa atual (ex: `with stage('thinning'): ...`)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _probe['stages'][name] = _probe['stages'].get(name, 0.0) + time.perf_counter() - start
+
+
+def count_molecules(count: int):
+    """Registra quantas moléculas a tarefa atual encontrou."""
+    _probe['molecules'] += int(count)
+
+
+def mark_rejected():
+    """Registra que uma imagem da tarefa atual foi descartada pelo controle de qualidade."""
+    _probe['rejected'] += 1
+
+
+def run_probed(func, task):
+    """
+    Executa `func(task)` coletando as durações das etapas e o número de moléculas.
+
+    Returns:
+        tuple: (resultado, {'stages': ..., 'molecules': ..., 'rejected': ..., 'elapsed': ...})
+    """
+    _probe['stages'], _probe['molecules'], _probe['rejected'] = {}, 0, 0
+    start = time.perf_counter()
+    result = func(task)
+    probe = {'stages': _probe['stages'], 'molecules': _probe['molecules'],
+             'rejected': _probe['rejected'], 'elapsed': time.perf_counter() - start}
+    return result, probe
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RunMetrics:
+    """
+    Métricas de progresso de uma execução, exportadas em formato texto do Prometheus
+    para um arquivo (atualizado atomicamente), um endpoint HTTP local, ou ambos.
+
+    As atualizações feitas pelo executor são operações O(1) protegidas por um
+    lock; a renderização ocorre apenas na thread de exportação, a cada `interval`
+    segundos, de forma que o custo sobre o processamento é desprezível.
+    """
+
+    def __init__(self, pipeline: str, textfile: str = None, port: int = None,
+                 interval: float = 5.0, host: str = '127.0.0.1'):
+        """
+        Args:
+            pipeline (str): Nome da pipeline (rótulo `pipeline` das métricas).
+            textfile (str): Caminho do arquivo .prom (ex: para o textfile collector
+                do node_exporter). None desativa.
+            port (int): Porta do endpoint HTTP `/metrics`. None desativa.
+            interval (float): Intervalo (s) entre atualizações do arquivo.
+            host (str): Endereço em que o endpoint HTTP escuta.
+        """
+        self.pipeline = pipeline
+        self.textfile = textfile
+        self.port = port
+        self.host = host
+        self.interval = interval
+
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+        self._planned = 0
+        self._images = {}         # (dose, status) -> contagem
+        self._molecules = {}      # dose -> contagem
+        self._stage_counts = {}   # etapa -> contagens por bucket
+        self._stage_sums = {}     # etapa -> soma das durações
+        self._queue = {'pending': 0, 'in_flight': 0}
+        self._recent = deque()    # (instante, imagens, moléculas) das conclusões recentes
+        self._last_completion = None
+        self._eta = None          # (ETA do modelo de custo em segundos, instante em que foi calculado)
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._server = None
+
+    # --- Atualizações (chamadas pelo executor) ---
+
+    def plan(self, num_tasks: int):
+        """Soma `num_tasks` imagens ao total planejado da execução."""
+        with self._lock:
+            self._planned += num_tasks
+
+    def set_queue_depths(self, pending: int, in_flight: int):
+        """Atualiza a profundidade das filas (pendentes e em processamento)."""
+        with self._lock:
+            self._queue['pending'] = pending
+            self._queue['in_flight'] = in_flight
+
+    def set_eta(self, seconds: float):
+        """
+        Define o ETA pelo modelo de custo do executor; sem ele, o ETA é estimado pela
+        taxa recente de imagens concluídas.
+        """
+        with self._lock:
+            self._eta = (float(seconds), time.time())
+
+    def observe(self, dose, ok: bool, probe: dict = None, images: int = 1):
+        """
+        Registra a conclusão (ou falha) de uma tarefa de `images` imagens (mais de uma
+        nos lotes de atlas) e as latências das suas etapas. Imagens descartadas pelo
+        controle de qualidade são contadas com status 'rejected'.
+        """
+        dose = dose or 'todas'
+        now = time.time()
+        probe = probe or {}
+        with self._lock:
+            rejected = min(int(probe.get('rejected', 0)), images) if ok else 0
+            statuses = {'failed': images} if not ok else {'rejected': rejected, 'ok': images - rejected}
+            for status, count in statuses.items():
+                if count:
+                    self._images[(dose, status)] = self._images.get((dose, status), 0) + count
+            molecules = probe.get('molecules', 0)
+            self._molecules[dose] = self._molecules.get(dose, 0) + molecules
+            for name, seconds in probe.get('stages', {}).items():
+                counts = self._stage_counts.setdefault(name, [0] * (len(LATENCY_BUCKETS) + 1))
+                counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+                self._stage_sums[name] = self._stage_sums.get(name, 0.0) + seconds
+            self._recent.append((now, images, molecules))
+            self._last_completion = now
+
+    # --- Leitura ---
+
+    def _rates(self, now):
+        while self._recent and now - self._recent[0][0] > RATE_WINDOW:
+            self._recent.popleft()
+        if not self._recent:
+            return 0.0, 0.0
+        window = min(RATE_WINDOW, now - self._started_at) or 1e-9
+        images = sum(n for _, n, _ in self._recent)
+        molecules = sum(m for _, _, m in self._recent)
+        return images / window, molecules / window
+
+    def snapshot(self):
+        """Retorna um resumo das métricas atuais (útil para logs e testes)."""
+        now = time.time()
+        with self._lock:
+            done = sum(self._images.values())
+            images_rate, molecules_rate = self._rates(now)
+            remaining = max(0, self._planned - done)
+            eta = remaining / images_rate if images_rate > 0 else None
+            if self._eta is not None:
+                # O ETA do modelo conta para baixo entre as atualizações do executor
+                eta = max(0.0, self._eta[0] - (now - self._eta[1]))
+            return {
+                'planejadas': self._planned,
+                'concluidas': done,
+                'falhas': sum(c for (_, status), c in self._images.items() if status == 'failed'),
+                'rejeitadas': sum(c for (_, status), c in self._images.items() if status == 'rejected'),
+                'imagens_por_s': images_rate,
+                'moleculas_por_s': molecules_rate,
+                'eta_s': eta,
+                'filas': dict(self._queue)
+            }
+
+    def render(self):
+        """Renderiza as métricas no formato texto de exposição do Prometheus."""
+        now = time.time()
+        p = f'pipeline="{_escape(self.pipeline)}"'
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_str = ','.join([p] + labels)
+                lines.append(f"{name}{{{label_str}}} {value}")
+
+        with self._lock:
+            images = sorted(self._images.items())
+            molecules = sorted(self._molecules.items())
+            stage_counts = {k: list(v) for k, v in self._stage_counts.items()}
+            stage_sums = dict(self._stage_sums)
+            last_completion = self._last_completion
+
+        metric('dna_analyzer_images_planned', 'gauge', 'Imagens planejadas na execucao.',
+               [([], snapshot['planejadas'])])
+        metric('dna_analyzer_images_processed_total', 'counter', 'Imagens concluidas por dose e status.',
+               [([f'dose="{_escape(d)}"', f'status="{s}"'], c) for (d, s), c in images])
+        metric('dna_analyzer_molecules_total', 'counter', 'Moleculas encontradas por dose.',
+               [([f'dose="{_escape(d)}"'], c) for d, c in molecules])
+        metric('dna_analyzer_images_per_second', 'gauge', f'Imagens por segundo (janela de {RATE_WINDOW:.0f}s).',
+               [([], f"{snapshot['imagens_por_s']:.6f}")])
+        metric('dna_analyzer_molecules_per_second', 'gauge', f'Moleculas por segundo (janela de {RATE_WINDOW:.0f}s).',
+               [([], f"{snapshot['moleculas_por_s']:.6f}")])
+        metric('dna_analyzer_queue_depth', 'gauge', 'Imagens pendentes e em processamento.',
+               [([f'queue="{q}"'], d) for q, d in sorted(snapshot['filas'].items())])
+        metric('dna_analyzer_eta_seconds', 'gauge', 'Tempo restante estimado (NaN se desconhecido).',
+               [([], f"{snapshot['eta_s']:.1f}" if snapshot['eta_s'] is not None else 'NaN')])
+        metric('dna_analyzer_start_timestamp_seconds', 'gauge', 'Inicio da execucao (epoch).',
+               [([], f"{self._started_at:.3f}")])
+        metric('dna_analyzer_last_completion_timestamp_seconds', 'gauge',
+               'Ultima imagem concluida (epoch); use para alertas de travamento.',
+               [([], f"{last_completion:.3f}" if last_completion else 'NaN')])
+
+        lines.append("# HELP dna_analyzer_stage_seconds Latencia de cada etapa por imagem.")
+        lines.append("# TYPE dna_analyzer_stage_seconds histogram")
+        for name in sorted(stage_counts):
+            counts, cumulative = stage_counts[name], 0
+            labels = f'{p},stage="{_escape(name)}"'
+            for bound, count in zip(LATENCY_BUCKETS, counts):
+                cumulative += count
+                lines.append(f'dna_analyzer_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'dna_analyzer_stage_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+            lines.append(f'dna_analyzer_stage_seconds_sum{{{labels}}} {stage_sums[name]:.6f}')
+            lines.append(f'dna_analyzer_stage_seconds_count{{{labels}}} {cumulative}')
+
+        lines.append(f"# Gerado em {time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(now))}")
+        return "\n".join(lines) + "\n"
+
+    # --- Exportação ---
+
+    def write_textfile(self):
+        """Grava as métricas no arquivo de forma atômica (arquivo temporário + rename)."""
+        if not self.textfile:
+            return
+        directory = os.path.dirname(self.textfile)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.textfile}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, self.textfile)
+
+    def _export_loop(self):
+        while not self._stop.wait(self.interval):
+            self.write_textfile()
+
+    def start(self):
+        """Inicia o endpoint HTTP e/ou a atualização periódica do arquivo."""
+        if self.port is not None:
+            metrics = self
+
+            class MetricsHandler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0] not in ('/', '/metrics'):
+                        self.send_error(404)
+                        return
+                    body = metrics.render().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass  # evita poluir o terminal com cada coleta
+
+            self._server = ThreadingHTTPServer((self.host, self.port), MetricsHandler)
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+            print(f"  Métricas disponíveis em http://{self.host}:{self._server.server_port}/metrics")
+
+        if self.textfile:
+            self.write_textfile()
+            self._thread = threading.Thread(target=self._export_loop, daemon=True)
+            self._thread.start()
+            print(f"  Métricas gravadas em {self.textfile} a cada {self.interval:.0f}s")
+        return self
+
+    def stop(self):
+        """Encerra a exportação, gravando o estado final no arquivo."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.write_textfile()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,351 @@
+# src/dna_analyzer/thinning.py
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+
+try:
+    # Dependência opcional: eixo medial do scikit-image (backend 'medial-axis')
+    from skimage.morphology import medial_axis
+except ImportError:
+    medial_axis = None
+
+# Backend usado quando nenhum é informado. 'auto' usa o escolhido pela última calibração
+# (`python main.py calibrate-thinning`) ou, sem calibração, o primeiro backend exato
+# disponível ('zhang-suen' com opencv-contrib, senão 'lut')
+DEFAULT_THINNING_BACKEND = 'auto'
+
+# Arquivo gravado pela calibração e lido pelo modo 'auto'
+THINNING_CALIBRATION_FILE = './results/thinning_calibration/calibracao_thinning.json'
+
+# Erro relativo máximo do comprimento (pixels do esqueleto por imagem) aceito na calibração,
+# em relação ao Zhang-Suen de referência
+THINNING_TOLERANCE = 0.01
+
+# Os componentes são esqueletizados nos seus retângulos envolventes quando a soma das
+# áreas desses retângulos é menor que esta fração do quadro; acima dela (ex: malhas que
+# ocupam a imagem toda), uma única chamada no quadro inteiro é mais rápida
+COMPONENT_BOX_FRACTION = 0.5
+
+# Pixels por faixa em `iter_region_skeletons` (imagens lidas por região, ver HeightMap) e
+# folga da margem de cada faixa além de 2x a espessura dos objetos
+REGION_PIXELS = 8 * 1024 * 1024
+REGION_HALO_SLACK = 8
+
+
+def _zhang_suen_lut(iteration):
+    """
+    Tabela das vizinhanças 3x3 removíveis em uma subiteração do Zhang-Suen. O índice
+    codifica os vizinhos p2..p9 (N, NE, L, SE, S, SO, O, NO) nos bits 0..7.
+    """
+    lut = np.zeros(256, dtype=np.uint8)
+    for code in range(256):
+        p2, p3, p4, p5, p6, p7, p8, p9 = ((code >> bit) & 1 for bit in range(8))
+        ring = (p2, p3, p4, p5, p6, p7, p8, p9, p2)
+        transitions = sum(ring[k] == 0 and ring[k + 1] == 1 for k in range(8))
+        neighbours = p2 + p3 + p4 + p5 + p6 + p7 + p8 + p9
+        if iteration == 0:
+            m1, m2 = p2 * p4 * p6, p4 * p6 * p8
+        else:
+            m1, m2 = p2 * p4 * p8, p2 * p6 * p8
+        lut[code] = transitions == 1 and 2 <= neighbours <= 6 and m1 == 0 and m2 == 0
+    return lut
+
+
+_ZHANG_SUEN_LUTS = (_zhang_suen_lut(0), _zhang_suen_lut(1))
+
+
+class ThinningBackend:
+    """
+    Interface dos algoritmos de thinning. `thin` esqueletiza uma imagem binária
+    (uint8, pixels > 127 são objeto) e devolve o esqueleto em 0/255; `skeletonize`
+    aplica `thin` só nos retângulos envolventes dos componentes quando eles cobrem
+    pouco do quadro.
+
+    Atributos:
+        name (str): Nome do backend (chave de THINNING_BACKENDS).
+        exact (bool): Se o esqueleto é idêntico ao do `cv2.ximgproc.thinning`
+            (Zhang-Suen), a referência das pipelines.
+    """
+
+    name = None
+    exact = False
+
+    @classmethod
+    def available(cls):
+        """Se as dependências do backend estão instaladas."""
+        return True
+
+    def thin(self, binary_image):
+        raise NotImplementedError
+
+    def skeletonize(self, binary_image):
+        """
+        Esqueleto da imagem binária, idêntico ao de `thin(binary_image)`.
+
+        Componentes 8-conexos distintos nunca são vizinhos, então o esqueleto de cada um
+        depende só dos seus pixels: cada componente é esqueletizado em um recorte do seu
+        retângulo envolvente com 1 pixel de margem (limitado à imagem), e as iterações
+        do thinning percorrem só esse recorte, em vez do quadro inteiro a cada passada.
+        Com mais de uma thread do OpenCV (`cv2.getNumThreads`), os recortes são
+        divididos entre elas (o OpenCV libera o GIL); o resultado não muda.
+        """
+        height, width = binary_image.shape[:2]
+        foreground = binary_image > 127
+        if cv2.countNonZero(foreground.view(np.uint8)) >= COMPONENT_BOX_FRACTION * height * width:
+            return self.thin(binary_image)
+
+        num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(foreground.view(np.uint8), connectivity=8)
+        if num_labels <= 1 or (stats[1:, cv2.CC_STAT_WIDTH] * stats[1:, cv2.CC_STAT_HEIGHT]).sum() \
+                >= COMPONENT_BOX_FRACTION * height * width:
+            return self.thin(binary_image)
+
+        boxes = []
+        for label in range(1, num_labels):
+            x, y, w, h = stats[label, :4]
+            boxes.append((label, max(y - 1, 0), min(y + h + 1, height), max(x - 1, 0), min(x + w + 1, width)))
+
+        def thin_box(box):
+            label, y0, y1, x0, x1 = box
+            return self.thin(np.where(labels[y0:y1, x0:x1] == label, np.uint8(255), np.uint8(0)))
+
+        threads = min(cv2.getNumThreads(), len(boxes))
+        if threads > 1:
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                crops = list(pool.map(thin_box, boxes))
+        else:
+            crops = map(thin_box, boxes)
+
+        # Os retângulos com margem podem se sobrepor: a junção é feita nesta thread
+        skeleton = np.zeros((height, width), dtype=np.uint8)
+        for (_, y0, y1, x0, x1), crop in zip(boxes, crops):
+            skeleton[y0:y1, x0:x1] |= crop
+        return skeleton
+
+    def iter_region_skeletons(self, segment_rows, shape, rows=None):
+        """
+        Esqueletiza uma imagem binária lida por faixas, sem montá-la inteira:
+        `segment_rows(início, fim)` devolve as linhas [início, fim) da binária (ex:
+        `Segmenter.segment_region` de um HeightMap).
+
+        Cada faixa é esqueletizada com uma margem de linhas acima e abaixo, descartada no
+        fim. O thinning retira uma camada dos objetos a cada passada, então a vizinhança
+        que decide o esqueleto de uma linha cresce com a espessura dos objetos: a margem
+        de cada faixa é 2 * (maior distância de um pixel do objeto ao fundo, na faixa) +
+        REGION_HALO_SLACK, aumentada até cobrir essa espessura (no limite, a imagem inteira
+        quando um objeto não tem fundo na faixa, ex: uma região saturada). A memória fica
+        limitada à faixa e às margens, não ao tamanho da imagem.
+
+        Args:
+            segment_rows (callable): Função (início, fim) -> linhas da imagem binária.
+            shape (tuple): (altura, largura) da imagem.
+            rows (int): Linhas por faixa (padrão: REGION_PIXELS / largura).
+
+        Yields:
+            tuple: (início, fim, linhas [início, fim) do esqueleto, uint8 0/255).
+        """
+        height, width = shape[:2]
+        rows = rows or max(REGION_PIXELS // width, REGION_HALO_SLACK)
+        halo = REGION_HALO_SLACK
+        for start in range(0, height, rows):
+            stop = min(start + rows, height)
+            while True:
+                top, bottom = max(start - halo, 0), min(stop + halo, height)
+                binary = segment_rows(top, bottom)
+                if top == 0 and bottom == height:
+                    break
+                # Bordas da faixa contam como objeto: a espessura medida nunca é menor que a real
+                depth = cv2.distanceTransform(binary, cv2.DIST_C, 3).max()
+                needed = 2 * depth + REGION_HALO_SLACK if np.isfinite(depth) and depth < height else height
+                if needed <= halo:
+                    break
+                halo = int(needed)
+            yield start, stop, self.skeletonize(binary)[start - top:stop - top]
+            # A faixa seguinte parte da mesma margem (objetos vizinhos costumam ter espessura
+            # parecida), limitada à altura da faixa
+            halo = min(halo, max(rows, REGION_HALO_SLACK))
+
+
+class ZhangSuenThinning(ThinningBackend):
+    """Zhang-Suen do OpenCV (`cv2.ximgproc.thinning`, requer opencv-contrib-python)."""
+
+    name = 'zhang-suen'
+    exact = True
+
+    @classmethod
+    def available(cls):
+        return hasattr(cv2, 'ximgproc')
+
+    def thin(self, binary_image):
+        return cv2.ximgproc.thinning(binary_image, thinningType=cv2.ximgproc.THINNING_ZHANGSUEN)
+
+
+class GuoHallThinning(ThinningBackend):
+    """Guo-Hall do OpenCV (requer opencv-contrib-python); esqueletos um pouco mais curtos."""
+
+    name = 'guo-hall'
+
+    @classmethod
+    def available(cls):
+        return hasattr(cv2, 'ximgproc')
+
+    def thin(self, binary_image):
+        return cv2.ximgproc.thinning(binary_image, thinningType=cv2.ximgproc.THINNING_GUOHALL)
+
+
+class LookupTableThinning(ThinningBackend):
+    """
+    Zhang-Suen vetorizado em NumPy, sem opencv-contrib: cada subiteração codifica a
+    vizinhança 3x3 de todos os pixels em um byte e consulta a tabela de remoção.
+    Como só os pixels vizinhos de uma remoção recente podem mudar de estado, cada
+    passada se limita ao retângulo das remoções das duas passadas anteriores. O
+    resultado é idêntico ao do `cv2.ximgproc.thinning` (inclusive a borda da imagem,
+    que não é alterada).
+    """
+
+    name = 'lut'
+    exact = True
+
+    def thin(self, binary_image):
+        pixels = (binary_image > 127).astype(np.uint8)
+        height, width = pixels.shape
+        if height < 3 or width < 3:
+            return pixels * 255
+
+        # Retângulos (linhas e colunas do interior) alterados nas duas últimas passadas
+        interior = (1, height - 1, 1, width - 1)
+        changes = [interior, interior]
+        step = 0
+        while changes[0] is not None or changes[1] is not None:
+            boxes = [box for box in changes if box is not None]
+            r0 = max(min(box[0] for box in boxes) - 1, 1)
+            r1 = min(max(box[1] for box in boxes) + 1, height - 1)
+            c0 = max(min(box[2] for box in boxes) - 1, 1)
+            c1 = min(max(box[3] for box in boxes) + 1, width - 1)
+
+            window = pixels[r0 - 1:r1 + 1, c0 - 1:c1 + 1]
+            code = (window[:-2, 1:-1] | (window[:-2, 2:] << 1) | (window[1:-1, 2:] << 2)
+                    | (window[2:, 2:] << 3) | (window[2:, 1:-1] << 4) | (window[2:, :-2] << 5)
+                    | (window[1:-1, :-2] << 6) | (window[:-2, :-2] << 7))
+            inner = window[1:-1, 1:-1]
+            marker = _ZHANG_SUEN_LUTS[step % 2][code] & inner
+            box = None
+            if marker.any():
+                inner &= ~marker
+                rows, cols = np.flatnonzero(marker.any(axis=1)), np.flatnonzero(marker.any(axis=0))
+                box = (r0 + rows[0], r0 + rows[-1] + 1, c0 + cols[0], c0 + cols[-1] + 1)
+            changes = [changes[1], box]
+            step += 1
+        return pixels * 255
+
+
+class MedialAxisThinning(ThinningBackend):
+    """Eixo medial do scikit-image (instale com `pip install -e .[thinning]`)."""
+
+    name = 'medial-axis'
+
+    @classmethod
+    def available(cls):
+        return medial_axis is not None
+
+    def thin(self, binary_image):
+        return medial_axis(binary_image > 127).astype(np.uint8) * 255
+
+
+THINNING_BACKENDS = {backend.name: backend for backend in
+                     (ZhangSuenThinning, GuoHallThinning, LookupTableThinning, MedialAxisThinning)}
+
+# Backend escolhido pelo modo 'auto' neste processo (lido uma única vez)
+_auto_backend = None
+
+
+def available_thinning_backends():
+    """Nomes dos backends cujas dependências estão instaladas."""
+    return [name for name, backend in THINNING_BACKENDS.items() if backend.available()]
+
+
+def _resolve_auto():
+    """Backend da calibração salva ou, sem ela, o primeiro backend exato disponível."""
+    global _auto_backend
+    if _auto_backend is None:
+        choice = None
+        if os.path.exists(THINNING_CALIBRATION_FILE):
+            with open(THINNING_CALIBRATION_FILE, encoding='utf-8') as f:
+                choice = json.load(f).get('backend')
+        if choice not in THINNING_BACKENDS or not THINNING_BACKENDS[choice].available():
+            choice = next(name for name, backend in THINNING_BACKENDS.items() if backend.exact and backend.available())
+        _auto_backend = choice
+    return _auto_backend
+
+
+def get_thinning_backend(name=None):
+    """
+    Instancia um backend de thinning pelo nome.
+
+    Args:
+        name (str): Chave de THINNING_BACKENDS, 'auto' ou None (DEFAULT_THINNING_BACKEND).
+
+    Returns:
+        ThinningBackend: O backend.
+    """
+    name = name or DEFAULT_THINNING_BACKEND
+    if name == 'auto':
+        name = _resolve_auto()
+    if name not in THINNING_BACKENDS:
+        raise ValueError(f"Backend de thinning desconhecido: '{name}'. Use um de: {', '.join(THINNING_BACKENDS)}.")
+    backend = THINNING_BACKENDS[name]
+    if not backend.available():
+        raise ValueError(f"O backend de thinning '{name}' não está disponível neste ambiente "
+                         f"(disponíveis: {', '.join(available_thinning_backends())}).")
+    return backend()
+
+
+def calibrate_thinning(binary_images, tolerance=THINNING_TOLERANCE, repeats=3):
+    """
+    Mede o tempo e o erro de cada backend disponível em imagens binárias de amostra e
+    escolhe o mais rápido cujo erro fique dentro da tolerância.
+
+    O erro de uma imagem é a diferença relativa entre o número de pixels do esqueleto
+    e o do Zhang-Suen de referência (o primeiro backend exato disponível); o tempo é o
+    melhor de `repeats` execuções de `skeletonize` sobre todas as imagens.
+
+    Args:
+        binary_images (list): Imagens binárias (uint8, 0/255).
+        tolerance (float): Erro relativo máximo aceito (pior imagem).
+        repeats (int): Repetições da medida de tempo.
+
+    Returns:
+        dict: {'backend': escolhido, 'referencia', 'tolerancia', 'backends': {nome:
+        {'tempo_s', 'erro_max', 'erro_mediano', 'identico'}}}.
+    """
+    reference = get_thinning_backend(next(name for name in available_thinning_backends()
+                                          if THINNING_BACKENDS[name].exact))
+    reference_skeletons = [reference.skeletonize(image) for image in binary_images]
+    reference_counts = np.array([np.count_nonzero(s) for s in reference_skeletons], dtype=np.float64)
+
+    report = {}
+    for name in available_thinning_backends():
+        backend = get_thinning_backend(name)
+        elapsed = float('inf')
+        for _ in range(max(1, repeats)):
+            start = time.perf_counter()
+            skeletons = [backend.skeletonize(image) for image in binary_images]
+            elapsed = min(elapsed, time.perf_counter() - start)
+        counts = np.array([np.count_nonzero(s) for s in skeletons], dtype=np.float64)
+        errors = np.abs(counts - reference_counts) / np.maximum(reference_counts, 1)
+        report[name] = {
+            'tempo_s': round(elapsed, 4),
+            'erro_max': float(errors.max()) if len(errors) else 0.0,
+            'erro_mediano': float(np.median(errors)) if len(errors) else 0.0,
+            'identico': all(np.array_equal(a > 0, b > 0) for a, b in zip(skeletons, reference_skeletons))
+        }
+
+    accepted = [name for name, row in report.items() if row['erro_max'] <= tolerance]
+    return {
+        'backend': min(accepted, key=lambda name: report[name]['tempo_s']),
+        'referencia': reference.name,
+        'tolerancia': tolerance,
+        'backends': report
+    }
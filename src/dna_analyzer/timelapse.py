@@ -0,0 +1,330 @@
+# src/dna_analyzer/timelapse.py
+import os
+import cv2
+import numpy as np
+from .analyzer import Analyzer
+from .atlas import skeleton_pixel_counts, molecule_mask
+from .feature_extractor import MIN_MOLECULE_AREA
+from .io import Loader
+from .io.height_map import HEIGHT_MAP_STRIP_ROWS, tifffile
+
+# Extensões lidas como pilhas de quadros (uma imagem por página/plano); as demais são
+# abertas como vídeo pelo OpenCV. Uma pasta é lida como uma imagem por quadro (em ordem de nome).
+STACK_EXTENSIONS = ('.npy', '.tif', '.tiff')
+FRAME_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.npy')
+
+# Lado (px) dos blocos em que a diferença entre quadros é avaliada: só os blocos com algum
+# pixel (da imagem desfocada) diferente do último quadro segmentado por mais que
+# CHANGE_THRESHOLD níveis de cinza são segmentados de novo
+CHANGE_TILE_SIZE = 32
+CHANGE_THRESHOLD = 8
+
+# Associação entre quadros: pares com IoU dos retângulos envolventes de pelo menos
+# TRACK_MIN_IOU são associados primeiro (maior sobreposição antes); os restantes, pelo
+# centróide mais próximo até TRACK_MAX_DISTANCE px. Uma trajetória sem molécula associada
+# por mais de TRACK_MAX_GAP quadros é encerrada.
+TRACK_MIN_IOU = 0.3
+TRACK_MAX_DISTANCE = 10.0
+TRACK_MAX_GAP = 2
+
+
+class FrameSequence:
+    """
+    Quadros de um filme de HS-AFM em escala de cinza (uint8), lidos um por vez: uma pilha
+    (.npy 3D com memmap, TIFF de várias páginas), um vídeo (qualquer formato do OpenCV)
+    ou uma pasta com uma imagem por quadro.
+
+    Pilhas em float ou 16 bits são levadas a 0-255 com a faixa de alturas da pilha
+    inteira (e não de cada quadro), para que o mesmo relevo tenha o mesmo nível de cinza
+    em todos os quadros.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Arquivo da pilha/vídeo ou pasta de quadros.
+
+        Raises:
+            ValueError: Se o arquivo não puder ser lido como uma sequência de quadros.
+        """
+        self.path = path
+        self.fps = None
+        self._stack = None
+        self._files = None
+        extension = os.path.splitext(path)[1].lower()
+        if os.path.isdir(path):
+            self._files = sorted(os.path.join(path, f) for f in os.listdir(path)
+                                 if f.lower().endswith(FRAME_EXTENSIONS))
+        elif extension == '.npy':
+            try:
+                self._stack = np.load(path, mmap_mode='r', allow_pickle=False)
+            except (OSError, ValueError) as error:
+                raise ValueError(f"Não foi possível ler {path}: {error}") from error
+        elif extension in ('.tif', '.tiff'):
+            if tifffile is not None:
+                self._stack = tifffile.imread(path)
+            else:
+                ok, pages = cv2.imreadmulti(path, flags=cv2.IMREAD_UNCHANGED | cv2.IMREAD_ANYDEPTH)
+                if not ok:
+                    raise ValueError(f"Não foi possível ler {path}.")
+                self._stack = np.stack([cv2.cvtColor(p, cv2.COLOR_BGR2GRAY) if p.ndim == 3 else p for p in pages])
+        else:
+            capture = cv2.VideoCapture(path)
+            if not capture.isOpened():
+                raise ValueError(f"Não foi possível abrir o vídeo {path}.")
+            self.fps = capture.get(cv2.CAP_PROP_FPS) or None
+            capture.release()
+        if self._stack is not None:
+            if self._stack.ndim == 2:
+                self._stack = self._stack[np.newaxis]
+            if self._stack.ndim != 3:
+                raise ValueError(f"Pilha com {self._stack.ndim} dimensões em {path}; esperado (quadros, altura, largura).")
+        self._range = None
+
+    def _scale(self, frame):
+        if frame.dtype == np.uint8:
+            return np.ascontiguousarray(frame)
+        if self._range is None:
+            # Faixa da pilha inteira, lida em blocos de quadros
+            step = max(1, HEIGHT_MAP_STRIP_ROWS * 1024 // max(self._stack[0].size, 1))
+            low, high = np.inf, -np.inf
+            for start in range(0, len(self._stack), step):
+                block = np.asarray(self._stack[start:start + step])
+                block = block[np.isfinite(block)] if block.dtype.kind == 'f' else block
+                if block.size:
+                    low, high = min(low, block.min()), max(high, block.max())
+            self._range = (float(low), float(high)) if low <= high else (0.0, 0.0)
+        low, high = self._range
+        scaled = np.asarray(frame, dtype=np.float32) - low
+        if high > low:
+            scaled *= 255.0 / (high - low)
+        scaled += 0.5
+        np.nan_to_num(scaled, copy=False, nan=0.0)
+        np.clip(scaled, 0, 255, out=scaled)
+        return scaled.astype(np.uint8)
+
+    def __iter__(self):
+        if self._stack is not None:
+            for frame in self._stack:
+                yield self._scale(frame)
+        elif self._files is not None:
+            loader = Loader()
+            for frame_path in self._files:
+                frame = loader.load_grayscale(frame_path)
+                if frame is not None:
+                    yield frame
+        else:
+            capture = cv2.VideoCapture(self.path)
+            try:
+                while True:
+                    ok, frame = capture.read()
+                    if not ok:
+                        break
+                    yield cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+            finally:
+                capture.release()
+
+
+def _box_iou(boxes_a, boxes_b):
+    """IoU de todos os pares de retângulos (x, y, largura, altura): matriz len(a) x len(b)."""
+    a, b = boxes_a[:, np.newaxis, :], boxes_b[np.newaxis, :, :]
+    overlap_w = np.clip(np.minimum(a[..., 0] + a[..., 2], b[..., 0] + b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    overlap_h = np.clip(np.minimum(a[..., 1] + a[..., 3], b[..., 1] + b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    intersection = overlap_w * overlap_h
+    union = a[..., 2] * a[..., 3] + b[..., 2] * b[..., 3] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1), 0.0)
+
+
+class MoleculeTracker:
+    """
+    Associa as moléculas de quadros consecutivos: primeiro pela sobreposição dos
+    retângulos envolventes (IoU), depois pelo centróide mais próximo. As matrizes de
+    IoU e distância entre todas as moléculas de dois quadros são calculadas de uma vez.
+    """
+
+    def __init__(self, min_iou: float = TRACK_MIN_IOU, max_distance: float = TRACK_MAX_DISTANCE,
+                 max_gap: int = TRACK_MAX_GAP):
+        self.min_iou = min_iou
+        self.max_distance = max_distance
+        self.max_gap = max_gap
+        self._tracks = {}   # id -> {'caixa', 'centroide', 'quadro'}
+        self._next_id = 1
+
+    def update(self, frame_index, boxes, centroids):
+        """
+        Associa as moléculas de um quadro às trajetórias abertas.
+
+        Args:
+            frame_index (int): Índice do quadro.
+            boxes (np.ndarray): Retângulos (n x 4: x, y, largura, altura).
+            centroids (np.ndarray): Centróides (n x 2).
+
+        Returns:
+            list: O id da trajetória de cada molécula (novos ids para as não associadas).
+        """
+        # Encerra as trajetórias sem molécula há mais de max_gap quadros
+        self._tracks = {track_id: track for track_id, track in self._tracks.items()
+                        if frame_index - track['quadro'] <= self.max_gap + 1}
+        ids = [None] * len(boxes)
+        track_ids = list(self._tracks)
+        if track_ids and len(boxes):
+            previous_boxes = np.array([self._tracks[t]['caixa'] for t in track_ids], dtype=np.float64)
+            previous_centroids = np.array([self._tracks[t]['centroide'] for t in track_ids], dtype=np.float64)
+            iou = _box_iou(np.asarray(boxes, dtype=np.float64), previous_boxes)
+            distance = np.linalg.norm(np.asarray(centroids, dtype=np.float64)[:, np.newaxis, :]
+                                      - previous_centroids[np.newaxis, :, :], axis=2)
+            taken = set()
+            for scores, valid, descending in ((iou, iou >= self.min_iou, True),
+                                              (distance, distance <= self.max_distance, False)):
+                candidates = np.argwhere(valid)
+                order = np.argsort(scores[valid])
+                for row, col in candidates[order[::-1] if descending else order]:
+                    if ids[row] is None and col not in taken:
+                        ids[row] = track_ids[col]
+                        taken.add(col)
+        for index, (box, centroid) in enumerate(zip(boxes, centroids)):
+            if ids[index] is None:
+                ids[index] = self._next_id
+                self._next_id += 1
+            self._tracks[ids[index]] = {'caixa': tuple(box), 'centroide': tuple(centroid), 'quadro': frame_index}
+        return ids
+
+
+class TimeLapseAnalyzer:
+    """
+    Analisa um filme quadro a quadro reaproveitando o trabalho dos quadros anteriores.
+
+    O primeiro quadro é segmentado por inteiro (desfoque, limiar adaptativo e abertura,
+    como em `measure_molecule_lengths`). Nos seguintes, a imagem desfocada é comparada,
+    em blocos de CHANGE_TILE_SIZE px, com a do último quadro segmentado em cada bloco, e
+    só os blocos alterados e uma margem do alcance do limiar e da abertura ao redor deles
+    são segmentados de novo. Moléculas cujo retângulo envolvente (com 1 px de margem) não
+    toca um bloco alterado têm a mesma máscara do quadro anterior e reaproveitam o
+    comprimento já medido; o thinning só é feito nas moléculas novas ou alteradas.
+    Com `change_threshold=0`, o resultado de cada quadro é idêntico ao da segmentação
+    completa.
+    """
+
+    def __init__(self, conversion_factor: float, analyzer: Analyzer = None, block_size: int = 11, C: float = 2,
+                 cleanup_kernel_size=(2, 2), change_threshold: int = CHANGE_THRESHOLD,
+                 tile_size: int = CHANGE_TILE_SIZE, tracker: MoleculeTracker = None):
+        """
+        Args:
+            conversion_factor (float): nm por pixel.
+            analyzer (Analyzer): Componentes de pré-processamento, segmentação e thinning.
+            change_threshold (int): Diferença (níveis de cinza) a partir da qual um bloco
+                é segmentado de novo.
+            tile_size (int): Lado dos blocos de comparação.
+            tracker (MoleculeTracker): Associação das moléculas entre quadros.
+        """
+        self.conversion_factor = conversion_factor
+        self.analyzer = analyzer or Analyzer()
+        self.block_size = block_size
+        self.C = C
+        self.cleanup_kernel_size = cleanup_kernel_size
+        self.change_threshold = change_threshold
+        self.tile_size = tile_size
+        self.tracker = tracker or MoleculeTracker()
+        # Alcance da segmentação a partir da imagem já desfocada (limiar + abertura)
+        self.halo = self.analyzer.segmenter.region_halo((1, 1), block_size, cleanup_kernel_size)
+        self._reference = None   # imagem desfocada que gerou a binária atual, bloco a bloco
+        self._binary = None
+        self._lengths = {}       # (x, y, largura, altura, área) -> pixels do esqueleto
+        self.frame_index = -1
+
+    def _segment(self, blurred):
+        return self.analyzer.segmenter.segment_with_adaptive_threshold(blurred, self.block_size, self.C,
+                                                                       self.cleanup_kernel_size)
+
+    def _changed_tiles(self, blurred):
+        """Máscara (em blocos) dos blocos com algum pixel alterado além do limiar."""
+        size = self.tile_size
+        height, width = blurred.shape
+        changed = cv2.absdiff(blurred, self._reference) > self.change_threshold
+        rows, cols = -(-height // size), -(-width // size)
+        padded = np.zeros((rows * size, cols * size), dtype=bool)
+        padded[:height, :width] = changed
+        return padded.reshape(rows, size, cols, size).any(axis=(1, 3))
+
+    def _update_regions(self, blurred, tiles):
+        """Segmenta de novo os grupos de blocos alterados e devolve a máscara de pixels alterados."""
+        size, (height, width) = self.tile_size, blurred.shape
+        changed = np.zeros((height, width), dtype=bool)
+        num_groups, _, stats, _ = cv2.connectedComponentsWithStats(tiles.astype(np.uint8), connectivity=8)
+        halo = self.halo
+        for tx, ty, tw, th, _ in stats[1:num_groups]:
+            # A binária pode mudar até `halo` px além dos blocos alterados; essa faixa é
+            # segmentada com mais `halo` px de vizinhança, para ficar idêntica à do quadro inteiro
+            x0, y0 = max(tx * size - halo, 0), max(ty * size - halo, 0)
+            x1, y1 = min((tx + tw) * size + halo, width), min((ty + th) * size + halo, height)
+            rx0, ry0 = max(x0 - halo, 0), max(y0 - halo, 0)
+            rx1, ry1 = min(x1 + halo, width), min(y1 + halo, height)
+            binary = self._segment(np.ascontiguousarray(blurred[ry0:ry1, rx0:rx1]))
+            self._binary[y0:y1, x0:x1] = binary[y0 - ry0:y1 - ry0, x0 - rx0:x1 - rx0]
+            self._reference[y0:y1, x0:x1] = blurred[y0:y1, x0:x1]
+            changed[y0:y1, x0:x1] = True
+        return changed
+
+    def process(self, frame):
+        """
+        Analisa o próximo quadro.
+
+        Args:
+            frame (np.ndarray): Quadro em escala de cinza (uint8).
+
+        Returns:
+            dict: 'moleculas' (uma linha por molécula: 'Molécula', 'Comprimento',
+            'Área', 'Centroide X', 'Centroide Y', 'Reaproveitada'), 'fracao_segmentada'
+            (fração dos pixels segmentados de novo) e 'reaproveitadas' (moléculas cujo
+            comprimento veio do quadro anterior).
+        """
+        self.frame_index += 1
+        blurred = self.analyzer.preprocessor.apply_gaussian_blur(frame)
+        if self._reference is None or self._reference.shape != blurred.shape:
+            self._reference = blurred.copy()
+            self._binary = self._segment(blurred)
+            changed = np.ones(blurred.shape, dtype=bool)
+        else:
+            changed = self._update_regions(blurred, self._changed_tiles(blurred))
+
+        contours, _ = cv2.findContours(self._binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        height, width = blurred.shape
+        molecules, pending = [], []
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            if area < MIN_MOLECULE_AREA:
+                continue
+            x, y, w, h = cv2.boundingRect(contour)
+            key = (x, y, w, h, area)
+            moments = cv2.moments(contour)
+            centroid = ((moments['m10'] / moments['m00'], moments['m01'] / moments['m00']) if moments['m00']
+                        else (x + w / 2, y + h / 2))
+            # A máscara (e o esqueleto) só depende dos pixels do retângulo com 1 px de margem
+            untouched = not changed[max(y - 1, 0):min(y + h + 1, height), max(x - 1, 0):min(x + w + 1, width)].any()
+            reused = untouched and key in self._lengths
+            molecules.append({'chave': key, 'contorno': contour, 'caixa': (x, y, w, h), 'centroide': centroid,
+                              'reaproveitada': reused})
+            if not reused:
+                pending.append(len(molecules) - 1)
+
+        lengths = {key: self._lengths[key] for key in (m['chave'] for m in molecules if m['reaproveitada'])}
+        if pending:
+            counts = skeleton_pixel_counts(self.analyzer.extractor,
+                                           [molecule_mask(molecules[i]['contorno'], blurred.shape) for i in pending])
+            lengths.update((molecules[i]['chave'], int(count)) for i, count in zip(pending, counts))
+        self._lengths = lengths
+
+        # Como em `measure_molecule_lengths`, moléculas sem esqueleto não são medidas
+        molecules = [m for m in molecules if self._lengths[m['chave']] > 0]
+        ids = self.tracker.update(self.frame_index, np.array([m['caixa'] for m in molecules]).reshape(-1, 4),
+                                  np.array([m['centroide'] for m in molecules]).reshape(-1, 2))
+        rows = [{
+            'Molécula': track_id,
+            'Comprimento': self._lengths[m['chave']] * self.conversion_factor,
+            'Área': m['chave'][4],
+            'Centroide X': round(m['centroide'][0], 2),
+            'Centroide Y': round(m['centroide'][1], 2),
+            'Reaproveitada': m['reaproveitada']
+        } for m, track_id in zip(molecules, ids)]
+        return {'moleculas': rows, 'fracao_segmentada': float(changed.mean()),
+                'reaproveitadas': sum(m['reaproveitada'] for m in molecules)}
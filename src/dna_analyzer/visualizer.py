@@ -6,6 +6,7 @@ import numpy as np
 import seaborn as sns
 import re
 import pandas as pd
+from .sparse_skeleton import SparseSkeleton
 
 class Visualizer:
     """Classe para criar visualizações dos resultados da análise."""
@@ -38,6 +39,18 @@ class Visualizer:
         cv2.drawContours(rna_image, rna_contours, -1, self.cv2_rna_color, self.thickness)
         
         return dna_image, rna_image
+
+    def draw_contour_store(self, base_image, contours):
+        """
+        Redesenha as sobreposições DNA/RNA a partir de um ContourStore salvo (coluna
+        'classe'), sem segmentar a imagem novamente.
+
+        Returns:
+            tuple: Uma tupla contendo a imagem com contornos de DNA e a com de RNA.
+        """
+        classes = contours.metadata['classe']
+        return self.draw_classified_contours(base_image, contours.select(classes == 'DNA').contours(),
+                                             contours.select(classes == 'RNA').contours())
     
 
     def plot_edge_comparison(self, original_image, edge_results: dict, save_path: str = None, show_plot: bool = True):
@@ -158,7 +171,11 @@ class Visualizer:
     def plot_skeleton_overlay(self, original_image, skeleton_image, dose_label="", thicken_kernel_size=(2, 2)):
         """
         Cria uma sobreposição do esqueleto na imagem original e exibe um gráfico comparativo.
+        `skeleton_image` pode ser a imagem do esqueleto ou um SparseSkeleton.
         """
+        if isinstance(skeleton_image, SparseSkeleton):
+            skeleton_image = skeleton_image.to_image()
+
         # Engrossa o esqueleto para melhor visualização
         if thicken_kernel_size:
             kernel = np.ones(thicken_kernel_size, np.uint8)
@@ -0,0 +1,164 @@
+# src/dna_analyzer/watcher.py
+import os
+import time
+
+try:
+    # Dependência opcional: notificações do kernel (Linux) via inotify
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+
+class FolderWatcher:
+    """
+    Observa um diretório e informa quais arquivos novos terminaram de ser gravados.
+
+    Usa inotify quando o pacote `inotify_simple` está disponível (Linux) e, caso
+    contrário, recorre a uma varredura periódica do diretório. Em ambos os modos,
+    um arquivo só é entregue depois que seu tamanho e data de modificação ficam
+    estáveis por `settle_time` segundos, evitando ler imagens parcialmente gravadas.
+    """
+
+    def __init__(self, directory: str, extensions=('.png', '.jpg', '.jpeg'),
+                 settle_time: float = 2.0, poll_interval: float = 1.0,
+                 process_existing=False, use_inotify: bool = True,
+                 max_retries: int = 3):
+        """
+        Inicializa o observador.
+
+        Args:
+            directory (str): O diretório a ser observado (ex: './data/raw').
+            extensions (tuple): Extensões de arquivo consideradas imagens.
+            settle_time (float): Segundos sem alteração para considerar o arquivo completo.
+            poll_interval (float): Intervalo (s) entre verificações do diretório.
+            process_existing (bool | callable): Se True, os arquivos já presentes também são
+                entregues; se for uma função `f(caminho)`, só aqueles em que ela retorna True
+                (ex: os que ainda não constam dos resultados de uma execução anterior).
+            use_inotify (bool): Permite desativar o inotify e forçar a varredura periódica.
+            max_retries (int): Quantas vezes um arquivo pode ser reenfileirado via `requeue`.
+        """
+        self.directory = directory
+        self.extensions = tuple(ext.lower() for ext in extensions)
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.max_retries = max_retries
+
+        self._pending = {}   # caminho -> (tamanho, mtime, instante da última alteração)
+        self._retries = {}
+        self._seen = set()
+
+        self._inotify = None
+        if use_inotify and INotify is not None:
+            self._inotify = INotify()
+            watch_flags = inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO | inotify_flags.CREATE
+            self._inotify.add_watch(directory, watch_flags)
+
+        # Sem process_existing, o conteúdo atual do diretório é o "arquivo histórico"
+        # e nunca é reprocessado.
+        for path in self._list_images():
+            if process_existing(path) if callable(process_existing) else process_existing:
+                self._touch(path)
+            else:
+                self._seen.add(path)
+
+    @property
+    def mode(self):
+        """Retorna o mecanismo de detecção em uso ('inotify' ou 'polling')."""
+        return 'inotify' if self._inotify is not None else 'polling'
+
+    def _is_image(self, filename: str):
+        return filename.lower().endswith(self.extensions) and not filename.startswith('.')
+
+    def _list_images(self):
+        with os.scandir(self.directory) as entries:
+            return [entry.path for entry in entries if entry.is_file() and self._is_image(entry.name)]
+
+    def _touch(self, path: str):
+        """Registra (ou atualiza) um arquivo candidato na fila de espera."""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self._pending.pop(path, None)
+            return
+        previous = self._pending.get(path)
+        if previous is None or previous[:2] != (st.st_size, st.st_mtime):
+            self._pending[path] = (st.st_size, st.st_mtime, time.monotonic())
+
+    def _collect_events(self, timeout: float):
+        """Atualiza a fila de candidatos via inotify ou varredura do diretório."""
+        if self._inotify is not None:
+            for event in self._inotify.read(timeout=int(timeout * 1000)):
+                if event.name and self._is_image(event.name):
+                    path = os.path.join(self.directory, event.name)
+                    if path not in self._seen:
+                        self._touch(path)
+            # Arquivos ainda em gravação não geram novos eventos até o CLOSE_WRITE,
+            # por isso os pendentes são reavaliados a cada chamada.
+            for path in list(self._pending):
+                self._touch(path)
+        else:
+            time.sleep(timeout)
+            for path in self._list_images():
+                if path not in self._seen:
+                    self._touch(path)
+
+    def poll(self, timeout: float = None):
+        """
+        Aguarda até `timeout` segundos por eventos e retorna os arquivos prontos.
+
+        Returns:
+            list: Caminhos dos arquivos cujo conteúdo está estável, em ordem de chegada.
+        """
+        self._collect_events(self.poll_interval if timeout is None else timeout)
+
+        now = time.monotonic()
+        ready = []
+        for path, (size, _, changed_at) in list(self._pending.items()):
+            if size > 0 and now - changed_at >= self.settle_time:
+                ready.append((changed_at, path))
+                del self._pending[path]
+                self._seen.add(path)
+        return [path for _, path in sorted(ready)]
+
+    def requeue(self, path: str):
+        """
+        Devolve um arquivo à fila de espera (ex: falha de decodificação por gravação
+        incompleta). Retorna False quando o limite de tentativas foi atingido.
+        """
+        attempts = self._retries.get(path, 0) + 1
+        if attempts > self.max_retries:
+            return False
+        self._retries[path] = attempts
+        self._seen.discard(path)
+        self._pending.pop(path, None)
+        self._touch(path)
+        return True
+
+    def watch(self, on_ready, max_idle: float = None):
+        """
+        Loop principal: chama `on_ready(paths)` sempre que houver arquivos prontos.
+
+        Args:
+            on_ready (callable): Função que recebe a lista de caminhos prontos.
+            max_idle (float): Encerra após esse número de segundos sem novos arquivos
+                (None observa indefinidamente, até Ctrl+C).
+        """
+        last_activity = time.monotonic()
+        try:
+            while True:
+                ready = self.poll()
+                if ready:
+                    on_ready(ready)
+                    last_activity = time.monotonic()
+                elif max_idle is not None and not self._pending and time.monotonic() - last_activity > max_idle:
+                    break
+        except KeyboardInterrupt:
+            print("\nObservação interrompida pelo usuário.")
+        finally:
+            self.close()
+
+    def close(self):
+        """Libera o descritor do inotify, se houver."""
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None